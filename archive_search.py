@@ -0,0 +1,244 @@
+"""
+离线归档搜索工具
+在 saved_pages/ 中已保存的页面里搜索关键词，匹配规则与 simple_html.search_in_page 相同
+（按行匹配、不区分大小写、每行只算一次），但不需要把文件整体读成Python字符串：
+普通HTML文件用内存映射搜索，归档中的压缩对象按块流式解压，多个文件由进程池并行处理
+"""
+
+import argparse
+import gzip
+import mmap
+import os
+import re
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Iterator, List, Tuple, Optional, Dict
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+SEARCHABLE_SUFFIXES = ('.html', '.htm', '.gz', '.zst')
+READ_CHUNK_SIZE = 1024 * 1024
+COUNT_CHUNK_SIZE = 1024 * 1024
+
+
+@lru_cache(maxsize=32)
+def compile_term(search_term: str) -> "re.Pattern":
+    """
+    把关键词编译成字节正则，效果等同于 search_term.lower() in line.lower()
+
+    字节正则的 IGNORECASE 只处理ASCII字母，所以带大小写的非ASCII字符单独展开成分支
+    """
+    parts = []
+    for ch in search_term:
+        variants = {ch, ch.lower(), ch.upper()}
+        if len(variants) == 1 or ch.isascii():
+            parts.append(re.escape(ch.encode('utf-8')))
+        else:
+            parts.append(b'(?:' + b'|'.join(re.escape(v.encode('utf-8')) for v in sorted(variants)) + b')')
+    return re.compile(b''.join(parts), re.IGNORECASE)
+
+
+def _count_newlines(buf, start: int, end: int) -> int:
+    """分块统计 buf[start:end] 中的换行数，避免一次复制大段内容"""
+    count = 0
+    while start < end:
+        stop = min(start + COUNT_CHUNK_SIZE, end)
+        count += buf[start:stop].count(b'\n')
+        start = stop
+    return count
+
+
+def _scan_buffer(buf, end: int, pattern, line_base: int, max_hits: Optional[int],
+                 hits: List[Tuple[int, str]]) -> int:
+    """
+    在 buf[0:end] 中搜索，命中的行追加到 hits
+
+    只有命中时才计算行号：从上一次命中的位置开始往后数换行
+
+    Returns:
+        buf[0:end] 中的换行总数
+    """
+    pos = 0
+    counted_to = 0
+    line_num = line_base
+    while pos < end:
+        if max_hits is not None and len(hits) >= max_hits:
+            break
+        match = pattern.search(buf, pos, end)
+        if not match:
+            break
+        line_start = buf.rfind(b'\n', 0, match.start()) + 1
+        line_end = buf.find(b'\n', match.end(), end)
+        if line_end == -1:
+            line_end = end
+        line_num += _count_newlines(buf, counted_to, line_start)
+        counted_to = line_start
+        hits.append((line_num + 1, buf[line_start:line_end].decode('utf-8', errors='replace').strip()))
+        pos = line_end + 1
+    return line_num - line_base + _count_newlines(buf, counted_to, end)
+
+
+def _search_mapped(path: str, pattern, max_hits: Optional[int]) -> List[Tuple[int, str]]:
+    """用内存映射搜索未压缩文件"""
+    hits: List[Tuple[int, str]] = []
+    if os.path.getsize(path) == 0:
+        return hits
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        _scan_buffer(mm, len(mm), pattern, 0, max_hits, hits)
+    return hits
+
+
+def _open_compressed(path: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if zstandard is None:
+        raise RuntimeError("搜索zstd对象需要安装zstandard")
+    return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+
+
+def _search_compressed(path: str, pattern, max_hits: Optional[int]) -> List[Tuple[int, str]]:
+    """流式解压搜索压缩对象，每次只保留一块数据和上一块未结束的行"""
+    hits: List[Tuple[int, str]] = []
+    carry = b''
+    line_base = 0
+    with _open_compressed(path) as stream:
+        while max_hits is None or len(hits) < max_hits:
+            chunk = stream.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            buf = carry + chunk
+            last_newline = buf.rfind(b'\n')
+            if last_newline == -1:
+                carry = buf
+                continue
+            line_base += _scan_buffer(buf, last_newline + 1, pattern, line_base, max_hits, hits)
+            carry = buf[last_newline + 1:]
+    if carry and (max_hits is None or len(hits) < max_hits):
+        _scan_buffer(carry, len(carry), pattern, line_base, max_hits, hits)
+    return hits
+
+
+def search_file(path: str, search_term: str, max_hits: Optional[int] = None) -> Tuple[str, List[Tuple[int, str]], Optional[str]]:
+    """
+    在单个文件中搜索关键词（进程池的工作函数）
+
+    Args:
+        path: 文件路径
+        search_term: 搜索关键词
+        max_hits: 单个文件最多返回的结果数，None表示不限制
+
+    Returns:
+        (文件路径, [(行号, 内容), ...], 错误信息)
+    """
+    pattern = compile_term(search_term)
+    try:
+        if path.endswith(('.gz', '.zst')):
+            return path, _search_compressed(path, pattern, max_hits), None
+        return path, _search_mapped(path, pattern, max_hits), None
+    except Exception as e:
+        return path, [], str(e)
+
+
+def iter_archive_files(root: str = "saved_pages") -> Iterator[str]:
+    """遍历目录下所有可搜索的页面文件（跳过搜索结果文件本身）"""
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if name.endswith(SEARCHABLE_SUFFIXES) and not name.startswith('search_results_'):
+                yield os.path.join(dirpath, name)
+
+
+def load_archive_labels(root: str = "saved_pages") -> Dict[str, str]:
+    """读取归档索引，返回 {内容哈希: 最近一次抓取的URL}"""
+    index_path = os.path.join(root, "archive", "index.db")
+    if not os.path.exists(index_path):
+        return {}
+    labels = {}
+    db = sqlite3.connect(index_path)
+    try:
+        for digest, url in db.execute("SELECT digest, url FROM captures ORDER BY captured_at"):
+            labels[digest] = url
+    finally:
+        db.close()
+    return labels
+
+
+def describe_path(path: str, labels: Dict[str, str]) -> str:
+    """归档对象显示为对应的URL，其他文件显示路径"""
+    digest = os.path.basename(path).split('.', 1)[0]
+    return labels.get(digest, path)
+
+
+def search_archive(search_term: str, root: str = "saved_pages", workers: int = None,
+                   max_hits_per_file: int = None) -> Iterator[Tuple[str, int, str]]:
+    """
+    搜索整个页面归档，每个文件搜索完成后立即产出它的结果
+
+    Args:
+        search_term: 搜索关键词
+        root: 页面保存目录
+        workers: 进程数，默认为CPU核数；1表示在当前进程中搜索
+        max_hits_per_file: 单个文件最多返回的结果数
+
+    Yields:
+        (文件路径, 行号, 内容)
+    """
+    files = list(iter_archive_files(root))
+    if not files:
+        return
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(files) == 1:
+        results = (search_file(path, search_term, max_hits_per_file) for path in files)
+        for path, hits, error in results:
+            if error:
+                print(f"✗ 搜索失败 {path}: {error}", file=sys.stderr)
+            for line_num, content in hits:
+                yield path, line_num, content
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(files))) as executor:
+        futures = [executor.submit(search_file, path, search_term, max_hits_per_file) for path in files]
+        for future in as_completed(futures):
+            path, hits, error = future.result()
+            if error:
+                print(f"✗ 搜索失败 {path}: {error}", file=sys.stderr)
+            for line_num, content in hits:
+                yield path, line_num, content
+
+
+def main(argv: List[str] = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="在已保存的页面归档中搜索关键词")
+    parser.add_argument("term", help="搜索关键词")
+    parser.add_argument("--dir", default="saved_pages", help="页面保存目录 (默认: saved_pages)")
+    parser.add_argument("--workers", type=int, default=None, help="进程数 (默认: CPU核数)")
+    parser.add_argument("--max-per-file", type=int, default=None, help="单个文件最多显示的结果数")
+    parser.add_argument("--save", action="store_true", help="把结果保存为HTML文件")
+    args = parser.parse_args(argv)
+
+    labels = load_archive_labels(args.dir)
+    matches = []
+    for path, line_num, content in search_archive(args.term, args.dir, args.workers, args.max_per_file):
+        label = describe_path(path, labels)
+        display_content = content[:200] + "..." if len(content) > 200 else content
+        print(f"{label}:{line_num}: {display_content}", flush=True)
+        matches.append((line_num, f"[{label}] {content}"))
+
+    if not matches:
+        print(f"❌ 没有找到包含'{args.term}'的行")
+        return
+
+    print(f"\n🎯 共找到 {len(matches)} 个匹配结果")
+    if args.save:
+        from simple_html import save_search_results
+        save_search_results(matches, args.term, args.dir)
+
+
+if __name__ == "__main__":
+    main()
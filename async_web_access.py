@@ -0,0 +1,479 @@
+"""
+异步网页访问工具
+WebAccess 的asyncio版本（get、post、get_text、get_json），在一个线程里并发发出大量请求。
+只依赖标准库：基于asyncio流实现HTTP/1.1客户端，按主机复用keep-alive连接，用信号量限制并发
+"""
+
+import asyncio
+import http.client
+import json as json_module
+import ssl
+import time
+import weakref
+import zlib
+from types import SimpleNamespace
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import urlsplit, urljoin, urlencode
+
+from requests.cookies import RequestsCookieJar, MockRequest, MockResponse, get_cookie_header
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from cookie_vault import CookieVault
+from http_transport import DEFAULT_USER_AGENT, TransportStats, get_shared_transport
+from rate_limiter import RateLimiter, get_default_limiter
+
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# 重定向到其他源（协议、主机或端口不同）时去掉的请求头，与 requests 的 rebuild_auth 一致
+CREDENTIAL_HEADERS = ('Authorization', 'Proxy-Authorization', 'Cookie')
+
+# 幂等方法：复用的连接被服务器关闭时可以安全重发（与 urllib3 Retry 的默认方法集合一致）
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS', 'TRACE'])
+
+
+class HTTPProtocolError(Exception):
+    """服务器返回了无法解析的HTTP响应"""
+
+
+class AsyncResponse:
+    """异步请求的响应（常用属性与 requests.Response 一致）"""
+
+    def __init__(self, url: str, status_code: int, reason: str, headers: CaseInsensitiveDict,
+                 content: bytes, elapsed: float, history: List['AsyncResponse'] = None):
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.elapsed = elapsed
+        self.history = history or []
+        # 没有声明charset时按UTF-8解码（JSON接口通常不声明）
+        self.encoding = get_encoding_from_headers(headers) if 'charset' in headers.get('content-type', '') else 'utf-8'
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def json(self) -> Any:
+        return json_module.loads(self.content)
+
+    def __repr__(self):
+        return f"<AsyncResponse [{self.status_code}]>"
+
+
+class _Connection:
+    """一条keep-alive连接"""
+
+    def __init__(self, key: Tuple[str, str, int], reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.key = key
+        self.reader = reader
+        self.writer = writer
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class _LoopResources:
+    """属于一个事件循环的并发信号量、按主机的连接数限制和空闲连接"""
+
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.host_limits: Dict[Tuple[str, str, int], asyncio.Semaphore] = {}
+        self.idle: Dict[Tuple[str, str, int], List[_Connection]] = {}
+
+    def close(self) -> None:
+        for connections in self.idle.values():
+            for conn in connections:
+                try:
+                    conn.close()
+                except RuntimeError:
+                    # 所属的事件循环已经关闭
+                    pass
+        self.idle.clear()
+
+
+def should_strip_credentials(old_url: str, new_url: str) -> bool:
+    """重定向是否换了源：主机不同、端口不同或协议不同（同一主机从http默认端口升级到https默认端口除外）"""
+    old, new = urlsplit(old_url), urlsplit(new_url)
+    if old.hostname != new.hostname:
+        return True
+    if (old.scheme == 'http' and old.port in (80, None) and
+            new.scheme == 'https' and new.port in (443, None)):
+        return False
+    return old.port != new.port or old.scheme != new.scheme
+
+
+class AsyncWebAccess:
+    """
+    异步网页访问类
+
+    可以在多次 asyncio.run() 中重复使用：信号量和空闲连接按事件循环分别创建，
+    用完后 await close()（或使用 async with）关闭当前事件循环中的连接
+    """
+
+    def __init__(self, cookie_vault: CookieVault = None, concurrency: int = 100, per_host: int = None,
+                 timeout: float = 30, max_redirects: int = 10, headers: Dict[str, str] = None,
+                 rate_limiter: RateLimiter = None):
+        """
+        Args:
+            cookie_vault: Cookie保管库，默认使用 ~/.xiumi_toolbox/cookies.json
+            concurrency: 同时进行的最大请求数
+            per_host: 每个主机的最大连接数，默认与concurrency相同
+            timeout: 单个请求的超时时间（秒，包括连接、发送和读取）
+            max_redirects: 最多跟随的重定向次数
+            headers: 额外的默认请求头
+            rate_limiter: 按主机限速的令牌桶，默认使用所有工具共用的限速器
+        """
+        self.concurrency = concurrency
+        self.per_host = per_host or concurrency
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.headers = CaseInsensitiveDict({
+            'User-Agent': DEFAULT_USER_AGENT,
+            'Accept': '*/*',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        })
+        self.headers.update(headers or {})
+        self.cookie_vault = cookie_vault if cookie_vault is not None else CookieVault()
+        # 保管库中的Cookie和响应中设置的Cookie（按域名、路径、secure、过期时间匹配）
+        self.cookies = RequestsCookieJar()
+        self.cookie_vault.load_into_jar(self.cookies)
+        # 请求统计记录到共用传输层中，与同步工具的统计放在一起
+        self.stats: TransportStats = get_shared_transport().stats
+        self.rate_limiter = rate_limiter or get_default_limiter()
+        self._ssl_context = ssl.create_default_context()
+        self._resources: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopResources]' = \
+            weakref.WeakKeyDictionary()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self) -> None:
+        """关闭当前事件循环中的空闲连接"""
+        resources = self._resources.pop(asyncio.get_running_loop(), None)
+        if resources is not None:
+            resources.close()
+
+    def _loop_resources(self) -> _LoopResources:
+        """当前事件循环的资源，第一次在某个事件循环中使用时创建"""
+        loop = asyncio.get_running_loop()
+        resources = self._resources.get(loop)
+        if resources is None:
+            resources = self._resources[loop] = _LoopResources(self.concurrency)
+        return resources
+
+    # ---- 连接管理 ----
+
+    async def _open(self, key: Tuple[str, str, int]) -> _Connection:
+        scheme, host, port = key
+        if scheme == 'https':
+            reader, writer = await asyncio.open_connection(host, port, ssl=self._ssl_context, server_hostname=host)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return _Connection(key, reader, writer)
+
+    def _take_idle(self, key: Tuple[str, str, int]) -> Optional[_Connection]:
+        connections = self._loop_resources().idle.get(key)
+        while connections:
+            conn = connections.pop()
+            if not conn.reader.at_eof() and not conn.writer.is_closing():
+                return conn
+            conn.close()
+        return None
+
+    def _release(self, conn: _Connection, reusable: bool) -> None:
+        if reusable:
+            self._loop_resources().idle.setdefault(conn.key, []).append(conn)
+        else:
+            conn.close()
+
+    # ---- 请求和响应 ----
+
+    def _cookie_header(self, url: str) -> Optional[str]:
+        """按URL的域名、路径和协议（secure Cookie只发给https）选出未过期的Cookie"""
+        return get_cookie_header(self.cookies, SimpleNamespace(url=url, headers={}))
+
+    def _remember_cookies(self, url: str, headers: List[Tuple[str, str]]) -> None:
+        """保存响应设置的Cookie（处理Domain、Path、Expires、Max-Age，Max-Age=0时删除）"""
+        message = http.client.HTTPMessage()
+        for name, value in headers:
+            if name.lower() in ('set-cookie', 'set-cookie2'):
+                message[name] = value
+        if message:
+            request = MockRequest(SimpleNamespace(url=url, headers={}))
+            self.cookies.extract_cookies(MockResponse(message), request)
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> Tuple[int, str, List[Tuple[str, str]]]:
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionResetError("连接已被服务器关闭")
+            parts = line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+            if len(parts) < 2 or not parts[0].startswith('HTTP/') or not parts[1].isdigit():
+                raise HTTPProtocolError(f"无效的状态行: {line[:100]!r}")
+            status = int(parts[1])
+            reason = parts[2] if len(parts) > 2 else ''
+            headers = []
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers.append((name.strip(), value.strip()))
+            # 跳过 100 Continue 等临时响应
+            if status >= 200 or status == 101:
+                return status, reason, headers
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        body = bytearray()
+        while True:
+            size_line = await reader.readline()
+            try:
+                size = int(size_line.split(b';', 1)[0].strip(), 16)
+            except ValueError:
+                raise HTTPProtocolError(f"无效的分块长度: {size_line[:100]!r}")
+            if size == 0:
+                # 跳过trailer
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return bytes(body)
+            body += await reader.readexactly(size)
+            await reader.readexactly(2)
+
+    @staticmethod
+    def _decode_body(body: bytes, encoding: str) -> bytes:
+        encoding = encoding.lower()
+        if encoding in ('gzip', 'x-gzip'):
+            return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        if encoding == 'deflate':
+            try:
+                return zlib.decompress(body)
+            except zlib.error:
+                return zlib.decompress(body, -zlib.MAX_WBITS)
+        return body
+
+    async def _exchange(self, conn: _Connection, method: str, target: str, headers: CaseInsensitiveDict,
+                        body: bytes) -> Tuple[int, str, List[Tuple[str, str]], bytes, bool]:
+        """在一条连接上发送请求、读取完整响应，返回 (状态码, 原因, 响应头, 响应体, 连接可否复用)"""
+        lines = [f"{method} {target} HTTP/1.1"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        conn.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await conn.writer.drain()
+
+        status, reason, response_headers = await self._read_headers(conn.reader)
+        header_map = CaseInsensitiveDict(response_headers)
+        reusable = header_map.get('Connection', '').lower() != 'close'
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            content = b''
+        elif 'chunked' in header_map.get('Transfer-Encoding', '').lower():
+            content = await self._read_chunked(conn.reader)
+        elif header_map.get('Content-Length', '').isdigit():
+            content = await conn.reader.readexactly(int(header_map['Content-Length']))
+        else:
+            # 没有长度信息，读到连接关闭为止
+            content = await conn.reader.read()
+            reusable = False
+        content = self._decode_body(content, header_map.get('Content-Encoding', ''))
+        return status, reason, response_headers, content, reusable
+
+    async def _send_once(self, method: str, url: str, headers: CaseInsensitiveDict, body: bytes):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"不支持的URL: {url}")
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        target = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+
+        request_headers = CaseInsensitiveDict(self.headers)
+        default_port = 443 if scheme == 'https' else 80
+        request_headers['Host'] = parts.hostname if port == default_port else f"{parts.hostname}:{port}"
+        cookie = self._cookie_header(url)
+        if cookie:
+            request_headers['Cookie'] = cookie
+        if body or method in ('POST', 'PUT', 'PATCH'):
+            request_headers['Content-Length'] = str(len(body))
+        request_headers.update(headers)
+
+        await self.rate_limiter.acquire_async(url)
+        host_limits = self._loop_resources().host_limits
+        limit = host_limits.get(key)
+        if limit is None:
+            limit = host_limits[key] = asyncio.Semaphore(self.per_host)
+        async with limit:
+            conn = self._take_idle(key)
+            reused = conn is not None
+            if conn is None:
+                conn = await self._open(key)
+            try:
+                result = await self._exchange(conn, method, target, request_headers, body)
+            except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+                conn.close()
+                if not reused or method not in IDEMPOTENT_METHODS:
+                    raise
+                # 复用的空闲连接可能已被服务器关闭，换新连接重试一次
+                # （POST等非幂等请求可能已经被服务器处理，不重发）
+                conn = await self._open(key)
+                try:
+                    result = await self._exchange(conn, method, target, request_headers, body)
+                except BaseException:
+                    conn.close()
+                    raise
+            except BaseException:
+                conn.close()
+                raise
+            self._release(conn, result[4])
+        self._remember_cookies(url, result[2])
+        return result
+
+    async def request(self, method: str, url: str, params: Dict = None, data: Dict = None,
+                      json: Any = None, headers: Dict[str, str] = None, timeout: float = None) -> AsyncResponse:
+        """
+        发送请求（跟随重定向），异常会继续抛出
+
+        Args:
+            method: 请求方法
+            url: 请求URL
+            params: URL参数
+            data: 表单数据
+            json: JSON数据
+            headers: 额外的请求头
+            timeout: 超时时间（秒），默认使用 self.timeout
+
+        Returns:
+            AsyncResponse对象
+
+        Raises:
+            asyncio.TimeoutError: 超时
+            OSError: 连接失败
+            HTTPProtocolError: 响应格式错误
+        """
+        method = method.upper()
+        headers = CaseInsensitiveDict(headers or {})
+        body = b''
+        if json is not None:
+            body = json_module.dumps(json, ensure_ascii=False).encode('utf-8')
+            headers.setdefault('Content-Type', 'application/json')
+        elif data is not None:
+            body = urlencode(data, doseq=True).encode('utf-8')
+            headers.setdefault('Content-Type', 'application/x-www-form-urlencoded')
+        if params:
+            url += ('&' if urlsplit(url).query else '?') + urlencode(params, doseq=True)
+
+        async with self._loop_resources().semaphore:
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    self._follow(method, url, headers, body), timeout or self.timeout)
+            except Exception:
+                self.stats.record(url, time.perf_counter() - start)
+                raise
+            response.elapsed = time.perf_counter() - start
+            self.stats.record(url, response.elapsed, response.status_code)
+            return response
+
+    async def _follow(self, method: str, url: str, headers: CaseInsensitiveDict, body: bytes) -> AsyncResponse:
+        history = []
+        for _ in range(self.max_redirects + 1):
+            start = time.perf_counter()
+            status, reason, raw_headers, content, _ = await self._send_once(method, url, headers, body)
+            response = AsyncResponse(url, status, reason, CaseInsensitiveDict(raw_headers), content,
+                                     time.perf_counter() - start, list(history))
+            location = response.headers.get('Location')
+            if status not in REDIRECT_STATUSES or not location:
+                return response
+            history.append(response)
+            new_url = urljoin(url, location)
+            if should_strip_credentials(url, new_url):
+                # 不把调用方的凭据带到其他站点；新地址的Cookie由Cookie罐重新计算
+                headers = CaseInsensitiveDict(headers)
+                for name in CREDENTIAL_HEADERS:
+                    headers.pop(name, None)
+            url = new_url
+            if status == 303 or (status in (301, 302) and method == 'POST'):
+                method, body = 'GET', b''
+                headers.pop('Content-Type', None)
+        raise HTTPProtocolError(f"重定向次数超过 {self.max_redirects} 次")
+
+    async def get(self, url: str, params: Dict = None) -> Optional[AsyncResponse]:
+        """
+        GET请求获取网页
+
+        Args:
+            url: 网页URL
+            params: URL参数
+
+        Returns:
+            AsyncResponse对象，失败返回None
+        """
+        try:
+            response = await self.request('GET', url, params=params)
+            return response if response.status_code == 200 else None
+        except Exception:
+            return None
+
+    async def post(self, url: str, data: Dict = None, json: Dict = None) -> Optional[AsyncResponse]:
+        """
+        POST请求发送数据
+
+        Args:
+            url: 网页URL
+            data: 表单数据
+            json: JSON数据
+
+        Returns:
+            AsyncResponse对象，失败返回None
+        """
+        try:
+            if json:
+                response = await self.request('POST', url, json=json)
+            else:
+                response = await self.request('POST', url, data=data)
+            return response if response.status_code in [200, 201] else None
+        except Exception:
+            return None
+
+    async def get_text(self, url: str) -> str:
+        """获取网页文本内容"""
+        response = await self.get(url)
+        return response.text if response else ""
+
+    async def get_json(self, url: str) -> Dict:
+        """获取JSON数据"""
+        response = await self.get(url)
+        try:
+            return response.json() if response else {}
+        except ValueError:
+            return {}
+
+
+async def demo():
+    """演示用法：并发获取多个JSON接口"""
+    urls = [f"https://httpbin.org/anything/{i}" for i in range(20)]
+    async with AsyncWebAccess(concurrency=10) as web:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(web.get_json(url) for url in urls))
+        elapsed = time.perf_counter() - start
+        ok = sum(1 for result in results if result)
+        print(f"并发获取 {len(urls)} 个JSON接口: 成功 {ok} 个，用时 {elapsed:.2f} 秒")
+        web.stats.print_summary()
+
+
+def main():
+    asyncio.run(demo())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,594 @@
+"""
+性能基准测试
+用本地生成的大型秀米风格页面测量解析等热点路径的耗时，不访问网络
+
+运行: python benchmarks.py
+保存基线: python benchmarks.py baseline
+与基线比较: python benchmarks.py compare --tolerance 0.2   （有用例变慢超过容差时退出码为1）
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Any, Optional
+from urllib.parse import urljoin
+
+import lxml.html
+import requests
+from bs4 import BeautifulSoup
+
+try:
+    from selenium.common.exceptions import NoSuchElementException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+except ImportError:
+    # 没有安装selenium时跳过抓取器用例
+    By = None
+
+from cookie_vault import CookieVault
+from http_transport import HttpTransport
+from page_lines import PageLines
+from page_summary import summarize_html
+from rate_limiter import RateLimiter
+from simple_web_access import SimpleWebAccess, DEFAULT_PARSER
+from text_extract import extract_text, html_to_text, iter_text
+from web_access import WebAccess
+
+
+# 基线文件默认位置
+DEFAULT_BASELINE_FILE = 'benchmark_baseline.json'
+
+# 默认容差：中位数耗时增加超过20%视为退化
+DEFAULT_TOLERANCE = 0.20
+
+# 编辑器页面中的文章数量
+EDITOR_ARTICLE_COUNT = 12
+
+
+def make_xiumi_page(sections: int = 2000) -> str:
+    """
+    生成秀米图文风格的大页面（大量带内联样式的嵌套section、图片、链接和脚本）
+
+    Args:
+        sections: 图文段落数量
+
+    Returns:
+        HTML字符串
+    """
+    parts = [
+        '<!DOCTYPE html>\n<html lang="zh-CN">\n<head>\n',
+        '<meta charset="UTF-8">\n',
+        '<title>秀米图文 - 基准测试页面</title>\n',
+        '<meta name="description" content="用于性能测试的秀米图文页面">\n',
+        '<meta name="keywords" content="秀米,图文,排版">\n',
+        '<style>.tn-box{margin:0 auto;} .tn-text{line-height:1.8;}</style>\n',
+        '<script>window.__XIUMI_STATE__ = {"show": true, "items": [1, 2, 3]};</script>\n',
+        '</head>\n<body>\n<div class="tn-page">\n',
+    ]
+    for i in range(sections):
+        parts.append(
+            f'<section class="tn-box" style="margin: 10px 0; text-align: center; box-sizing: border-box;">\n'
+            f'  <section class="tn-text" style="font-size: 15px; color: rgb(62, 62, 62); padding: 0 8px;">\n'
+            f'    <p style="white-space: normal;">第{i}段  秀米排版示例文字，Xiumi layout sample text {i}。</p>\n'
+            f'    <p><span style="font-weight: bold;">小标题 {i}</span>  <a href="/article/{i % 500}" title="文章{i}">阅读原文</a></p>\n'
+            f'  </section>\n'
+            f'  <img src="https://img.xiumi.us/xmi/ua/{i:06d}.png" style="width: 100%; vertical-align: middle;">\n'
+            f'  <a href="https://xiumi.us/#/article/{i}">相关文章 {i}</a>\n'
+            f'</section>\n'
+        )
+        if i % 200 == 0:
+            parts.append(f'<script>console.log("section {i}");</script>\n<!-- 分隔 {i} -->\n')
+    parts.append('</div>\n</body>\n</html>\n')
+    return ''.join(parts)
+
+
+def to_single_line(html: str) -> str:
+    """
+    把页面压缩成一行（去掉换行和缩进，与线上压缩过的HTML相同，整页只有一个文本行）
+
+    按行处理文本的代码在这种页面上容易退化成平方复杂度，回归检查同时覆盖两种页面
+
+    Args:
+        html: HTML字符串
+
+    Returns:
+        只有一行的HTML字符串
+    """
+    return ''.join(line.strip() for line in html.splitlines())
+
+
+def editor_page(count: int = EDITOR_ARTICLE_COUNT) -> str:
+    """秀米编辑器风格的文章列表页面（文章项通过 data-href 打开编辑页面）"""
+    items = ''.join(
+        f'<div class="article-item" data-href="/article/{i}">'
+        f'<h3>测试文章 {i}</h3><span class="date">2024-01-{i % 28 + 1:02d}</span></div>\n'
+        for i in range(count)
+    )
+    return (f'<html><head><title>秀米编辑器</title></head><body>'
+            f'<div class="header-user">测试用户</div><div class="list">\n{items}</div></body></html>')
+
+
+def article_page(index: int) -> str:
+    """文章编辑页面，包含另存按钮和另存码输入框"""
+    return (f'<html><head><title>测试文章 {index}</title></head><body>'
+            f'<h1>测试文章 {index}</h1><button class="share">另存</button>'
+            f'<div class="code"><input placeholder="另存码" value="XM-{index:04d}"></div>'
+            f'</body></html>')
+
+
+class FakeElement:
+    """WebDriver元素的最小替身"""
+
+    def __init__(self, node, driver: "FakeDriver"):
+        self._node = node
+        self._driver = driver
+
+    @property
+    def text(self) -> str:
+        return self._node.text_content().strip()
+
+    @property
+    def tag_name(self) -> str:
+        return self._node.tag
+
+    def get_attribute(self, name: str):
+        return self._node.get(name)
+
+    def find_element(self, by, selector):
+        return self._driver._first(self._node.xpath(selector), selector)
+
+    def find_elements(self, by, selector):
+        return [FakeElement(node, self._driver) for node in self._node.xpath(selector)]
+
+    def is_displayed(self) -> bool:
+        return True
+
+    def is_enabled(self) -> bool:
+        return True
+
+    def click(self) -> None:
+        href = self._node.get('data-href') or self._node.get('href')
+        if href:
+            self._driver.get(urljoin(self._driver.current_url, href))
+
+
+class FakeDriver:
+    """
+    用requests加载页面、用lxml执行XPath的WebDriver替身
+
+    只实现抓取器用到的方法：get、back、find_element(s)、execute_script里的点击、page_source
+    """
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.session.trust_env = False
+        self.current_url = 'about:blank'
+        self.history = []
+        self.requests = 0
+        self._doc = lxml.html.fromstring('<html><body></body></html>')
+
+    def _load(self, url: str) -> None:
+        response = self.session.get(url, timeout=10)
+        self.requests += 1
+        self.current_url = response.url
+        self._doc = lxml.html.fromstring(response.text)
+
+    def get(self, url: str) -> None:
+        if self.current_url != 'about:blank':
+            self.history.append(self.current_url)
+        self._load(url)
+
+    def back(self) -> None:
+        if self.history:
+            self._load(self.history.pop())
+
+    def _first(self, nodes, selector):
+        if not nodes:
+            raise NoSuchElementException(f"找不到元素: {selector}")
+        return FakeElement(nodes[0], self)
+
+    def find_element(self, by, selector):
+        assert by == By.XPATH
+        return self._first(self._doc.xpath(selector), selector)
+
+    def find_elements(self, by, selector):
+        assert by == By.XPATH
+        return [FakeElement(node, self) for node in self._doc.xpath(selector)]
+
+    def execute_script(self, script: str, *args):
+        if 'click()' in script and args:
+            args[0].click()
+        return None
+
+    @property
+    def page_source(self) -> str:
+        return lxml.html.tostring(self._doc, encoding='unicode')
+
+    def quit(self) -> None:
+        self.session.close()
+
+
+def measure(func: Callable[[], object], repeat: int = 5) -> Dict[str, float]:
+    """
+    多次执行并统计耗时
+
+    Returns:
+        {'best': 最短耗时, 'median': 中位数耗时}（秒）
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {'best': min(timings), 'median': statistics.median(timings)}
+
+
+def bench_parse(html: str, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """比较不同解析器和部分解析的耗时"""
+    web_access = SimpleWebAccess()
+    response = SimpleNamespace(text=html)
+    cases = {
+        'html.parser 完整解析': lambda: web_access.parse_html(response, parser='html.parser'),
+        f'{DEFAULT_PARSER} 完整解析': lambda: web_access.parse_html(response),
+        f'{DEFAULT_PARSER} 只解析 title/meta/a/img': lambda: web_access.parse_html(
+            response, tags=['title', 'meta', 'a', 'img']),
+        f'{DEFAULT_PARSER} 只解析 title/meta': lambda: web_access.parse_html(response, tags=['title', 'meta']),
+    }
+    return {name: measure(func, repeat) for name, func in cases.items()}
+
+
+def dom_page_summary(web_access: SimpleWebAccess, html: str) -> Dict[str, object]:
+    """基于完整DOM树的页面摘要（get_page_info 改为流式解析之前的做法），作为对照"""
+    soup = web_access.parse_html(SimpleNamespace(text=html))
+    title_tag = soup.find('title')
+    desc_tag = soup.find('meta', attrs={'name': 'description'})
+    keywords_tag = soup.find('meta', attrs={'name': 'keywords'})
+    return {
+        'title': title_tag.text.strip() if title_tag else '',
+        'description': desc_tag.get('content', '') if desc_tag else '',
+        'keywords': keywords_tag.get('content', '') if keywords_tag else '',
+        'links_count': len(soup.find_all('a', href=True)),
+        'images_count': len(soup.find_all('img')),
+        'text_length': len(web_access.extract_text(soup)),
+    }
+
+
+def bench_summary(html: str, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """比较DOM摘要与流式摘要的耗时"""
+    web_access = SimpleWebAccess()
+    cases = {
+        'DOM树 + 多次遍历': lambda: dom_page_summary(web_access, html),
+        '流式单遍摘要': lambda: summarize_html(html),
+        '流式摘要 (只要元数据)': lambda: summarize_html(html, metadata_only=True),
+    }
+    return {name: measure(func, repeat) for name, func in cases.items()}
+
+
+def legacy_extract_text(soup: BeautifulSoup) -> str:
+    """旧版 SimpleWebAccess.extract_text（删除script/style后get_text，再多次拆分拼接），作为对照"""
+    for script in soup(["script", "style"]):
+        script.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+def bench_text(html: str, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """比较旧版与单遍文本提取的耗时（不含解析时间的用例共用同一棵树）"""
+    soup = BeautifulSoup(html, DEFAULT_PARSER)
+    legacy_soups = iter([BeautifulSoup(html, DEFAULT_PARSER) for _ in range(repeat)])
+    cases = {
+        '旧版 get_text + 多次拆分': lambda: legacy_extract_text(next(legacy_soups)),
+        '单遍提取 (BeautifulSoup树)': lambda: extract_text(soup),
+        '单遍流式分块 (BeautifulSoup树)': lambda: sum(1 for _ in iter_text(soup)),
+        '旧版 (含BeautifulSoup解析)': lambda: legacy_extract_text(BeautifulSoup(html, DEFAULT_PARSER)),
+        '单遍提取 (lxml树，含解析)': lambda: html_to_text(html),
+    }
+    return {name: measure(func, repeat) for name, func in cases.items()}
+
+
+def print_results(title: str, results: Dict[str, Dict[str, float]]) -> None:
+    """打印耗时表，并给出相对第一项的加速比"""
+    print(f"\n{title}")
+    print(f"{'用例':<40} {'最短':>11} {'中位数':>11} {'加速比':>8}")
+    print("-" * 72)
+    baseline = None
+    for name, timing in results.items():
+        baseline = baseline or timing['median']
+        speedup = baseline / timing['median'] if timing['median'] else 0
+        print(f"{name:<40} {timing['best'] * 1000:>9.1f}ms {timing['median'] * 1000:>9.1f}ms {speedup:>7.1f}x")
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    """本地测试服务器：/editor 和 /article/N 返回编辑器页面，其他路径都返回同一个页面"""
+
+    protocol_version = 'HTTP/1.1'
+    # 关闭Nagle算法：响应头和响应体分开写入时，Nagle与客户端的延迟ACK会让每个请求多等约40毫秒
+    disable_nagle_algorithm = True
+    body = b''
+
+    def do_GET(self):
+        if self.path == '/editor':
+            body = editor_page().encode('utf-8')
+        elif self.path.startswith('/article/'):
+            body = article_page(int(self.path.rsplit('/', 1)[1])).encode('utf-8')
+        else:
+            body = self.body
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_page_server(html: str) -> ThreadingHTTPServer:
+    """在本机随机端口启动测试服务器（后台线程）"""
+    handler = type('Handler', (_PageHandler,), {'body': html.encode('utf-8')})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_fetcher(editor_url: str, work_dir: str) -> int:
+    """
+    用 FakeDriver 完整运行一次 XiumiQuickShareFetcher.run()（登录检测、文章列表、逐篇获取另存码、保存结果）
+
+    抓取器中等待页面加载的固定 time.sleep 不执行，只测量代码本身的耗时；输出不打印
+
+    Args:
+        editor_url: 本地编辑器页面地址
+        work_dir: 保存Cookie、另存码文件和数据库的临时目录
+
+    Returns:
+        获取到的另存码数量
+    """
+    import fetch_quickshare
+    from browser_watchdog import BrowserWatchdog
+
+    fetcher = fetch_quickshare.XiumiQuickShareFetcher()
+    fetcher.cookie_vault = CookieVault(os.path.join(work_dir, 'cookies.json'))
+    fetcher.rate_limiter = RateLimiter(default_rate=None, host_limits={})
+    fetcher.login_url = fetcher.editor_url = editor_url
+    fetcher.output_dir = work_dir
+    fetcher.store_path = os.path.join(work_dir, 'quickshare.db')
+    fetcher.watchdog = BrowserWatchdog(max_rss_mb=None, max_js_heap_mb=None, max_articles=None)
+
+    def setup_driver(**options):
+        fetcher._driver_options = dict(options)
+        fetcher.driver = FakeDriver()
+        fetcher.wait = WebDriverWait(fetcher.driver, 0.05, poll_frequency=0.01)
+
+    fetcher.setup_driver = setup_driver
+    real_time = fetch_quickshare.time
+    fetch_quickshare.time = SimpleNamespace(sleep=lambda seconds: None, time=time.time, perf_counter=time.perf_counter)
+    try:
+        with redirect_stdout(io.StringIO()):
+            return len(fetcher.run())
+    finally:
+        fetch_quickshare.time = real_time
+
+
+def run_suite(html: str = None, repeat: int = 5) -> Dict[str, Dict[str, Any]]:
+    """
+    运行回归检查用的基准用例（抓取、另存码抓取器、搜索、解析、文本提取）
+
+    Returns:
+        {用例名: {'best': 最短耗时, 'median': 中位数耗时, 'throughput': 吞吐量, 'unit': 吞吐量单位}}
+    """
+    html = html or make_xiumi_page()
+    megabytes = len(html.encode('utf-8')) / 1024 / 1024
+    single_line = to_single_line(html)
+    single_line_megabytes = len(single_line.encode('utf-8')) / 1024 / 1024
+    server = start_page_server(html)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    transport = HttpTransport(max_retries=0, pool_maxsize=8)
+    transport.session.trust_env = False
+    simple = SimpleWebAccess(transport=transport)
+    web = WebAccess(transport=transport)
+    page = PageLines.from_text(html)
+    soup = BeautifulSoup(html, DEFAULT_PARSER)
+    response = SimpleNamespace(text=html)
+    fetch_count = 20
+    work_dir = tempfile.TemporaryDirectory(prefix='xiumi_benchmark_')
+
+    # (用例名, 函数, 每次执行处理的数量, 单位)
+    cases = [
+        ('抓取: 单个页面', lambda: transport.get(f"{base_url}/page").content, megabytes, 'MB/s'),
+        (f'抓取: get_many {fetch_count}个页面', lambda: sum(
+            1 for r in web.get_many([f"{base_url}/page/{i}" for i in range(fetch_count)], concurrency=8) if r['ok']),
+         fetch_count, '页/s'),
+        (f'抓取器: run() {EDITOR_ARTICLE_COUNT}篇文章', lambda: run_fetcher(f"{base_url}/editor", work_dir.name),
+         EDITOR_ARTICLE_COUNT, '篇/s'),
+        ('搜索: PageLines.search', lambda: page.search('小标题 1999'), megabytes, 'MB/s'),
+        (f'解析: {DEFAULT_PARSER} 完整解析', lambda: simple.parse_html(response), megabytes, 'MB/s'),
+        (f'解析: {DEFAULT_PARSER} 只解析 title/meta', lambda: simple.parse_html(response, tags=['title', 'meta']),
+         megabytes, 'MB/s'),
+        ('解析: 流式页面摘要', lambda: summarize_html(html), megabytes, 'MB/s'),
+        ('解析: 流式页面摘要 (单行页面)', lambda: summarize_html(single_line), single_line_megabytes, 'MB/s'),
+        ('文本: 单遍提取 (BeautifulSoup树)', lambda: extract_text(soup), megabytes, 'MB/s'),
+        ('文本: 单遍提取 (lxml树，含解析)', lambda: html_to_text(html), megabytes, 'MB/s'),
+        ('文本: 单遍提取 (单行页面，lxml树，含解析)', lambda: html_to_text(single_line), single_line_megabytes, 'MB/s'),
+    ]
+    if By is None:
+        cases = [case for case in cases if not case[0].startswith('抓取器')]
+    results = {}
+    try:
+        for name, func, amount, unit in cases:
+            func()  # 预热（建立连接、导入模块）
+            timing = measure(func, repeat)
+            timing['throughput'] = amount / timing['median'] if timing['median'] else 0.0
+            timing['unit'] = unit
+            results[name] = timing
+    finally:
+        transport.close()
+        server.shutdown()
+        server.server_close()
+        work_dir.cleanup()
+    return results
+
+
+def machine_info() -> Dict[str, str]:
+    """基线对应的运行环境（在不同机器上比较没有意义）"""
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor() or '',
+        'cpu_count': str(os.cpu_count()),
+    }
+
+
+def save_baseline(results: Dict[str, Dict[str, Any]], path: str = DEFAULT_BASELINE_FILE) -> None:
+    """保存基线文件"""
+    data = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'machine': machine_info(),
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def load_baseline(path: str = DEFAULT_BASELINE_FILE) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_results(baseline: Dict[str, Dict[str, Any]], current: Dict[str, Dict[str, Any]],
+                    tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """
+    逐个用例比较当前结果与基线
+
+    只按中位数耗时判断：吞吐量由处理量除以中位数耗时得到，耗时增加超过容差时吞吐量也相应下降，
+    单独再设一个吞吐量容差只是同一个检查的另一种写法。吞吐量变化只在表中列出供参考
+
+    Args:
+        baseline: 基线结果
+        current: 当前结果
+        tolerance: 中位数耗时允许增加的比例
+
+    Returns:
+        [{'name', 'base_median', 'median', 'latency_delta', 'base_throughput', 'throughput',
+          'throughput_delta', 'unit', 'status'}]，status 为 'ok'、'faster'、'regressed'、'new' 或 'missing'
+    """
+    rows = []
+    for name in list(baseline) + [n for n in current if n not in baseline]:
+        base, cur = baseline.get(name), current.get(name)
+        row = {'name': name, 'unit': (cur or base)['unit']}
+        if base is None or cur is None:
+            row['status'] = 'new' if base is None else 'missing'
+            rows.append(row)
+            continue
+        latency_delta = cur['median'] / base['median'] - 1 if base['median'] else 0.0
+        throughput_delta = cur['throughput'] / base['throughput'] - 1 if base['throughput'] else 0.0
+        if latency_delta > tolerance:
+            status = 'regressed'
+        elif latency_delta < -tolerance:
+            status = 'faster'
+        else:
+            status = 'ok'
+        row.update({
+            'base_median': base['median'],
+            'median': cur['median'],
+            'latency_delta': latency_delta,
+            'base_throughput': base['throughput'],
+            'throughput': cur['throughput'],
+            'throughput_delta': throughput_delta,
+            'status': status,
+        })
+        rows.append(row)
+    return rows
+
+
+_STATUS_LABELS = {'ok': '✓ 正常', 'faster': '✓ 变快', 'regressed': '✗ 退化', 'new': '新增', 'missing': '缺失'}
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> None:
+    """打印与基线的对比表"""
+    print(f"\n{'用例':<36} {'基线':>10} {'当前':>10} {'耗时变化':>9} {'吞吐量':>16} {'变化':>8}  结果")
+    print("-" * 104)
+    for row in rows:
+        if 'median' not in row:
+            print(f"{row['name']:<36} {'':>10} {'':>10} {'':>9} {'':>16} {'':>8}  {_STATUS_LABELS[row['status']]}")
+            continue
+        throughput = f"{row['throughput']:.1f} {row['unit']}"
+        print(f"{row['name']:<36} {row['base_median'] * 1000:>8.1f}ms {row['median'] * 1000:>8.1f}ms "
+              f"{row['latency_delta']:>+8.1%} {throughput:>16} {row['throughput_delta']:>+7.1%}  "
+              f"{_STATUS_LABELS[row['status']]}")
+
+
+def print_suite(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"\n{'用例':<36} {'最短':>11} {'中位数':>11} {'吞吐量':>16}")
+    print("-" * 78)
+    for name, timing in results.items():
+        throughput = f"{timing['throughput']:.1f} {timing['unit']}"
+        print(f"{name:<36} {timing['best'] * 1000:>9.1f}ms {timing['median'] * 1000:>9.1f}ms {throughput:>16}")
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    命令行入口
+
+    不带命令时运行全部对比基准；baseline 保存回归基线；compare 与基线比较，有退化时返回1
+    """
+    parser = argparse.ArgumentParser(description="离线性能基准测试")
+    parser.add_argument("command", nargs="?", choices=["run", "baseline", "compare"], default="run",
+                        help="run 运行对比基准（默认）/ baseline 保存基线 / compare 与基线比较")
+    parser.add_argument("--file", default=DEFAULT_BASELINE_FILE, help=f"基线文件 (默认: {DEFAULT_BASELINE_FILE})")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例的执行次数 (默认: 5)")
+    parser.add_argument("--sections", type=int, default=2000, help="测试页面的图文段落数 (默认: 2000)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"中位数耗时允许增加的比例 (默认: {DEFAULT_TOLERANCE})")
+    args = parser.parse_args(argv)
+
+    html = make_xiumi_page(args.sections)
+    print(f"测试页面大小: {len(html.encode('utf-8')) / 1024 / 1024:.1f} MB")
+
+    if args.command == "run":
+        print_results("HTML解析 (SimpleWebAccess.parse_html)", bench_parse(html, args.repeat))
+        print_results("页面摘要 (SimpleWebAccess.get_page_info)", bench_summary(html, args.repeat))
+        print_results("文本提取 (SimpleWebAccess.extract_text)", bench_text(html, args.repeat))
+        return 0
+
+    results = run_suite(html, args.repeat)
+    if args.command == "baseline":
+        print_suite(results)
+        save_baseline(results, args.file)
+        print(f"\n✓ 基线已保存: {args.file}")
+        return 0
+
+    if not os.path.exists(args.file):
+        print(f"✗ 找不到基线文件: {args.file}，请先运行 python benchmarks.py baseline")
+        return 2
+    baseline = load_baseline(args.file)
+    if baseline.get('machine') != machine_info():
+        print(f"⚠️  基线是在其他环境中生成的 ({baseline.get('created_at')})，结果仅供参考")
+    rows = compare_results(baseline['results'], results, args.tolerance)
+    print_comparison(rows)
+
+    regressed = [row['name'] for row in rows if row['status'] == 'regressed']
+    if regressed:
+        print(f"\n✗ {len(regressed)} 个用例超过容差 (耗时 +{args.tolerance:.0%}): " + "、".join(regressed))
+        return 1
+    print(f"\n✓ 没有超过容差的退化 (耗时 +{args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,639 @@
+"""
+浏览器池守护进程
+常驻后台，在一段连续的调试端口上保持N个已登录的无头浏览器，定期检查健康状态，
+通过本地Unix套接字把浏览器租给抓取脚本。抓取脚本连接租到的调试端口即可工作，
+不用再等待浏览器启动和登录。
+
+用法:
+    python browser_pool_daemon.py start --size 3     # 启动守护进程（前台运行，Ctrl+C停止）
+    python browser_pool_daemon.py status             # 查看各浏览器状态
+    python browser_pool_daemon.py stop               # 停止守护进程并关闭所有浏览器
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+try:
+    import websocket  # websocket-client，selenium的依赖
+except ImportError:
+    websocket = None
+
+from cookie_vault import CookieVault
+from start_browser import get_devtools_version, launch_debug_browser
+
+
+_TOOLBOX_DIR = os.path.join(os.path.expanduser('~'), '.xiumi_toolbox')
+
+# 不支持Unix套接字的系统（Windows）改用本机TCP端口
+HAS_UNIX_SOCKET = hasattr(socket, 'AF_UNIX')
+DEFAULT_SOCKET_PATH = os.environ.get(
+    'XIUMI_BROWSER_POOL_SOCKET',
+    os.path.join(_TOOLBOX_DIR, 'browser_pool.sock') if HAS_UNIX_SOCKET else '127.0.0.1:9299'
+)
+DEFAULT_PROFILE_ROOT = os.path.join(_TOOLBOX_DIR, 'browser_pool')
+
+# 第i个浏览器使用 DEFAULT_BASE_PORT + i 作为调试端口
+DEFAULT_BASE_PORT = 9300
+
+# 空闲浏览器的健康检查间隔（秒）
+DEFAULT_HEALTH_INTERVAL = 30.0
+
+
+class PoolError(Exception):
+    """守护进程不可用或租用失败"""
+
+
+def cdp_call(ws_url: str, method: str, params: Dict[str, Any] = None, timeout: float = 10) -> Dict[str, Any]:
+    """
+    通过WebSocket直接调用一次DevTools协议命令（不需要WebDriver）
+
+    Args:
+        ws_url: 调试目标的WebSocket地址（浏览器级地址来自 /json/version）
+        method: 命令名，如 'Storage.setCookies'
+        params: 命令参数
+        timeout: 超时时间（秒）
+
+    Returns:
+        命令的result部分
+    """
+    if websocket is None:
+        raise PoolError("缺少 websocket-client，请运行: pip install websocket-client")
+    conn = websocket.create_connection(ws_url, timeout=timeout, suppress_origin=True)
+    try:
+        conn.send(json.dumps({'id': 1, 'method': method, 'params': params or {}}))
+        while True:
+            message = json.loads(conn.recv())
+            # 跳过事件通知，只等自己的响应
+            if message.get('id') == 1:
+                break
+    finally:
+        conn.close()
+    if 'error' in message:
+        raise PoolError(f"{method} 失败: {message['error'].get('message')}")
+    return message.get('result', {})
+
+
+def _parse_address(address: str):
+    """'host:port' 表示TCP地址，其他视为Unix套接字路径"""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and os.sep not in host:
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    return socket.AF_UNIX, address
+
+
+class BrowserSlot:
+    """池中的一个浏览器实例"""
+
+    def __init__(self, index: int, port: int, user_data_dir: str):
+        self.index = index
+        self.port = port
+        self.user_data_dir = user_data_dir
+        self.process: Optional[subprocess.Popen] = None
+        self.ws_url: Optional[str] = None
+        self.version = ''
+        self.holder: Optional[str] = None
+        self.leases = 0
+        self.restarts = 0
+        self.started_at = 0.0
+        self.cookies_seeded_at: Optional[str] = None
+
+    @property
+    def leased(self) -> bool:
+        return self.holder is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'index': self.index,
+            'port': self.port,
+            'debugger_address': f"127.0.0.1:{self.port}",
+            'ws_url': self.ws_url,
+            'version': self.version,
+            'pid': self.process.pid if self.process else None,
+            'holder': self.holder,
+            'leases': self.leases,
+            'restarts': self.restarts,
+            'uptime': time.time() - self.started_at if self.started_at else 0.0,
+        }
+
+
+class BrowserPoolDaemon:
+    """保持一组预热、已登录的调试模式浏览器，并按需出租"""
+
+    def __init__(self, size: int = 2, browser: str = "chrome", browser_path: str = None,
+                 base_port: int = DEFAULT_BASE_PORT, socket_path: str = DEFAULT_SOCKET_PATH,
+                 profile_root: str = DEFAULT_PROFILE_ROOT, headless: bool = True,
+                 health_interval: float = DEFAULT_HEALTH_INTERVAL, cookie_vault: CookieVault = None):
+        """
+        Args:
+            size: 浏览器实例数量
+            browser: 浏览器类型 ("chrome" 或 "edge")
+            browser_path: 浏览器可执行文件路径，为None时自动检测
+            base_port: 第一个浏览器的调试端口，其余依次加1
+            socket_path: 监听的Unix套接字路径（Windows上为 'host:port'）
+            profile_root: 各浏览器用户数据目录的上级目录（登录状态保存在这里）
+            headless: 是否使用无头模式
+            health_interval: 空闲浏览器的健康检查间隔（秒）
+            cookie_vault: 登录Cookie来源，默认使用 ~/.xiumi_toolbox/cookies.json
+        """
+        self.browser = browser
+        self.browser_path = browser_path
+        self.socket_path = socket_path
+        self.headless = headless
+        self.health_interval = health_interval
+        self.cookie_vault = cookie_vault or CookieVault()
+        self.slots = [
+            BrowserSlot(i, base_port + i, os.path.join(profile_root, f"{browser}-{base_port + i}"))
+            for i in range(size)
+        ]
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._server: Optional[socketserver.BaseServer] = None
+        self._health_thread: Optional[threading.Thread] = None
+
+    # ---- 浏览器管理 ----
+
+    def _start_slot(self, slot: BrowserSlot) -> None:
+        result = launch_debug_browser(self.browser, self.browser_path, slot.port,
+                                      user_data_dir=slot.user_data_dir, headless=self.headless)
+        if result['process'] is None:
+            raise PoolError(f"端口 {slot.port} 已被其他浏览器占用")
+        slot.process = result['process']
+        slot.ws_url = result['ws_url']
+        slot.version = result['version']
+        slot.started_at = time.time()
+        self._seed_cookies(slot)
+        print(f"✓ 浏览器 #{slot.index} 已就绪 (端口 {slot.port}, 用时 {result['startup_time']:.1f} 秒)")
+
+    def _stop_slot(self, slot: BrowserSlot) -> None:
+        process, slot.process, slot.ws_url = slot.process, None, None
+        if process is None or process.poll() is not None:
+            return
+        try:
+            if os.name == 'nt':
+                process.terminate()
+            else:
+                # 浏览器在独立的进程组中启动，连同渲染进程一起结束
+                os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            if os.name == 'nt':
+                process.kill()
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+        except ProcessLookupError:
+            pass
+
+    def _restart_slot(self, slot: BrowserSlot, reason: str) -> None:
+        print(f"⚠️  浏览器 #{slot.index} {reason}，正在重启...")
+        self._stop_slot(slot)
+        slot.restarts += 1
+        try:
+            self._start_slot(slot)
+        except Exception as e:
+            print(f"✗ 浏览器 #{slot.index} 重启失败: {e}")
+
+    def _seed_cookies(self, slot: BrowserSlot) -> None:
+        """把保管库中的登录Cookie写入浏览器（作用于整个浏览器，不需要打开页面）"""
+        self.cookie_vault.load()
+        cookies = []
+        for c in self.cookie_vault.valid_cookies():
+            param = {
+                'name': c['name'],
+                'value': c['value'],
+                'domain': c['domain'],
+                'path': c['path'],
+                'secure': c['secure'],
+                'httpOnly': c['httpOnly'],
+            }
+            if c.get('expires'):
+                param['expires'] = c['expires']
+            cookies.append(param)
+        if cookies:
+            cdp_call(slot.ws_url, 'Storage.setCookies', {'cookies': cookies})
+        slot.cookies_seeded_at = self.cookie_vault.updated_at
+
+    def _reset_slot(self, slot: BrowserSlot) -> None:
+        """关闭租用者留下的标签页，只留一个 about:blank，下一个租用者拿到的是干净的浏览器"""
+        targets = cdp_call(slot.ws_url, 'Target.getTargets').get('targetInfos', [])
+        cdp_call(slot.ws_url, 'Target.createTarget', {'url': 'about:blank'})
+        for target in targets:
+            if target.get('type') == 'page':
+                cdp_call(slot.ws_url, 'Target.closeTarget', {'targetId': target['targetId']})
+
+    def _is_healthy(self, slot: BrowserSlot) -> bool:
+        if slot.process is None or slot.process.poll() is not None:
+            return False
+        info = get_devtools_version(slot.port, timeout=3)
+        return bool(info) and info['webSocketDebuggerUrl'] == slot.ws_url
+
+    def health_check(self) -> None:
+        """检查所有空闲浏览器：失效的重启，保管库有新Cookie时重新写入"""
+        for slot in self.slots:
+            with self._cond:
+                if slot.leased:
+                    continue
+                # 检查期间不出租
+                slot.holder = '(health-check)'
+            try:
+                if not self._is_healthy(slot):
+                    self._restart_slot(slot, "没有响应")
+                elif self.cookie_vault.updated_at != slot.cookies_seeded_at:
+                    self._seed_cookies(slot)
+            except Exception as e:
+                print(f"⚠️  检查浏览器 #{slot.index} 失败: {e}")
+            finally:
+                with self._cond:
+                    slot.holder = None
+                    self._cond.notify()
+
+    def _health_loop(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            self.cookie_vault.load()
+            self.health_check()
+
+    # ---- 租用 ----
+
+    def lease(self, holder: str, timeout: float = None) -> Optional[BrowserSlot]:
+        """
+        租用一个空闲浏览器
+
+        Args:
+            holder: 租用者描述（用于状态显示）
+            timeout: 等待空闲浏览器的超时时间（秒），None表示一直等待
+
+        Returns:
+            租到的浏览器，超时返回None
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                slot = next((s for s in self.slots if not s.leased and s.process is not None), None)
+                if slot is not None:
+                    slot.holder = holder
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if (remaining is not None and remaining <= 0) or self._stop.is_set():
+                    return None
+                self._cond.wait(remaining)
+        # 出租前确认浏览器还活着
+        if not self._is_healthy(slot):
+            self._restart_slot(slot, "已失效")
+            if slot.process is None:
+                self._free(slot)
+                return self.lease(holder, None if deadline is None else max(0.0, deadline - time.monotonic()))
+        slot.leases += 1
+        return slot
+
+    def release(self, slot: BrowserSlot, healthy: bool = True) -> None:
+        """
+        归还浏览器：检查是否还活着并重置到 about:blank 后放回池中，
+        租用者报告异常、没有响应或重置失败时重启
+        """
+        if not self._stop.is_set():
+            reason = None if healthy else "被报告异常"
+            if reason is None and not self._is_healthy(slot):
+                reason = "归还时没有响应"
+            if reason is None:
+                try:
+                    self._reset_slot(slot)
+                except Exception as e:
+                    reason = f"重置失败（{e}）"
+            if reason is not None:
+                self._restart_slot(slot, reason)
+        self._free(slot)
+
+    def _free(self, slot: BrowserSlot) -> None:
+        with self._cond:
+            slot.holder = None
+            self._cond.notify()
+
+    def status(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'browser': self.browser,
+                'size': len(self.slots),
+                'idle': sum(1 for s in self.slots if not s.leased and s.process is not None),
+                'logged_in': self.cookie_vault.has_login(),
+                'slots': [s.to_dict() for s in self.slots],
+            }
+
+    # ---- 服务 ----
+
+    def start(self) -> None:
+        """并行启动所有浏览器，开始健康检查并监听套接字"""
+        print(f"正在启动 {len(self.slots)} 个{self.browser.upper()}浏览器...")
+        if not self.cookie_vault.has_login():
+            print("⚠️  Cookie保管库中没有登录Cookie，请先运行 fetch_quickshare.py 登录一次")
+        with ThreadPoolExecutor(max_workers=len(self.slots)) as executor:
+            errors = [e for e in executor.map(self._try_start_slot, self.slots) if e]
+        if len(errors) == len(self.slots):
+            self.close()
+            raise PoolError(f"所有浏览器都启动失败: {errors[0]}")
+
+        self._server = self._make_server()
+        self._health_thread = threading.Thread(target=self._health_loop, daemon=True)
+        self._health_thread.start()
+        print(f"✓ 浏览器池已就绪，监听: {self.socket_path}")
+
+    def _try_start_slot(self, slot: BrowserSlot) -> Optional[Exception]:
+        try:
+            self._start_slot(slot)
+            return None
+        except Exception as e:
+            print(f"✗ 浏览器 #{slot.index} 启动失败: {e}")
+            return e
+
+    def _make_server(self) -> socketserver.BaseServer:
+        family, address = _parse_address(self.socket_path)
+        handler = type('Handler', (_LeaseHandler,), {'daemon': self})
+        if family == socket.AF_INET:
+            socketserver.ThreadingTCPServer.allow_reuse_address = True
+            server = socketserver.ThreadingTCPServer(address, handler)
+        else:
+            if os.path.exists(address):
+                if _ping(self.socket_path):
+                    raise PoolError(f"守护进程已在运行: {address}")
+                # 上次异常退出留下的套接字文件
+                os.remove(address)
+            os.makedirs(os.path.dirname(os.path.abspath(address)), mode=0o700, exist_ok=True)
+            server = socketserver.ThreadingUnixStreamServer(address, handler)
+            os.chmod(address, 0o600)
+        server.daemon_threads = True
+        return server
+
+    def serve_forever(self) -> None:
+        """处理租用请求，直到收到stop命令或Ctrl+C"""
+        try:
+            self._server.serve_forever(poll_interval=0.5)
+        finally:
+            self.close()
+
+    def shutdown(self) -> None:
+        """从其他线程停止服务"""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._server is not None:
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+
+    def close(self) -> None:
+        """关闭所有浏览器并删除套接字文件"""
+        self._stop.set()
+        if self._server is not None:
+            self._server.server_close()
+            family, address = _parse_address(self.socket_path)
+            if family != socket.AF_INET and os.path.exists(address):
+                os.remove(address)
+            self._server = None
+        for slot in self.slots:
+            self._stop_slot(slot)
+        print("✓ 浏览器池已关闭")
+
+
+class _LeaseHandler(socketserver.StreamRequestHandler):
+    """
+    一个连接对应一个客户端，按行收发JSON。
+    租用期间客户端保持连接，连接断开（包括客户端崩溃）时自动归还它租用的浏览器
+    """
+
+    daemon: BrowserPoolDaemon = None
+
+    def handle(self) -> None:
+        leased: Dict[int, BrowserSlot] = {}
+        try:
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                    response = self._dispatch(request, leased)
+                except Exception as e:
+                    response = {'ok': False, 'error': str(e)}
+                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                self.wfile.flush()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            # 客户端没有归还就断开了（可能已崩溃），与正常归还一样检查并重置后收回
+            for slot in leased.values():
+                print(f"⚠️  客户端断开时没有归还浏览器 #{slot.index}，检查后收回")
+                self.daemon.release(slot)
+
+    def _dispatch(self, request: Dict[str, Any], leased: Dict[int, BrowserSlot]) -> Dict[str, Any]:
+        op = request.get('op')
+        if op == 'lease':
+            holder = request.get('holder') or 'client'
+            slot = self.daemon.lease(holder, request.get('timeout'))
+            if slot is None:
+                return {'ok': False, 'error': "没有空闲的浏览器"}
+            leased[slot.port] = slot
+            return {'ok': True, 'lease': dict(slot.to_dict(), browser=self.daemon.browser)}
+        if op == 'release':
+            slot = leased.pop(request.get('port'), None)
+            if slot is None:
+                return {'ok': False, 'error': "没有租用这个浏览器"}
+            self.daemon.release(slot, healthy=request.get('healthy', True))
+            return {'ok': True}
+        if op == 'status':
+            return {'ok': True, 'status': self.daemon.status()}
+        if op == 'ping':
+            return {'ok': True}
+        if op == 'stop':
+            self.daemon.shutdown()
+            return {'ok': True}
+        return {'ok': False, 'error': f"未知操作: {op}"}
+
+
+class BrowserPoolClient:
+    """守护进程客户端，租用期间保持连接"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float = 10):
+        """
+        Args:
+            socket_path: 守护进程的套接字路径（Windows上为 'host:port'）
+            timeout: 连接和普通请求的超时时间（秒）
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+
+    def _connect(self) -> None:
+        if self._sock is not None:
+            return
+        family, address = _parse_address(self.socket_path)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(address)
+        except OSError as e:
+            sock.close()
+            raise PoolError(f"无法连接浏览器池守护进程 ({self.socket_path}): {e}")
+        self._sock = sock
+        self._file = sock.makefile('rwb')
+
+    def _request(self, payload: Dict[str, Any], timeout: float = None) -> Dict[str, Any]:
+        self._connect()
+        self._sock.settimeout(timeout or self.timeout)
+        try:
+            self._file.write(json.dumps(payload).encode('utf-8') + b'\n')
+            self._file.flush()
+            line = self._file.readline()
+        except OSError as e:
+            self.close()
+            raise PoolError(f"与守护进程通信失败: {e}")
+        if not line:
+            self.close()
+            raise PoolError("守护进程关闭了连接")
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise PoolError(response.get('error', '请求失败'))
+        return response
+
+    def lease(self, timeout: float = 60) -> Dict[str, Any]:
+        """
+        租用一个浏览器
+
+        Args:
+            timeout: 等待空闲浏览器的超时时间（秒）
+
+        Returns:
+            {'port', 'debugger_address': 传给 debuggerAddress 的地址, 'ws_url', 'browser': 浏览器类型, ...}
+        """
+        holder = f"pid {os.getpid()}@{socket.gethostname()}"
+        response = self._request({'op': 'lease', 'holder': holder, 'timeout': timeout},
+                                 timeout=timeout + self.timeout)
+        return response['lease']
+
+    def release(self, lease: Dict[str, Any], healthy: bool = True) -> None:
+        """归还浏览器，healthy=False 时守护进程会重启它"""
+        self._request({'op': 'release', 'port': lease['port'], 'healthy': healthy})
+
+    @contextmanager
+    def leased(self, timeout: float = 60):
+        """租用一个浏览器，用完自动归还（出现异常时按不健康归还）"""
+        lease = self.lease(timeout)
+        healthy = True
+        try:
+            yield lease
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            try:
+                self.release(lease, healthy)
+            except PoolError:
+                pass
+
+    def status(self) -> Dict[str, Any]:
+        return self._request({'op': 'status'})['status']
+
+    def stop(self) -> None:
+        """停止守护进程"""
+        self._request({'op': 'stop'})
+
+    def close(self) -> None:
+        """断开连接（未归还的浏览器由守护进程自动收回）"""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _ping(socket_path: str) -> bool:
+    with BrowserPoolClient(socket_path, timeout=2) as client:
+        try:
+            client._request({'op': 'ping'})
+            return True
+        except PoolError:
+            return False
+
+
+def is_daemon_running(socket_path: str = DEFAULT_SOCKET_PATH) -> bool:
+    """守护进程是否在运行"""
+    return _ping(socket_path)
+
+
+def print_status(status: Dict[str, Any]) -> None:
+    print(f"浏览器: {status['browser'].upper()}  数量: {status['size']}  空闲: {status['idle']}  "
+          f"登录Cookie: {'有' if status['logged_in'] else '无'}")
+    for slot in status['slots']:
+        state = f"租用中 ({slot['holder']})" if slot['holder'] else ('空闲' if slot['pid'] else '未运行')
+        print(f"  #{slot['index']} 端口 {slot['port']}  {state}  "
+              f"已租用 {slot['leases']} 次  重启 {slot['restarts']} 次  运行 {slot['uptime'] / 60:.0f} 分钟")
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="浏览器池守护进程：保持一组已登录的无头浏览器供抓取脚本租用")
+    parser.add_argument("command", choices=["start", "status", "stop"], help="start 启动 / status 查看状态 / stop 停止")
+    parser.add_argument("--size", type=int, default=2, help="浏览器数量 (默认: 2)")
+    parser.add_argument("--browser", choices=["chrome", "edge"], default="chrome", help="浏览器类型 (默认: chrome)")
+    parser.add_argument("--browser-path", default=None, help="浏览器可执行文件路径 (默认自动检测)")
+    parser.add_argument("--base-port", type=int, default=DEFAULT_BASE_PORT, help=f"起始调试端口 (默认: {DEFAULT_BASE_PORT})")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help=f"套接字路径 (默认: {DEFAULT_SOCKET_PATH})")
+    parser.add_argument("--health-interval", type=float, default=DEFAULT_HEALTH_INTERVAL, help="健康检查间隔秒数")
+    parser.add_argument("--show-window", action="store_true", help="显示浏览器窗口（默认无头模式）")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        try:
+            with BrowserPoolClient(args.socket) as client:
+                print_status(client.status())
+        except PoolError as e:
+            print(f"✗ {e}")
+        return
+
+    if args.command == "stop":
+        try:
+            with BrowserPoolClient(args.socket) as client:
+                client.stop()
+            print("✓ 已通知守护进程停止")
+        except PoolError as e:
+            print(f"✗ {e}")
+        return
+
+    daemon = BrowserPoolDaemon(
+        size=args.size,
+        browser=args.browser,
+        browser_path=args.browser_path,
+        base_port=args.base_port,
+        socket_path=args.socket,
+        headless=not args.show_window,
+        health_interval=args.health_interval,
+    )
+    # kill/systemctl stop 时也要关闭浏览器
+    signal.signal(signal.SIGTERM, lambda *_: daemon.shutdown())
+    try:
+        daemon.start()
+    except PoolError as e:
+        print(f"✗ {e}")
+        return
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        # serve_forever 退出时已经关闭了所有浏览器
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+浏览器内存看门狗
+长时间抓取时定期采样浏览器进程的内存（RSS，需要psutil）和页面的JS堆大小（DevTools），
+超过阈值或处理的文章数达到上限时通知抓取器回收浏览器，使每篇文章的耗时不随运行时间增长
+"""
+
+from typing import Dict, Any, List, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# 浏览器所有进程的内存上限（MB）
+DEFAULT_MAX_RSS_MB = 1500
+
+# 当前页面的JS堆上限（MB）
+DEFAULT_MAX_JS_HEAP_MB = 512
+
+# 同一个浏览器最多处理的文章数，None表示不限制
+DEFAULT_MAX_ARTICLES = 200
+
+# 每处理多少篇文章采样一次内存
+DEFAULT_SAMPLE_EVERY = 5
+
+_MB = 1024 * 1024
+
+
+def process_tree_rss(pid: int) -> Optional[int]:
+    """
+    进程及其所有子进程的常驻内存之和（Chromium的渲染进程、GPU进程都是子进程）
+
+    Returns:
+        字节数，没有安装psutil或进程不存在时返回None
+    """
+    if psutil is None or not pid:
+        return None
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            # 采样期间退出的子进程
+            continue
+    return total
+
+
+def js_heap_usage(driver) -> Optional[Dict[str, int]]:
+    """
+    通过DevTools的Performance.getMetrics读取当前页面的JS堆
+
+    Returns:
+        {'used': 已用字节, 'total': 已分配字节}，驱动不支持DevTools命令时返回None
+    """
+    try:
+        driver.execute_cdp_cmd('Performance.enable', {})
+        metrics = driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']
+    except Exception:
+        return None
+    values = {m['name']: m['value'] for m in metrics}
+    if 'JSHeapUsedSize' not in values:
+        return None
+    return {'used': int(values['JSHeapUsedSize']), 'total': int(values.get('JSHeapTotalSize', 0))}
+
+
+class BrowserWatchdog:
+    """记录每篇文章的耗时并定期采样内存，判断是否需要回收浏览器"""
+
+    def __init__(self, max_rss_mb: Optional[float] = DEFAULT_MAX_RSS_MB,
+                 max_js_heap_mb: Optional[float] = DEFAULT_MAX_JS_HEAP_MB,
+                 max_articles: Optional[int] = DEFAULT_MAX_ARTICLES,
+                 sample_every: int = DEFAULT_SAMPLE_EVERY):
+        """
+        Args:
+            max_rss_mb: 浏览器所有进程的内存上限（MB），None表示不检查
+            max_js_heap_mb: 页面JS堆上限（MB），None表示不检查
+            max_articles: 同一个浏览器最多处理的文章数，None表示不限制
+            sample_every: 每处理多少篇文章采样一次内存
+        """
+        self.max_rss_mb = max_rss_mb
+        self.max_js_heap_mb = max_js_heap_mb
+        self.max_articles = max_articles
+        self.sample_every = max(1, sample_every)
+        self.driver = None
+        self.browser_pid: Optional[int] = None
+        self.articles = 0  # 当前浏览器已处理的文章数
+        self.total_articles = 0
+        self.recycles = 0
+        self.latencies: List[float] = []
+        self.samples: List[Dict[str, Any]] = []
+        self._warned_no_psutil = False
+
+    def attach(self, driver, browser_pid: int = None) -> None:
+        """
+        开始监视一个（新的）浏览器
+
+        Args:
+            driver: WebDriver实例
+            browser_pid: 浏览器主进程（或启动它的驱动进程）的PID，用于统计内存
+        """
+        if self.driver is not None:
+            self.recycles += 1
+        self.driver = driver
+        self.browser_pid = browser_pid
+        self.articles = 0
+        if browser_pid and psutil is None and not self._warned_no_psutil:
+            print("⚠️  未安装psutil，只检查JS堆大小 (pip install psutil)")
+            self._warned_no_psutil = True
+
+    def sample(self) -> Dict[str, Any]:
+        """采样一次内存，返回 {'articles', 'rss_mb', 'js_heap_mb'}（无法获取的项为None）"""
+        rss = process_tree_rss(self.browser_pid)
+        heap = js_heap_usage(self.driver) if self.driver is not None else None
+        sample = {
+            'articles': self.total_articles,
+            'rss_mb': rss / _MB if rss is not None else None,
+            'js_heap_mb': heap['used'] / _MB if heap else None,
+        }
+        self.samples.append(sample)
+        return sample
+
+    def record_article(self, elapsed: float) -> Optional[str]:
+        """
+        记录处理完一篇文章
+
+        Args:
+            elapsed: 这篇文章的耗时（秒）
+
+        Returns:
+            需要回收浏览器时返回原因，否则返回None
+        """
+        self.articles += 1
+        self.total_articles += 1
+        self.latencies.append(elapsed)
+
+        if self.max_articles and self.articles >= self.max_articles:
+            return f"已处理 {self.articles} 篇文章"
+        if self.articles % self.sample_every:
+            return None
+
+        sample = self.sample()
+        if self.max_rss_mb and sample['rss_mb'] is not None and sample['rss_mb'] > self.max_rss_mb:
+            return f"浏览器内存 {sample['rss_mb']:.0f} MB 超过上限 {self.max_rss_mb:.0f} MB"
+        if self.max_js_heap_mb and sample['js_heap_mb'] is not None and sample['js_heap_mb'] > self.max_js_heap_mb:
+            return f"JS堆 {sample['js_heap_mb']:.0f} MB 超过上限 {self.max_js_heap_mb:.0f} MB"
+        return None
+
+    def summary(self) -> Dict[str, Any]:
+        """运行统计：文章数、回收次数、前后各10%文章的平均耗时、内存峰值"""
+        latencies = self.latencies
+        tail = max(1, len(latencies) // 10)
+        rss_values = [s['rss_mb'] for s in self.samples if s['rss_mb'] is not None]
+        heap_values = [s['js_heap_mb'] for s in self.samples if s['js_heap_mb'] is not None]
+        return {
+            'articles': self.total_articles,
+            'recycles': self.recycles,
+            'avg_latency': sum(latencies) / len(latencies) if latencies else 0.0,
+            'first_latency': sum(latencies[:tail]) / tail if latencies else 0.0,
+            'last_latency': sum(latencies[-tail:]) / tail if latencies else 0.0,
+            'peak_rss_mb': max(rss_values) if rss_values else None,
+            'peak_js_heap_mb': max(heap_values) if heap_values else None,
+        }
+
+    def print_summary(self) -> None:
+        stats = self.summary()
+        if not stats['articles']:
+            return
+        print(f"浏览器看门狗: 处理 {stats['articles']} 篇文章，回收浏览器 {stats['recycles']} 次")
+        print(f"  平均耗时 {stats['avg_latency']:.2f} 秒 "
+              f"(开始 {stats['first_latency']:.2f} 秒 / 结束 {stats['last_latency']:.2f} 秒)")
+        if stats['peak_rss_mb'] is not None:
+            print(f"  浏览器内存峰值 {stats['peak_rss_mb']:.0f} MB")
+        if stats['peak_js_heap_mb'] is not None:
+            print(f"  JS堆峰值 {stats['peak_js_heap_mb']:.0f} MB")
+
+
+def driver_process_pid(driver) -> Optional[int]:
+    """由Selenium启动的浏览器：返回驱动进程的PID（浏览器是它的子进程）"""
+    service = getattr(driver, 'service', None)
+    process = getattr(service, 'process', None)
+    return process.pid if process is not None else None
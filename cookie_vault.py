@@ -0,0 +1,206 @@
+"""
+Cookie保管库
+在磁盘上保存登录后的Cookie（带过期时间），供Selenium驱动和各个requests会话共用
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from typing import Optional, Dict, List, Any
+
+import requests
+
+
+DEFAULT_VAULT_PATH = os.environ.get(
+    'XIUMI_COOKIE_VAULT',
+    os.path.join(os.path.expanduser('~'), '.xiumi_toolbox', 'cookies.json')
+)
+DEFAULT_DOMAIN = '.xiumi.us'
+
+
+class CookieVault:
+    """Cookie保管库"""
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: 保管库文件路径，默认为 ~/.xiumi_toolbox/cookies.json
+                  （可用环境变量 XIUMI_COOKIE_VAULT 修改）
+        """
+        self.path = path or DEFAULT_VAULT_PATH
+        self.cookies: List[Dict[str, Any]] = []
+        self.updated_at: Optional[str] = None
+        self.load()
+
+    def is_default(self) -> bool:
+        """是否是默认位置的保管库（共用传输层只加载这个保管库的Cookie）"""
+        return os.path.abspath(self.path) == os.path.abspath(DEFAULT_VAULT_PATH)
+
+    def load(self) -> None:
+        """从磁盘读取保管库，文件不存在时为空"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.cookies = data.get('cookies', [])
+            self.updated_at = data.get('updated_at')
+        except (OSError, ValueError) as e:
+            print(f"⚠️  读取Cookie保管库失败: {e}")
+            self.cookies = []
+
+    def save(self) -> None:
+        """写入磁盘（仅当前用户可读写，先写临时文件再替换）"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        self.updated_at = datetime.now().isoformat(timespec='seconds')
+        data = {'updated_at': self.updated_at, 'cookies': self.cookies}
+
+        tmp_path = self.path + '.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _merge(self, new_cookies: List[Dict[str, Any]]) -> None:
+        """按 (name, domain, path) 合并Cookie，新值覆盖旧值"""
+        index = {(c['name'], c['domain'], c['path']): c for c in self.cookies}
+        for cookie in new_cookies:
+            index[(cookie['name'], cookie['domain'], cookie['path'])] = cookie
+        self.cookies = list(index.values())
+
+    @staticmethod
+    def _make_cookie(name: str, value: str, domain: str = DEFAULT_DOMAIN, path: str = '/',
+                     expires: Optional[float] = None, secure: bool = False, http_only: bool = False) -> Dict[str, Any]:
+        return {
+            'name': name,
+            'value': value,
+            'domain': domain or DEFAULT_DOMAIN,
+            'path': path or '/',
+            'expires': expires,
+            'secure': bool(secure),
+            'httpOnly': bool(http_only),
+        }
+
+    def store_driver_cookies(self, driver) -> int:
+        """
+        导出浏览器驱动中的Cookie并保存
+
+        Args:
+            driver: Selenium WebDriver实例（需已登录）
+
+        Returns:
+            保存的Cookie数量
+        """
+        cookies = [
+            self._make_cookie(c['name'], c['value'], c.get('domain'), c.get('path'),
+                              c.get('expiry'), c.get('secure', False), c.get('httpOnly', False))
+            for c in driver.get_cookies()
+        ]
+        self._merge(cookies)
+        self.save()
+        return len(cookies)
+
+    def store_session_cookies(self, session: requests.Session) -> int:
+        """
+        保存requests会话中的Cookie（例如服务器刷新了sid之后）
+
+        Returns:
+            保存的Cookie数量
+        """
+        cookies = [
+            self._make_cookie(c.name, c.value, c.domain, c.path, c.expires, c.secure,
+                              c.has_nonstandard_attr('HttpOnly'))
+            for c in session.cookies
+        ]
+        self._merge(cookies)
+        self.save()
+        return len(cookies)
+
+    def store_dict(self, cookies: Dict[str, str], domain: str = DEFAULT_DOMAIN, expires: Optional[float] = None) -> int:
+        """
+        保存手动输入的Cookie字典
+
+        Args:
+            cookies: Cookie字典
+            domain: Cookie所属域名
+            expires: 过期时间戳，None表示未知（视为会话Cookie，一直有效）
+
+        Returns:
+            保存的Cookie数量
+        """
+        self._merge([self._make_cookie(name, value, domain, '/', expires) for name, value in cookies.items()])
+        self.save()
+        return len(cookies)
+
+    def valid_cookies(self, now: float = None) -> List[Dict[str, Any]]:
+        """未过期的Cookie列表"""
+        now = now or time.time()
+        return [c for c in self.cookies if c.get('expires') is None or c['expires'] > now]
+
+    def as_dict(self) -> Dict[str, str]:
+        """未过期Cookie的 {name: value} 字典"""
+        return {c['name']: c['value'] for c in self.valid_cookies()}
+
+    def has_login(self, name: str = 'sid') -> bool:
+        """是否保存有未过期的登录Cookie"""
+        return any(c['name'] == name for c in self.valid_cookies())
+
+    def prune_expired(self) -> int:
+        """删除已过期的Cookie，返回删除数量"""
+        valid = self.valid_cookies()
+        removed = len(self.cookies) - len(valid)
+        if removed:
+            self.cookies = valid
+            self.save()
+        return removed
+
+    def load_into_session(self, session: requests.Session) -> int:
+        """
+        把未过期的Cookie加载到requests会话
+
+        Returns:
+            加载的Cookie数量
+        """
+        return self.load_into_jar(session.cookies)
+
+    def load_into_jar(self, jar: requests.cookies.RequestsCookieJar) -> int:
+        """
+        把未过期的Cookie加载到CookieJar（保留域名、路径、secure和过期时间）
+
+        Returns:
+            加载的Cookie数量
+        """
+        cookies = self.valid_cookies()
+        for c in cookies:
+            jar.set(
+                c['name'], c['value'],
+                domain=c['domain'], path=c['path'], secure=c['secure'],
+                expires=int(c['expires']) if c.get('expires') else None,
+                rest={'HttpOnly': None} if c.get('httpOnly') else {}
+            )
+        return len(cookies)
+
+    def load_into_driver(self, driver) -> int:
+        """
+        通过DevTools协议把未过期的Cookie写入浏览器（不需要先打开页面）
+
+        Returns:
+            加载的Cookie数量
+        """
+        cookies = self.valid_cookies()
+        for c in cookies:
+            params = {
+                'name': c['name'],
+                'value': c['value'],
+                'domain': c['domain'],
+                'path': c['path'],
+                'secure': c['secure'],
+                'httpOnly': c['httpOnly'],
+            }
+            if c.get('expires'):
+                params['expires'] = c['expires']
+            driver.execute_cdp_cmd('Network.setCookie', params)
+        return len(cookies)
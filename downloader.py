@@ -0,0 +1,310 @@
+"""
+分段、可续传的文件下载
+服务器支持Range时把大文件拆成多段并行下载；中断后根据进度文件从断点继续，
+先写入临时文件，完成后再改名为目标文件
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit, unquote
+
+import requests
+
+from http_transport import HttpTransport
+
+
+# 写盘缓冲区大小
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+# 每次从连接读取的字节数
+READ_CHUNK_SIZE = 64 * 1024
+
+# 小于 2 * 此值的文件不分段
+DEFAULT_MIN_SEGMENT_SIZE = 4 * 1024 * 1024
+
+# 进度文件的最短保存间隔（秒）
+STATE_SAVE_INTERVAL = 1.0
+
+_CONTENT_RANGE = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+
+# Range按传输字节计算，必须关闭压缩，否则各段拼不回原文件
+_DOWNLOAD_HEADERS = {'Accept-Encoding': 'identity'}
+
+
+class DownloadInterrupted(Exception):
+    """下载被中止（进度已保存，可以续传）"""
+
+
+def filename_from_url(url: str, default: str = 'downloaded_file') -> str:
+    """从URL路径取文件名（去掉查询参数）"""
+    name = unquote(urlsplit(url).path.rstrip('/').split('/')[-1])
+    return name or default
+
+
+def format_size(size: float) -> str:
+    """把字节数格式化为便于阅读的字符串"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{int(size)} B"
+        size /= 1024
+
+
+class Downloader:
+    """分段并行、支持断点续传的下载器"""
+
+    def __init__(self, transport: HttpTransport = None, segments: int = 4,
+                 min_segment_size: int = DEFAULT_MIN_SEGMENT_SIZE,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE, timeout: float = 30):
+        """
+        Args:
+            transport: HTTP传输层（共享会话的请求头和Cookie），默认新建
+            segments: 最大分段数，1表示始终单连接下载
+            min_segment_size: 每段的最小字节数
+            buffer_size: 读写缓冲大小（字节）
+            timeout: 单次读取超时时间（秒）
+        """
+        self.transport = transport or HttpTransport(pool_maxsize=max(segments, 10))
+        self.segments = max(1, segments)
+        self.min_segment_size = min_segment_size
+        self.buffer_size = buffer_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def probe(self, url: str) -> Dict[str, Any]:
+        """
+        用 Range: bytes=0-0 请求探测文件大小和是否支持分段
+
+        Returns:
+            {'size': 文件大小或None, 'accept_ranges': 是否支持Range,
+             'etag': ETag, 'last_modified': Last-Modified, 'url': 重定向后的URL}
+        """
+        headers = dict(_DOWNLOAD_HEADERS, Range='bytes=0-0')
+        response = self.transport.get(url, headers=headers, stream=True, timeout=self.timeout)
+        try:
+            if response.status_code not in (200, 206):
+                raise requests.exceptions.HTTPError(f"状态码 {response.status_code}", response=response)
+            info = {
+                'size': None,
+                'accept_ranges': False,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'url': response.url,
+            }
+            if response.status_code == 206:
+                match = _CONTENT_RANGE.match(response.headers.get('Content-Range', ''))
+                if match and match.group(3) != '*':
+                    info['size'] = int(match.group(3))
+                    info['accept_ranges'] = True
+                # 只有1个字节，读完后连接可以放回连接池
+                response.content
+            elif response.headers.get('Content-Length', '').isdigit():
+                info['size'] = int(response.headers['Content-Length'])
+            return info
+        finally:
+            response.close()
+
+    def plan_segments(self, size: Optional[int], accept_ranges: bool) -> List[Dict[str, int]]:
+        """
+        划分下载段
+
+        Returns:
+            [{'start': 起始字节, 'end': 结束字节（含，大小未知时为None）, 'done': 已下载字节}]
+        """
+        if not size:
+            return [{'start': 0, 'end': None if size is None else -1, 'done': 0}]
+        count = 1
+        if accept_ranges:
+            count = max(1, min(self.segments, size // self.min_segment_size))
+        step = size // count
+        segments = []
+        for i in range(count):
+            start = i * step
+            end = size - 1 if i == count - 1 else start + step - 1
+            segments.append({'start': start, 'end': end, 'done': 0})
+        return segments
+
+    @staticmethod
+    def _state_path(filename: str) -> str:
+        return filename + '.part.json'
+
+    @staticmethod
+    def _part_path(filename: str) -> str:
+        return filename + '.part'
+
+    def _load_state(self, filename: str, url: str, info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """读取进度文件，文件在服务器上已经变化（大小、ETag、修改时间不同）时返回None"""
+        path = self._state_path(filename)
+        if not os.path.exists(path) or not os.path.exists(self._part_path(filename)):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('url') != url or not info['accept_ranges']:
+            return None
+        for key in ('size', 'etag', 'last_modified'):
+            if state.get(key) != info[key]:
+                return None
+        part_size = os.path.getsize(self._part_path(filename))
+        if any(seg['start'] + seg['done'] > part_size for seg in state['segments']):
+            return None
+        return state
+
+    def _save_state(self, filename: str, state: Dict[str, Any]) -> None:
+        path = self._state_path(filename)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def _fetch_segment(self, url: str, part_path: str, segment: Dict[str, int],
+                       ranged: bool, filename: str, state: Dict[str, Any]) -> None:
+        """下载一段，写入临时文件的对应位置"""
+        offset = segment['start'] + segment['done']
+        end = segment['end']
+        if end is not None and offset > end:
+            return
+        headers = dict(_DOWNLOAD_HEADERS)
+        if ranged:
+            headers['Range'] = f"bytes={offset}-{'' if end is None else end}"
+        response = self.transport.get(url, headers=headers, stream=True, timeout=self.timeout)
+        try:
+            if ranged and response.status_code != 206:
+                raise requests.exceptions.HTTPError(f"分段请求失败 (状态码: {response.status_code})", response=response)
+            if not ranged and response.status_code != 200:
+                raise requests.exceptions.HTTPError(f"状态码 {response.status_code}", response=response)
+
+            # 每个线程使用自己的文件句柄，seek后写入（Windows没有os.pwrite）
+            with open(part_path, 'r+b') as f:
+                f.seek(offset)
+                remaining = None if end is None else end - offset + 1
+                buffer = bytearray()
+                last_save = time.monotonic()
+
+                def flush():
+                    nonlocal last_save
+                    f.write(buffer)
+                    f.flush()
+                    with self._lock:
+                        segment['done'] += len(buffer)
+                        state['downloaded'] += len(buffer)
+                        if time.monotonic() - last_save >= STATE_SAVE_INTERVAL:
+                            self._save_state(filename, state)
+                            last_save = time.monotonic()
+                    buffer.clear()
+
+                try:
+                    # 小块读取网络数据，攒满缓冲区再写盘；连接中断时已收到的数据仍会写入
+                    for chunk in response.iter_content(chunk_size=READ_CHUNK_SIZE):
+                        if self._stop.is_set():
+                            raise DownloadInterrupted("下载已中止")
+                        if remaining is not None:
+                            chunk = chunk[:remaining]
+                            remaining -= len(chunk)
+                        buffer += chunk
+                        if len(buffer) >= self.buffer_size:
+                            flush()
+                        if remaining == 0:
+                            break
+                finally:
+                    if buffer:
+                        flush()
+        finally:
+            response.close()
+
+        if end is not None and segment['start'] + segment['done'] <= end:
+            raise requests.exceptions.ChunkedEncodingError(
+                f"连接提前结束: {segment['start'] + segment['done']}/{end + 1} 字节")
+
+    def download(self, url: str, filename: str = None, resume: bool = True) -> Dict[str, Any]:
+        """
+        下载文件
+
+        Args:
+            url: 文件URL
+            filename: 保存的文件名，如果为None则从URL自动生成
+            resume: 是否从上次中断的位置继续
+
+        Returns:
+            {'filename', 'size', 'downloaded': 本次下载字节数, 'elapsed', 'throughput': 字节/秒,
+             'segments': 分段数, 'resumed': 是否续传}
+
+        Raises:
+            requests.exceptions.RequestException: 请求失败（进度已保存，可以续传）
+        """
+        filename = filename or filename_from_url(url)
+        part_path = self._part_path(filename)
+        start_time = time.perf_counter()
+        self._stop.clear()
+
+        info = self.probe(url)
+        state = self._load_state(filename, url, info) if resume else None
+        resumed = state is not None
+        if state is None:
+            state = {
+                'url': url,
+                'size': info['size'],
+                'etag': info['etag'],
+                'last_modified': info['last_modified'],
+                'segments': self.plan_segments(info['size'], info['accept_ranges']),
+            }
+            with open(part_path, 'wb') as f:
+                if info['size'] and len(state['segments']) > 1:
+                    # 预先分配，各段可以直接写到自己的位置
+                    f.truncate(info['size'])
+        already_done = sum(seg['done'] for seg in state['segments'])
+        state['downloaded'] = already_done
+        ranged = info['accept_ranges']
+        segments = state['segments']
+
+        try:
+            if len(segments) == 1:
+                self._fetch_segment(info['url'], part_path, segments[0], ranged and resumed, filename, state)
+            else:
+                with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+                    futures = [
+                        executor.submit(self._fetch_segment, info['url'], part_path, seg, True, filename, state)
+                        for seg in segments
+                    ]
+                    errors = []
+                    try:
+                        for future in futures:
+                            try:
+                                future.result()
+                            except Exception as e:
+                                # 一段失败时其他段继续下载，续传时少下一些
+                                errors.append(e)
+                    except BaseException:
+                        # Ctrl+C 中断时通知各段尽快停止
+                        self._stop.set()
+                        raise
+                    if errors:
+                        raise errors[0]
+        except BaseException:
+            with self._lock:
+                self._save_state(filename, state)
+            raise
+
+        os.replace(part_path, filename)
+        state_path = self._state_path(filename)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+
+        elapsed = time.perf_counter() - start_time
+        downloaded = state['downloaded'] - already_done
+        return {
+            'filename': filename,
+            'size': os.path.getsize(filename),
+            'downloaded': downloaded,
+            'elapsed': elapsed,
+            'throughput': downloaded / elapsed if elapsed else 0.0,
+            'segments': len(segments),
+            'resumed': resumed,
+        }
@@ -28,6 +28,13 @@ except ImportError as e:
     print("请运行: pip install selenium webdriver-manager beautifulsoup4 requests")
     exit(1)
 
+from cookie_vault import CookieVault
+from rate_limiter import get_default_limiter
+from start_browser import detect_browser_paths, launch_debug_browser, wait_for_devtools
+from browser_pool_daemon import BrowserPoolClient, PoolError, is_daemon_running
+from browser_watchdog import BrowserWatchdog, driver_process_pid
+from quickshare_store import QuickShareStore
+
 
 class XiumiQuickShareFetcher:
     """秀米编辑器另存码获取器"""
@@ -39,73 +46,76 @@ class XiumiQuickShareFetcher:
         self.login_url = f"{self.xiumi_base_url}/#/login"
         self.editor_url = f"{self.xiumi_base_url}/#/editor"
         self.browser_type = "chrome"  # 默认浏览器类型
+        self.cookie_vault = CookieVault()  # 登录Cookie保管库
+        self.rate_limiter = get_default_limiter()  # 与其他工具共用的按主机限速
+        self.debug_port = 9222  # 连接已运行浏览器时使用的调试端口
+        self.user_data_dir = "temp_profile"  # 调试模式浏览器的用户数据目录
+        self.output_dir: Optional[str] = None  # 另存码文件的保存目录，None为当前目录
+        self.debugger_ws_url: Optional[str] = None
+        self.pool_client: Optional[BrowserPoolClient] = None  # 从浏览器池租用时的连接
+        self.pool_lease: Optional[Dict] = None
+        self.debug_process = None  # start_browser_with_debug 启动的浏览器进程
+        self.browser_pid_file: Optional[str] = None  # 启动浏览器后把PID写入这个文件（多账号时父进程据此结束浏览器）
+        self.watchdog = BrowserWatchdog()  # 内存超限或文章数过多时回收浏览器
+        self._driver_options: Dict = {}
+        self._debug_launch: Optional[tuple] = None
+        self.store_path: Optional[str] = None  # 另存码数据库，None为默认路径
+        self.account: Optional[str] = None  # 记录到数据库中的账号名称
+        self.records: List[Dict] = []  # 本次运行获取到的另存码（含文章ID和获取时间）
+        self.max_articles: Optional[int] = None  # 最多处理的文章数，None表示处理全部文章
     
     def detect_browser_paths(self) -> Dict[str, str]:
         """检测浏览器安装路径"""
-        browser_paths = {}
-        
-        # Edge浏览器常见路径
-        edge_paths = [
-            r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
-            r"C:\Program Files\Microsoft\Edge\Application\msedge.exe",
-            r"C:\Users\{}\AppData\Local\Microsoft\Edge\Application\msedge.exe".format(os.environ.get('USERNAME', '')),
-        ]
-        
-        for path in edge_paths:
-            if os.path.exists(path):
-                browser_paths['edge'] = path
-                break
-        
-        # Chrome浏览器常见路径
-        chrome_paths = [
-            r"C:\Program Files\Google\Chrome\Application\chrome.exe",
-            r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
-            r"C:\Users\{}\AppData\Local\Google\Chrome\Application\chrome.exe".format(os.environ.get('USERNAME', '')),
-        ]
-        
-        for path in chrome_paths:
-            if os.path.exists(path):
-                browser_paths['chrome'] = path
-                break
-        
-        return browser_paths
+        return detect_browser_paths()
     
-    def start_browser_with_debug(self, browser: str = "edge", browser_path: str = None) -> bool:
-        """启动带有调试端口的浏览器"""
+    def start_browser_with_debug(self, browser: str = "edge", browser_path: str = None,
+                                 headless: bool = False, port: int = None) -> bool:
+        """启动带有调试端口的浏览器，确认调试端口可用后才返回"""
         try:
-            import subprocess
-            
-            if not browser_path:
-                detected_paths = self.detect_browser_paths()
-                browser_path = detected_paths.get(browser.lower())
-                
-                if not browser_path:
-                    print(f"未找到{browser}浏览器路径")
-                    return False
-            
-            # 启动命令
-            cmd = [
-                browser_path,
-                "--remote-debugging-port=9222",
-                "--user-data-dir=temp_profile",
-                "--no-first-run",
-                "--no-default-browser-check"
-            ]
-            
+            port = port or self.debug_port
             print(f"正在启动{browser}浏览器(调试模式)...")
-            print(f"命令: {' '.join(cmd)}")
             
-            subprocess.Popen(cmd, creationflags=subprocess.CREATE_NEW_CONSOLE)
+            result = launch_debug_browser(browser, browser_path, port,
+                                          user_data_dir=self.user_data_dir, headless=headless)
             
-            # 等待浏览器启动
-            time.sleep(3)
-            print("浏览器已启动，可以进行手动操作")
+            self.debug_port = port
+            self.debugger_ws_url = result['ws_url']
+            self.debug_process = result['process']
+            self._debug_launch = (browser, browser_path, headless)
+            if result['process'] is None:
+                print(f"端口 {port} 上已有调试模式浏览器在运行，直接使用")
+            else:
+                if self.browser_pid_file:
+                    with open(self.browser_pid_file, 'w') as f:
+                        f.write(str(result['process'].pid))
+                print(f"浏览器已就绪 (用时 {result['startup_time']:.1f} 秒)，可以进行手动操作")
+            print(f"WebSocket地址: {result['ws_url']}")
             return True
             
         except Exception as e:
             print(f"启动浏览器失败: {e}")
             return False
         
+    def lease_from_pool(self, socket_path: str = None, timeout: float = 60) -> bool:
+        """
+        从浏览器池守护进程租用一个已登录的浏览器，之后以连接已运行实例的方式使用
+        
+        Returns:
+            bool: 是否租用成功
+        """
+        try:
+            client = BrowserPoolClient(socket_path) if socket_path else BrowserPoolClient()
+            lease = client.lease(timeout=timeout)
+        except PoolError as e:
+            print(f"从浏览器池租用失败: {e}")
+            return False
+        self.pool_client = client
+        self.pool_lease = lease
+        self.debug_port = lease['port']
+        self.debugger_ws_url = lease['ws_url']
+        print(f"✓ 已从浏览器池租用浏览器 #{lease['index']} (端口 {lease['port']})")
+        return True
+    
     def setup_driver(self, headless: bool = False, browser: str = "chrome", use_existing: bool = False, browser_path: str = None) -> None:
         """
         设置浏览器驱动
@@ -119,7 +129,17 @@ class XiumiQuickShareFetcher:
         try:
             print(f"正在初始化{browser.upper()}浏览器驱动...")
             
+            self._driver_options = {'headless': headless, 'browser': browser,
+                                    'use_existing': use_existing, 'browser_path': browser_path}
             self.browser_type = browser.lower()
+            debugger_address = f"127.0.0.1:{self.debug_port}"
+            
+            if use_existing:
+                # 确认调试端口已经可用再连接，不和正在启动的浏览器抢跑
+                info = wait_for_devtools(self.debug_port, timeout=10)
+                if info is None:
+                    raise RuntimeError(f"调试端口 {self.debug_port} 没有响应")
+                self.debugger_ws_url = info['webSocketDebuggerUrl']
             
             if self.browser_type == "edge":
                 # Edge选项配置
@@ -142,7 +162,7 @@ class XiumiQuickShareFetcher:
                 
                 if use_existing:
                     # 连接到已运行的Edge实例
-                    edge_options.add_experimental_option("debuggerAddress", "127.0.0.1:9222")
+                    edge_options.add_experimental_option("debuggerAddress", debugger_address)
                     print("尝试连接到已运行的Edge浏览器实例...")
                     
                 if headless:
@@ -180,7 +200,7 @@ class XiumiQuickShareFetcher:
                 
                 if use_existing:
                     # 连接到已运行的Chrome实例
-                    chrome_options.add_experimental_option("debuggerAddress", "127.0.0.1:9222")
+                    chrome_options.add_experimental_option("debuggerAddress", debugger_address)
                     print("尝试连接到已运行的Chrome浏览器实例...")
                 
                 if headless:
@@ -213,13 +233,69 @@ class XiumiQuickShareFetcher:
             if use_existing:
                 print("连接已运行实例失败，请确保:")
                 print("1. 浏览器已启动并开启了远程调试端口")
-                print("2. 启动命令包含: --remote-debugging-port=9222")
+                print(f"2. 启动命令包含: --remote-debugging-port={self.debug_port}")
             raise
     
+    def _browser_pid(self) -> Optional[int]:
+        """用于统计内存的浏览器进程PID，连接用户自己的浏览器时为None"""
+        if self.pool_lease:
+            return self.pool_lease.get('pid')
+        if self.debug_process is not None:
+            return self.debug_process.pid
+        if not self._driver_options.get('use_existing'):
+            return driver_process_pid(self.driver)
+        return None
+    
+    def can_recycle(self) -> bool:
+        """浏览器是否由本工具启动（或从浏览器池租用），可以关闭后重新启动"""
+        return bool(self.pool_lease) or self.debug_process is not None or not self._driver_options.get('use_existing')
+    
+    def recycle_browser(self, reason: str) -> List[Dict]:
+        """
+        回收浏览器：保存Cookie，关闭并重新启动浏览器，恢复登录状态后重新打开文章列表
+        
+        Args:
+            reason: 回收原因（用于显示）
+            
+        Returns:
+            List[Dict]: 新浏览器中的文章列表（顺序与之前相同，可以从当前位置继续）
+        """
+        print(f"\n⚠️  {reason}，正在回收浏览器...")
+        started = time.perf_counter()
+        self.export_cookies()
+        
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        self.driver = None
+        
+        options = dict(self._driver_options)
+        if self.pool_lease:
+            # 归还时报告异常，守护进程会重启这个浏览器；再租一个
+            self.pool_client.release(self.pool_lease, healthy=False)
+            self.pool_lease = self.pool_client.lease()
+            self.debug_port = self.pool_lease['port']
+        elif self.debug_process is not None:
+            self.debug_process.kill()
+            self.debug_process.wait()
+            self.debug_process = None
+            browser, browser_path, headless = self._debug_launch
+            if not self.start_browser_with_debug(browser, browser_path, headless=headless):
+                raise RuntimeError("重新启动调试模式浏览器失败")
+        self.setup_driver(**options)
+        
+        self.restore_cookies()
+        self.navigate_to_editor()
+        self.watchdog.attach(self.driver, self._browser_pid())
+        print(f"✓ 浏览器已回收 (用时 {time.perf_counter() - started:.1f} 秒)")
+        return self.get_articles_list()
+    
     def open_xiumi_login(self) -> None:
         """打开秀米登录页面"""
         try:
             print("正在打开秀米登录页面...")
+            self.rate_limiter.acquire(self.login_url)
             self.driver.get(self.login_url)
             
             # 等待页面加载
@@ -285,10 +361,36 @@ class XiumiQuickShareFetcher:
             print(f"等待登录过程中发生错误: {e}")
             return False
     
+    def restore_cookies(self) -> bool:
+        """
+        把保管库中的登录Cookie写入浏览器，避免重复登录
+        
+        Returns:
+            bool: 是否写入了登录Cookie
+        """
+        try:
+            if not self.cookie_vault.has_login():
+                return False
+            count = self.cookie_vault.load_into_driver(self.driver)
+            print(f"✓ 已从Cookie保管库恢复 {count} 个Cookie")
+            return True
+        except Exception as e:
+            print(f"恢复Cookie失败: {e}")
+            return False
+    
+    def export_cookies(self) -> None:
+        """登录成功后把浏览器Cookie保存到保管库，供其他工具复用"""
+        try:
+            count = self.cookie_vault.store_driver_cookies(self.driver)
+            print(f"✓ 已保存 {count} 个Cookie到保管库: {self.cookie_vault.path}")
+        except Exception as e:
+            print(f"保存Cookie失败: {e}")
+    
     def navigate_to_editor(self) -> None:
         """导航到编辑器页面"""
         try:
             print("正在导航到编辑器页面...")
+            self.rate_limiter.acquire(self.editor_url)
             self.driver.get(self.editor_url)
             time.sleep(3)
             print("已进入编辑器页面")
@@ -324,11 +426,14 @@ class XiumiQuickShareFetcher:
                     if article_elements:
                         print(f"找到 {len(article_elements)} 篇文章")
                         
-                        for i, element in enumerate(article_elements[:10]):  # 限制前10篇
+                        for i, element in enumerate(article_elements[:self.max_articles]):
                             try:
                                 # 提取文章信息
                                 title = "未知标题"
-                                article_id = f"article_{i}"
+                                # 页面上没有文章ID时为None（数据库中按标题和账号查询这些记录）
+                                article_id = (element.get_attribute('data-id')
+                                              or element.get_attribute('data-article-id')
+                                              or None)
                                 
                                 # 尝试获取标题
                                 title_selectors = [
@@ -383,7 +488,8 @@ class XiumiQuickShareFetcher:
         try:
             print("正在获取另存码...")
             
-            # 点击文章打开编辑页面
+            # 点击文章打开编辑页面（会请求秀米服务器，按限速取令牌）
+            self.rate_limiter.acquire(self.editor_url)
             self.driver.execute_script("arguments[0].click();", article_element)
             time.sleep(3)
             
@@ -454,7 +560,7 @@ class XiumiQuickShareFetcher:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"xiumi_quickshare_codes_{timestamp}.json"
         
-        filepath = os.path.join(os.getcwd(), filename)
+        filepath = os.path.join(self.output_dir or os.getcwd(), filename)
         
         try:
             data = {
@@ -473,6 +579,26 @@ class XiumiQuickShareFetcher:
             print(f"保存文件失败: {e}")
             return None
     
+    def save_codes_to_store(self, records: List[Dict], started_at: datetime = None) -> Optional[str]:
+        """
+        把本次运行的另存码记录到数据库（同名文章不会互相覆盖）
+        
+        Args:
+            records: [{'article_id', 'title', 'code', 'fetched_at'}]
+            started_at: 运行开始时间
+            
+        Returns:
+            str: 运行批次ID，失败时返回None
+        """
+        try:
+            with QuickShareStore(self.store_path) as store:
+                run_id = store.add_run(records, account=self.account, started_at=started_at)
+            print(f"另存码已记录到数据库: {store.path} (运行批次 {run_id})")
+            return run_id
+        except Exception as e:
+            print(f"记录到数据库失败: {e}")
+            return None
+    
     def run(self, headless: bool = False, browser: str = "chrome", use_existing: bool = False, browser_path: str = None) -> Dict[str, str]:
         """
         主运行函数
@@ -487,21 +613,33 @@ class XiumiQuickShareFetcher:
             Dict[str, str]: 获取到的另存码字典
         """
         codes = {}
+        self.records = []
+        started_at = datetime.now()
         
         try:
             # 1. 初始化浏览器
             self.setup_driver(headless=headless, browser=browser, use_existing=use_existing, browser_path=browser_path)
-            
-            # 2. 打开登录页面
-            self.open_xiumi_login()
-            
-            # 3. 等待用户登录
-            if not self.wait_for_login():
-                print("登录超时或失败")
-                return codes
-            
-            # 4. 导航到编辑器
-            self.navigate_to_editor()
+            self.watchdog.attach(self.driver, self._browser_pid())
+            
+            if self.pool_lease:
+                # 池中的浏览器已经登录，直接进入编辑器
+                self.navigate_to_editor()
+                if not self.wait_for_login(timeout=30):
+                    print("池中的浏览器未登录，请先不使用浏览器池运行一次完成登录")
+                    return codes
+            else:
+                # 2. 恢复已保存的登录Cookie，然后打开登录页面
+                self.restore_cookies()
+                self.open_xiumi_login()
+                
+                # 3. 等待用户登录
+                if not self.wait_for_login():
+                    print("登录超时或失败")
+                    return codes
+                self.export_cookies()
+                
+                # 4. 导航到编辑器
+                self.navigate_to_editor()
             
             # 5. 获取文章列表
             articles = self.get_articles_list()
@@ -511,15 +649,29 @@ class XiumiQuickShareFetcher:
                 return codes
             
             # 6. 逐个获取另存码
-            print(f"开始获取 {len(articles)} 篇文章的另存码...")
-            
-            for i, article in enumerate(articles, 1):
-                print(f"\n[{i}/{len(articles)}] 处理文章: {article['title']}")
+            total = len(articles)
+            print(f"开始获取 {total} 篇文章的另存码...")
+            if not self.can_recycle():
+                print("⚠️  连接的是手动启动的浏览器，内存过高时不会自动回收")
+            
+            for i in range(1, total + 1):
+                if i > len(articles):
+                    print(f"回收浏览器后只找到 {len(articles)} 篇文章，停止处理")
+                    break
+                article = articles[i - 1]
+                print(f"\n[{i}/{total}] 处理文章: {article['title']}")
+                article_started = time.perf_counter()
                 
                 try:
                     code = self.get_quickshare_code(article['element'])
                     if code:
                         codes[article['title']] = code
+                        self.records.append({
+                            'article_id': article['id'],
+                            'title': article['title'],
+                            'code': code,
+                            'fetched_at': datetime.now().isoformat(timespec='seconds'),
+                        })
                         print(f"✓ 成功获取另存码")
                     else:
                         print(f"✗ 未能获取另存码")
@@ -530,11 +682,18 @@ class XiumiQuickShareFetcher:
                     
                 except Exception as e:
                     print(f"✗ 处理文章失败: {e}")
-                    continue
+                
+                # 内存超限或处理的文章过多时换一个新浏览器，从下一篇继续
+                reason = self.watchdog.record_article(time.perf_counter() - article_started)
+                if reason and i < total and self.can_recycle():
+                    articles = self.recycle_browser(reason)
+            
+            self.watchdog.print_summary()
             
             # 7. 保存结果
             if codes:
                 self.save_codes_to_file(codes)
+                self.save_codes_to_store(self.records, started_at)
                 print(f"\n成功获取 {len(codes)} 个另存码")
             else:
                 print("\n未获取到任何另存码")
@@ -550,13 +709,27 @@ class XiumiQuickShareFetcher:
     
     def cleanup(self) -> None:
         """清理资源"""
+        healthy = True
         try:
             if self.driver:
                 print("正在关闭浏览器...")
+                # 连接已运行实例时只结束驱动会话，浏览器本身保持运行
                 self.driver.quit()
                 print("浏览器已关闭")
         except Exception as e:
+            healthy = False
             print(f"清理资源时发生错误: {e}")
+        finally:
+            self.driver = None
+            if self.pool_client:
+                # 归还租用的浏览器，出错时守护进程会重启它
+                try:
+                    self.pool_client.release(self.pool_lease, healthy=healthy)
+                    print("✓ 已归还浏览器池中的浏览器")
+                except PoolError as e:
+                    print(f"归还浏览器失败: {e}")
+                self.pool_client.close()
+                self.pool_client = self.pool_lease = None
 
 
 def main():
@@ -604,8 +777,11 @@ def main():
             print("2. 连接到已运行的浏览器")
             print("3. 自动启动调试模式浏览器")
             print("4. 指定浏览器路径")
+            pool_running = is_daemon_running()
+            if pool_running:
+                print("5. 从浏览器池租用已登录的浏览器 (守护进程运行中)")
             
-            connect_choice = input("请输入选择 (1/2/3/4，默认1): ").strip()
+            connect_choice = input(f"请输入选择 (1/2/3/4{'/5' if pool_running else ''}，默认1): ").strip()
             
             if connect_choice in ['', '1']:
                 # 使用新实例
@@ -637,8 +813,15 @@ def main():
                     break
                 else:
                     print("❌ 指定的路径不存在，请重新选择")
+            elif connect_choice == '5' and pool_running:
+                # 租用浏览器池中已登录的浏览器，跳过启动和登录
+                if fetcher.lease_from_pool():
+                    use_existing = True
+                    browser = fetcher.pool_lease['browser']
+                    break
+                print("❌ 租用失败，请重新选择")
             else:
-                print("请输入 1、2、3 或 4")
+                print("请输入 1、2、3 或 4" + (" 或 5" if pool_running else ""))
         
         # 询问是否使用无头模式
         headless = False
@@ -654,12 +837,23 @@ def main():
                 else:
                     print("请输入 y 或 n")
         
+        # 询问处理的文章数量
+        while True:
+            limit = input("最多处理多少篇文章？(直接回车处理全部): ").strip()
+            if not limit:
+                break
+            if limit.isdigit() and int(limit) > 0:
+                fetcher.max_articles = int(limit)
+                break
+            print("请输入正整数")
+        
         # 显示配置信息
         print(f"\n" + "=" * 40)
         print("配置信息:")
         print(f"浏览器: {browser.upper()}")
         print(f"连接方式: {'连接已运行实例' if use_existing else '启动新实例'}")
         print(f"运行模式: {'无头模式' if headless else '有界面模式'}")
+        print(f"文章数量: {fetcher.max_articles or '全部'}")
         if browser_path:
             print(f"浏览器路径: {browser_path}")
         print("=" * 40)
@@ -696,4 +890,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    from profiling import run_with_profiling
+    run_with_profiling(main, "fetch_quickshare")
@@ -0,0 +1,413 @@
+"""
+HTTP响应缓存
+按 Cache-Control、Expires、ETag、Last-Modified 规则缓存GET响应：响应体存在磁盘上，索引放在内存中，
+超过容量上限时按最近最少使用（LRU）淘汰。作为requests的传输适配器挂载到 HttpTransport 上
+"""
+
+import atexit
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from rate_limiter import RateLimiter, RateLimitedAdapter
+
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'XIUMI_HTTP_CACHE',
+    os.path.join(os.path.expanduser('~'), '.xiumi_toolbox', 'http_cache')
+)
+DEFAULT_MAX_SIZE = 200 * 1024 * 1024
+
+# 单个响应超过此大小不缓存
+DEFAULT_MAX_ENTRY_SIZE = 20 * 1024 * 1024
+
+# 可以缓存的状态码
+CACHEABLE_STATUSES = (200, 203, 301)
+
+# 只有Last-Modified时的启发式新鲜期：距上次修改时间的10%，最多一天
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX_AGE = 24 * 3600
+
+# 索引的最短写盘间隔（秒）
+INDEX_SAVE_INTERVAL = 2.0
+
+# 重新验证时不覆盖缓存的这些头
+_BODY_HEADERS = ('content-length', 'content-encoding', 'transfer-encoding')
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """解析 Cache-Control 头，如 'max-age=60, no-cache' -> {'max-age': '60', 'no-cache': None}"""
+    directives = {}
+    for part in (value or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, arg = part.partition('=')
+        directives[name.strip().lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+def _int_directive(directives: Dict[str, Optional[str]], name: str) -> Optional[int]:
+    value = directives.get(name)
+    if value is None:
+        return None
+    try:
+        return max(0, int(value))
+    except ValueError:
+        return 0
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness_lifetime(headers: Dict[str, str]) -> float:
+    """根据响应头计算新鲜期（秒），RFC 9111 第4.2.1节；作为私有缓存忽略 s-maxage"""
+    directives = parse_cache_control(headers.get('Cache-Control'))
+    if 'no-cache' in directives:
+        return 0
+    max_age = _int_directive(directives, 'max-age')
+    if max_age is not None:
+        return max_age
+    date = _http_date(headers.get('Date'))
+    expires = headers.get('Expires')
+    if expires is not None:
+        expires_at = _http_date(expires)
+        if expires_at is None or date is None:
+            return 0
+        return max(0.0, expires_at - date)
+    last_modified = _http_date(headers.get('Last-Modified'))
+    if last_modified is not None and date is not None:
+        return min(HEURISTIC_MAX_AGE, max(0.0, (date - last_modified) * HEURISTIC_FRACTION))
+    return 0
+
+
+class HttpCache:
+    """磁盘HTTP缓存（线程安全）"""
+
+    def __init__(self, directory: str = None, max_size: int = DEFAULT_MAX_SIZE,
+                 max_entry_size: int = DEFAULT_MAX_ENTRY_SIZE):
+        """
+        Args:
+            directory: 缓存目录，默认为 ~/.xiumi_toolbox/http_cache（可用环境变量 XIUMI_HTTP_CACHE 修改）
+            max_size: 所有响应体的总大小上限（字节）
+            max_entry_size: 单个响应体的大小上限（字节）
+        """
+        self.directory = directory or DEFAULT_CACHE_DIR
+        self.max_size = max_size
+        self.max_entry_size = max_entry_size
+        self.index_path = os.path.join(self.directory, 'index.json')
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stores = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._total_size = 0
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._last_save = 0.0
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+        atexit.register(self.flush)
+
+    def _load_index(self) -> None:
+        """读取索引（按最近使用顺序保存），丢弃响应体文件已经不存在的条目"""
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        for entry in entries:
+            if os.path.exists(self._body_path(entry['key'])):
+                self._entries[entry['key']] = entry
+                self._total_size += entry['size']
+
+    def _body_path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + '.body')
+
+    def _save_index(self, force: bool = False) -> None:
+        if not self._dirty or (not force and time.monotonic() - self._last_save < INDEX_SAVE_INTERVAL):
+            return
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(list(self._entries.values()), f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def flush(self) -> None:
+        """把索引写入磁盘"""
+        with self._lock:
+            self._save_index(force=True)
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """查找条目（不判断是否新鲜），找到时标记为最近使用"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def read_body(self, entry: Dict[str, Any]) -> Optional[bytes]:
+        """读取条目的响应体，文件丢失时删除条目并返回None"""
+        try:
+            with open(self._body_path(entry['key']), 'rb') as f:
+                return f.read()
+        except OSError:
+            self.delete(entry['key'])
+            return None
+
+    def store(self, key: str, entry: Dict[str, Any], body: bytes) -> bool:
+        """保存响应，必要时淘汰最久未使用的条目"""
+        if len(body) > self.max_entry_size or len(body) > self.max_size:
+            return False
+        path = self._body_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+        entry = dict(entry, key=key, size=len(body))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_size -= old['size']
+            self._entries[key] = entry
+            self._total_size += entry['size']
+            self.stores += 1
+            while self._total_size > self.max_size:
+                old_key, old = self._entries.popitem(last=False)
+                self._total_size -= old['size']
+                self.evictions += 1
+                self._remove_body(old_key)
+            self._dirty = True
+            self._save_index()
+        return True
+
+    def update(self, key: str, **fields) -> None:
+        """更新条目的元数据（重新验证后刷新响应头和时间）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.update(fields)
+                self._dirty = True
+                self._save_index()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return
+            self._total_size -= entry['size']
+            self._dirty = True
+            self._remove_body(key)
+            self._save_index()
+
+    def _remove_body(self, key: str) -> None:
+        try:
+            os.remove(self._body_path(key))
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove_body(key)
+            self._entries.clear()
+            self._total_size = 0
+            self._dirty = True
+            self._save_index(force=True)
+
+    def record(self, hit: bool, revalidated: bool = False) -> None:
+        """记录一次查找结果"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.revalidated += revalidated
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率等统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size': self._total_size,
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidated': self.revalidated,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+            }
+
+    def print_stats(self) -> None:
+        stats = self.stats()
+        print(f"缓存: {stats['entries']} 条，{stats['size'] / 1024 / 1024:.1f}/{stats['max_size'] / 1024 / 1024:.0f} MB，"
+              f"命中 {stats['hits']} 次（其中重新验证 {stats['revalidated']} 次），未命中 {stats['misses']} 次，"
+              f"命中率 {stats['hit_rate']:.0%}")
+
+
+class CachingAdapter(RateLimitedAdapter):
+    """带缓存的传输适配器，只缓存GET请求；命中缓存的请求不占用限速令牌"""
+
+    def __init__(self, cache: HttpCache, rate_limiter: RateLimiter = None, **kwargs):
+        self.cache = cache
+        super().__init__(rate_limiter=rate_limiter, **kwargs)
+
+    @staticmethod
+    def _vary_values(vary: Optional[str], request_headers) -> Optional[Dict[str, Optional[str]]]:
+        """记录 Vary 中列出的请求头的值，Vary: * 返回None（不可缓存）"""
+        values = {}
+        for name in (vary or '').split(','):
+            name = name.strip().lower()
+            if not name:
+                continue
+            if name == '*':
+                return None
+            values[name] = request_headers.get(name)
+        return values
+
+    @staticmethod
+    def _is_fresh(entry: Dict[str, Any]) -> bool:
+        age = max(0.0, time.time() - entry['response_time']) + entry.get('initial_age', 0)
+        return age < entry['lifetime']
+
+    def _build_response(self, request, entry: Dict[str, Any], body: bytes) -> requests.Response:
+        """由缓存条目构造Response对象"""
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry.get('reason')
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.headers['Content-Length'] = str(len(body))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = entry['url']
+        response.request = request
+        response.raw = io.BytesIO(body)
+        response._content = body
+        response._content_consumed = True
+        response.elapsed = timedelta(0)
+        response.from_cache = True
+        return response
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        cache = self.cache
+        key = request.url
+        if request.method != 'GET':
+            if request.method not in ('HEAD', 'OPTIONS', 'TRACE'):
+                # 修改资源的请求会使缓存失效
+                cache.delete(key)
+            return super().send(request, stream, timeout, verify, cert, proxies)
+
+        request_directives = parse_cache_control(request.headers.get('Cache-Control'))
+        caller_conditional = any(h in request.headers for h in ('If-None-Match', 'If-Modified-Since', 'Range'))
+        if 'no-store' in request_directives or caller_conditional:
+            # 调用方自己处理条件请求、分段请求时不经过缓存
+            return super().send(request, stream, timeout, verify, cert, proxies)
+
+        entry = cache.lookup(key)
+        if entry is not None and entry['vary'] != self._vary_values(','.join(entry['vary']), request.headers):
+            entry = None
+        force_revalidate = 'no-cache' in request_directives or request_directives.get('max-age') == '0'
+
+        if entry is not None and not force_revalidate and self._is_fresh(entry):
+            body = cache.read_body(entry)
+            if body is not None:
+                cache.record(hit=True)
+                return self._build_response(request, entry, body)
+
+        if entry is not None:
+            # 过期的条目：带上验证器发条件请求，304时复用缓存的响应体
+            if entry['headers'].get('ETag'):
+                request.headers['If-None-Match'] = entry['headers']['ETag']
+            if entry['headers'].get('Last-Modified'):
+                request.headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+
+        request_time = time.time()
+        response = super().send(request, stream, timeout, verify, cert, proxies)
+        response.from_cache = False
+
+        if entry is not None and response.status_code == 304:
+            body = cache.read_body(entry)
+            response.close()
+            if body is None:
+                # 响应体文件丢失，去掉验证器重新请求
+                request.headers.pop('If-None-Match', None)
+                request.headers.pop('If-Modified-Since', None)
+                response = super().send(request, stream, timeout, verify, cert, proxies)
+                response.from_cache = False
+            else:
+                headers = dict(entry['headers'])
+                headers.update((k, v) for k, v in response.headers.items() if k.lower() not in _BODY_HEADERS)
+                cache.update(key, headers=headers, response_time=request_time,
+                             lifetime=freshness_lifetime(headers), initial_age=self._age_header(response))
+                cache.record(hit=True, revalidated=True)
+                return self._build_response(request, cache.lookup(key) or entry, body)
+
+        cache.record(hit=False)
+        self._maybe_store(request, response, stream, request_time)
+        return response
+
+    @staticmethod
+    def _age_header(response) -> int:
+        try:
+            return max(0, int(response.headers.get('Age', 0)))
+        except ValueError:
+            return 0
+
+    def _maybe_store(self, request, response, stream: bool, request_time: float) -> None:
+        """响应可缓存时读取响应体并保存"""
+        if response.status_code not in CACHEABLE_STATUSES:
+            return
+        directives = parse_cache_control(response.headers.get('Cache-Control'))
+        if 'no-store' in directives:
+            return
+        vary = self._vary_values(response.headers.get('Vary'), request.headers)
+        if vary is None:
+            return
+        lifetime = freshness_lifetime(response.headers)
+        has_validator = 'ETag' in response.headers or 'Last-Modified' in response.headers
+        if lifetime <= 0 and not has_validator:
+            return
+        length = response.headers.get('Content-Length')
+        if stream and (not length or not length.isdigit() or int(length) > self.cache.max_entry_size):
+            # 流式读取的大文件或未知长度的响应不缓存，保持边下载边处理
+            return
+
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _BODY_HEADERS}
+        entry = {
+            'url': response.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': headers,
+            'response_time': request_time,
+            'initial_age': self._age_header(response),
+            'lifetime': lifetime,
+            'vary': vary,
+        }
+        # 读取后响应体保存在 response._content 中，调用方仍可正常读取
+        self.cache.store(request.url, entry, response.content)
@@ -0,0 +1,298 @@
+"""
+HTTP传输层
+simple_html、SimpleWebAccess、WebAccess 共用的HTTP核心：可配置的连接池、请求头配置、带抖动的指数退避重试、
+按主机限速、可选的响应缓存和请求耗时统计
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Iterable
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import HttpCache, CachingAdapter
+from rate_limiter import RateLimiter, RateLimitedAdapter, RateLimitedRetry, get_default_limiter
+
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# 这些状态码视为临时故障，会自动重试
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# ensure_pool_size 自动挂载的按主机连接池最多保留的数量，超过时移除最久没有用到的
+MAX_AUTO_HOST_POOLS = 32
+
+try:
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    # 没有安装brotli时requests无法解码br压缩的响应
+    _ACCEPT_ENCODING = 'gzip, deflate'
+
+# 请求头配置：default 用于接口和普通页面，browser 模拟浏览器直接打开秀米页面
+HEADER_PROFILES = {
+    'default': {
+        'User-Agent': DEFAULT_USER_AGENT,
+    },
+    'browser': {
+        'User-Agent': DEFAULT_USER_AGENT + ' Edge/120.0.0.0',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+        'Accept-Encoding': _ACCEPT_ENCODING,
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Referer': 'https://xiumi.us/',
+    },
+}
+
+
+class TransportStats:
+    """按主机统计请求次数、重试次数和耗时（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+
+    def _host_entry(self, host: str) -> Dict[str, Any]:
+        entry = self._hosts.get(host)
+        if entry is None:
+            entry = {
+                'requests': 0,
+                'errors': 0,
+                'retries': 0,
+                'total_time': 0.0,
+                'min_time': None,
+                'max_time': 0.0,
+                'status': {},
+            }
+            self._hosts[host] = entry
+        return entry
+
+    def record(self, url: str, elapsed: float, status_code: int = None, retries: int = 0) -> None:
+        """记录一次请求（status_code为None表示请求异常）"""
+        host = urlparse(url).hostname or ''
+        with self._lock:
+            entry = self._host_entry(host)
+            entry['requests'] += 1
+            entry['retries'] += retries
+            entry['total_time'] += elapsed
+            entry['max_time'] = max(entry['max_time'], elapsed)
+            entry['min_time'] = elapsed if entry['min_time'] is None else min(entry['min_time'], elapsed)
+            if status_code is None:
+                entry['errors'] += 1
+            else:
+                entry['status'][status_code] = entry['status'].get(status_code, 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """各主机的统计快照（含平均耗时）"""
+        with self._lock:
+            result = {}
+            for host, entry in self._hosts.items():
+                item = dict(entry, status=dict(entry['status']))
+                item['avg_time'] = entry['total_time'] / entry['requests'] if entry['requests'] else 0.0
+                result[host] = item
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hosts.clear()
+
+    def print_summary(self) -> None:
+        """打印统计表"""
+        summary = self.summary()
+        if not summary:
+            print("暂无请求记录")
+            return
+        print(f"{'主机':<30} {'请求':>6} {'失败':>6} {'重试':>6} {'平均(ms)':>10} {'最大(ms)':>10}")
+        for host, item in sorted(summary.items()):
+            print(f"{host:<30} {item['requests']:>6} {item['errors']:>6} {item['retries']:>6} "
+                  f"{item['avg_time'] * 1000:>10.1f} {item['max_time'] * 1000:>10.1f}")
+
+
+class HttpTransport:
+    """带连接池和重试的HTTP传输层"""
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10,
+                 host_pool_sizes: Dict[str, int] = None, max_retries: int = 3,
+                 backoff_factor: float = 0.5, backoff_max: float = 30, backoff_jitter: float = 0.5,
+                 retry_statuses: Iterable[int] = RETRY_STATUS_CODES, respect_retry_after: bool = True,
+                 timeout: float = 30, session: requests.Session = None, cache: HttpCache = None,
+                 rate_limiter: RateLimiter = None, header_profile: str = 'default'):
+        """
+        Args:
+            pool_connections: 缓存连接池的主机数量
+            pool_maxsize: 每个主机连接池的最大连接数
+            host_pool_sizes: 为指定主机单独设置连接池大小，如 {'xiumi.us': 20}
+            max_retries: 最大重试次数（连接错误、读取错误和临时故障状态码）
+            backoff_factor: 指数退避的基数，第n次重试前等待 backoff_factor * 2^(n-1) 秒
+            backoff_max: 单次退避等待的上限（秒）
+            backoff_jitter: 在退避时间上额外增加的随机等待上限（秒），避免并发请求同时重试
+            retry_statuses: 需要重试的状态码
+            respect_retry_after: 是否遵守服务器返回的 Retry-After 头
+            timeout: 默认请求超时时间（秒）
+            session: 使用已有的会话，默认新建
+            cache: HTTP响应缓存，为None时不缓存
+            rate_limiter: 按主机限速的令牌桶，默认使用所有工具共用的限速器
+            header_profile: 会话默认使用的请求头配置（HEADER_PROFILES中的名称）
+        """
+        self.timeout = timeout
+        self.cache = cache
+        self.rate_limiter = rate_limiter or get_default_limiter()
+        self.stats = TransportStats()
+        # 每次重试都向限速器取令牌，重试不会绕过按主机的限速
+        self.retry = RateLimitedRetry(
+            rate_limiter=self.rate_limiter,
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            backoff_max=backoff_max,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=tuple(retry_statuses),
+            respect_retry_after_header=respect_retry_after,
+            # 重试用尽后返回最后一次的响应，由调用方按状态码处理
+            raise_on_status=False,
+        )
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.host_pool_sizes: Dict[str, int] = {}
+        # ensure_pool_size 自动挂载的主机，按最近使用排序
+        self._auto_pools: "OrderedDict[str, int]" = OrderedDict()
+        self._mount_lock = threading.RLock()
+        self.session = session or requests.Session()
+        self.session.headers.update(HEADER_PROFILES[header_profile])
+        self._mount_adapters()
+        for host, size in (host_pool_sizes or {}).items():
+            self.set_host_pool_size(host, size)
+
+    def _replace_adapters(self, mount: Dict[str, HTTPAdapter], unmount: Iterable[str] = ()) -> None:
+        """
+        挂载和移除适配器
+
+        其他线程的请求会遍历 session.adapters 查找适配器，Session.mount 原地修改这个有序字典，
+        并发时会报"mutated during iteration"。这里复制一份修改后整体替换，正在遍历的线程不受影响
+        """
+        with self._mount_lock:
+            adapters = OrderedDict(self.session.adapters)
+            for prefix in unmount:
+                adapters.pop(prefix, None)
+            adapters.update(mount)
+            # 与 Session.mount 相同：前缀越长越先匹配
+            self.session.adapters = OrderedDict(
+                sorted(adapters.items(), key=lambda item: len(item[0]), reverse=True))
+
+    def _mount_adapters(self) -> None:
+        adapter = self._make_adapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        self._replace_adapters({'http://': adapter, 'https://': adapter})
+
+    def _make_adapter(self, **kwargs) -> HTTPAdapter:
+        if self.cache is not None:
+            return CachingAdapter(self.cache, rate_limiter=self.rate_limiter, max_retries=self.retry, **kwargs)
+        return RateLimitedAdapter(rate_limiter=self.rate_limiter, max_retries=self.retry, **kwargs)
+
+    def _mount_host_pool(self, host: str, size: int) -> None:
+        adapter = self._make_adapter(pool_connections=1, pool_maxsize=size)
+        with self._mount_lock:
+            self._replace_adapters({f'http://{host}/': adapter, f'https://{host}/': adapter})
+            self.host_pool_sizes[host] = size
+
+    def set_host_pool_size(self, host: str, size: int) -> None:
+        """为指定主机挂载单独大小的连接池（非默认端口时写成 host:port）"""
+        with self._mount_lock:
+            self._mount_host_pool(host, size)
+            self._auto_pools.pop(host, None)
+
+    def enable_cache(self, cache: HttpCache) -> None:
+        """启用响应缓存（重新挂载所有适配器，之后经过此传输层的GET请求都会使用缓存）"""
+        self.cache = cache
+        with self._mount_lock:
+            self._mount_adapters()
+            for host, size in list(self.host_pool_sizes.items()):
+                self._mount_host_pool(host, size)
+
+    def ensure_pool_size(self, host: str, size: int) -> None:
+        """
+        保证指定主机的连接池至少能容纳size个连接（并发请求数超过连接池大小时，多出的连接用完即丢弃）
+
+        这样挂载的连接池最多保留 MAX_AUTO_HOST_POOLS 个，超过时移除最久没有用到的，
+        该主机之后使用默认连接池。用 set_host_pool_size 设置的主机不会被移除
+        """
+        with self._mount_lock:
+            if host in self._auto_pools:
+                self._auto_pools.move_to_end(host)
+            if max(self.pool_maxsize, self.host_pool_sizes.get(host, 0)) >= size:
+                return
+            if host in self._auto_pools or host not in self.host_pool_sizes:
+                self._auto_pools[host] = size
+            self._mount_host_pool(host, size)
+            while len(self._auto_pools) > MAX_AUTO_HOST_POOLS:
+                old_host, _ = self._auto_pools.popitem(last=False)
+                del self.host_pool_sizes[old_host]
+                # 不关闭旧的连接池：其他线程可能正在用它发请求，没有引用后连接随之关闭
+                self._replace_adapters({}, unmount=[f'http://{old_host}/', f'https://{old_host}/'])
+
+    def request(self, method: str, url: str, profile: str = None, **kwargs) -> requests.Response:
+        """
+        发送请求并记录耗时，异常会继续抛出
+
+        Args:
+            method: 请求方法
+            url: 请求URL
+            profile: 本次请求使用的请求头配置（HEADER_PROFILES中的名称），headers参数中的值优先
+            **kwargs: 传给 requests.Session.request 的参数，未指定timeout时使用默认值
+
+        Returns:
+            Response对象
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        if profile:
+            headers = dict(HEADER_PROFILES[profile])
+            headers.update(kwargs.get('headers') or {})
+            kwargs['headers'] = headers
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self.stats.record(url, time.perf_counter() - start)
+            raise
+        retries = getattr(response.raw, 'retries', None)
+        retry_count = len(retries.history) if retries is not None else 0
+        self.stats.record(url, time.perf_counter() - start, response.status_code, retry_count)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+        if self.cache is not None:
+            self.cache.flush()
+
+
+_shared_transport: Optional[HttpTransport] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_transport() -> HttpTransport:
+    """
+    获取所有工具共用的传输层
+
+    simple_html、SimpleWebAccess、WebAccess 默认都使用它：共用一个连接池、Cookie、请求头配置、
+    超时设置和请求统计
+    """
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = HttpTransport()
+        return _shared_transport
@@ -0,0 +1,256 @@
+"""
+流式JSON解析
+边读取边解析，逐个产出指定数组中的元素（如文章列表接口中的每篇文章），
+内存占用只和单个元素的大小有关，与整个响应的大小无关
+"""
+
+import codecs
+import json
+import re
+from typing import Any, Iterator, List, Union
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# 跳过不关心的值时只需要找到这些字符
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+# 字符串中需要关心的字符：结束引号和转义符
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR = re.compile(r'[^,\]}\s]+')
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*\Z')
+
+
+class JSONStreamError(ValueError):
+    """JSON格式错误或找不到指定的数组"""
+
+
+def _iter_text_chunks(source, chunk_size: int) -> Iterator[str]:
+    """把文本块、字节块或文件对象统一转换为文本块（字节按UTF-8增量解码）"""
+    if hasattr(source, 'read'):
+        stream = source
+        source = iter(lambda: stream.read(chunk_size), stream.read(0))
+    decoder = None
+    for chunk in source:
+        if isinstance(chunk, bytes):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='strict')
+            chunk = decoder.decode(chunk)
+        if chunk:
+            yield chunk
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+class _Reader:
+    """在分块到达的文本上按位置读取JSON，已经处理过的部分会被丢弃"""
+
+    def __init__(self, chunks: Iterator[str]):
+        self._chunks = chunks
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+
+    def fill(self, size: int = 1) -> bool:
+        """
+        继续读取，直到未处理的部分至少有size个字符或数据读完（多块只拼接一次），没有更多数据时返回False
+        """
+        if self.eof:
+            return False
+        parts = [self.buf[self.pos:]]
+        available = len(parts[0])
+        for chunk in self._chunks:
+            parts.append(chunk)
+            available += len(chunk)
+            if available >= size:
+                break
+        else:
+            self.eof = True
+        if len(parts) == 1:
+            return False
+        self.buf = ''.join(parts)
+        self.pos = 0
+        return True
+
+    def _error(self, message: str) -> JSONStreamError:
+        context = self.buf[self.pos:self.pos + 40]
+        return JSONStreamError(f"{message}，位置附近: {context!r}")
+
+    def peek(self) -> str:
+        """跳过空白，返回下一个字符（结束时返回空字符串）"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self._error(f"应为 {char!r}")
+        self.pos += 1
+
+    def _string_end(self, skip: bool = False) -> int:
+        """
+        找到当前字符串的结束位置（结束引号之后）
+
+        每次读入新的块后只扫描新的部分；skip为True时已经扫描过的部分直接丢弃，跳过很长的字符串也不占用内存
+        """
+        if self.peek() != '"':
+            raise self._error("应为字符串")
+        scan = self.pos + 1
+        while True:
+            match = _STRING_SPECIAL.search(self.buf, scan)
+            if match and match.group() == '"':
+                return match.end()
+            if match and match.end() < len(self.buf):
+                # 跳过被转义的字符（\uXXXX 的其余部分不会是引号或转义符）
+                scan = match.end() + 1
+                continue
+            # 没有找到结束引号，或转义符是块中最后一个字符：从这里继续扫描
+            resume = match.start() if match else len(self.buf)
+            if skip:
+                self.pos = resume
+            offset = resume - self.pos
+            # 保留字符串时每次至少读入一倍的数据，缓冲区的复制总量与字符串长度成正比
+            if not self.fill(1 if skip else 2 * (len(self.buf) - self.pos)):
+                raise self._error("字符串没有结束")
+            scan = self.pos + offset
+
+    def read_string(self) -> str:
+        end = self._string_end()
+        # 读入新块时缓冲区会整体前移，结束位置求出后再取开头
+        start = self.pos
+        try:
+            value = json.loads(self.buf[start:end])
+        except json.JSONDecodeError:
+            raise self._error("字符串格式错误") from None
+        self.pos = end
+        return value
+
+    def skip_string(self) -> None:
+        """跳过一个字符串，不解码也不检查转义序列"""
+        self.pos = self._string_end(skip=True)
+
+    def read_value(self) -> Any:
+        """完整解析一个值"""
+        if not self.peek():
+            raise self._error("意外的结尾")
+        needed = 0
+        while True:
+            # 数据不完整时等未处理的部分增长一倍再重试，避免大元素被反复解析
+            if len(self.buf) - self.pos < needed:
+                self.fill(needed)
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise self._error("JSON格式错误")
+                needed = max(len(self.buf) - self.pos, 1) * 2
+                continue
+            # 数字可能被块边界截断（12|3、-2.5|e10），剩余部分可能还属于这个数字时先读下一块
+            if not self.eof and _NUMBER_TAIL.match(self.buf, end):
+                if self.fill():
+                    continue
+            self.pos = end
+            return value
+
+    def skip_value(self) -> None:
+        """跳过一个值，不构建对象（跳过很大的无关字段时也不占用内存）"""
+        char = self.peek()
+        if char == '"':
+            self.skip_string()
+            return
+        if char not in ('{', '['):
+            while True:
+                match = _SCALAR.match(self.buf, self.pos)
+                if match and (match.end() < len(self.buf) or self.eof):
+                    self.pos = match.end()
+                    return
+                if not self.fill():
+                    raise self._error("意外的结尾")
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(self.buf, self.pos)
+            if match is None:
+                # 已经扫描过的部分可以丢弃
+                self.pos = len(self.buf)
+                if not self.fill():
+                    raise self._error("意外的结尾")
+                continue
+            char = match.group()
+            if char == '"':
+                self.pos = match.start()
+                self.skip_string()
+                continue
+            self.pos = match.end()
+            depth += 1 if char in '{[' else -1
+            if depth == 0:
+                return
+
+    def find_key(self, key: str) -> bool:
+        """在当前对象中找到指定的键并停在它的值之前，找不到时返回False"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return False
+        while True:
+            name = self.read_string()
+            self.expect(':')
+            if name == key:
+                return True
+            self.skip_value()
+            char = self.peek()
+            if char not in (',', '}'):
+                raise self._error("应为 ',' 或 '}'")
+            self.pos += 1
+            if char == '}':
+                return False
+
+
+def parse_path(path: Union[str, List[str], None]) -> List[str]:
+    """'data.list' -> ['data', 'list']，空字符串或None表示顶层"""
+    if not path:
+        return []
+    if isinstance(path, str):
+        return path.split('.')
+    return list(path)
+
+
+def iter_json_items(source, path: Union[str, List[str], None] = '',
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    流式产出JSON中指定数组的元素
+
+    Args:
+        source: 文本块或字节块的迭代器，或以二进制/文本模式打开的文件
+        path: 数组所在的路径，用点分隔的键，如 'data.list'；空字符串表示顶层就是数组
+        chunk_size: 从文件读取时每块的大小
+
+    Yields:
+        数组中的每个元素（已解析为Python对象）
+
+    Raises:
+        JSONStreamError: JSON格式错误，或指定路径不存在、不是数组
+    """
+    reader = _Reader(_iter_text_chunks(source, chunk_size))
+    keys = parse_path(path)
+    for depth, key in enumerate(keys):
+        if reader.peek() != '{' or not reader.find_key(key):
+            raise JSONStreamError(f"找不到路径: {'.'.join(keys[:depth + 1])}")
+    if reader.peek() != '[':
+        raise JSONStreamError(f"路径 {'.'.join(keys) or '(顶层)'} 不是数组")
+    reader.pos += 1
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.read_value()
+        char = reader.peek()
+        if char not in (',', ']'):
+            raise reader._error("应为 ',' 或 ']'")
+        reader.pos += 1
+        if char == ']':
+            return
@@ -0,0 +1,258 @@
+"""
+链接检查工具
+规范化、去重页面中的链接（包括图片等资源链接），并发检查状态码、耗时和重定向链，结果边检查边写入报告
+"""
+
+import csv
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator, List, Dict, Any, Optional
+from urllib.parse import urljoin, urldefrag, urlsplit, urlunsplit
+
+import requests
+from bs4 import BeautifulSoup
+
+from http_transport import HttpTransport
+from rate_limiter import RateLimiter, DEFAULT_HOST_LIMITS
+
+
+# 资源标签及其链接属性
+ASSET_ATTRIBUTES = {
+    'img': 'src',
+    'script': 'src',
+    'link': 'href',
+    'source': 'src',
+    'video': 'src',
+    'audio': 'src',
+    'iframe': 'src',
+}
+
+# HEAD不被支持时改用GET重试的状态码
+HEAD_FALLBACK_STATUSES = (400, 403, 405, 501)
+
+# 链接检查使用自己的限速器：秀米图片走CDN，可以比页面和接口快得多，其余主机沿用默认限速。
+# 需要调整时给 LinkAuditor 传 host_limits（如 {'img.xiumi.us': (100.0, 100)}）
+AUDIT_HOST_LIMITS = dict(DEFAULT_HOST_LIMITS, **{'img.xiumi.us': (50.0, 50)})
+
+REPORT_FIELDS = ['url', 'status', 'ok', 'latency_ms', 'method', 'final_url', 'redirects', 'error']
+
+
+def normalize_url(url: str, base_url: str = None) -> Optional[str]:
+    """
+    把链接转换为可检查的绝对URL
+
+    去掉#片段（服务器看不到片段，秀米的 #/article/... 路由都指向同一个页面），
+    主机名转小写；非http(s)链接（javascript:、mailto:、data: 等）返回None
+    """
+    if not url:
+        return None
+    url = url.strip()
+    if base_url:
+        url = urljoin(base_url, url)
+    url, _ = urldefrag(url)
+    parts = urlsplit(url)
+    if parts.scheme.lower() not in ('http', 'https') or not parts.netloc:
+        return None
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', parts.query, ''))
+
+
+def collect_links(soup: BeautifulSoup, base_url: str = None, include_assets: bool = True) -> List[str]:
+    """
+    收集页面中的链接，规范化并去重（保持首次出现的顺序）
+
+    Args:
+        soup: BeautifulSoup对象
+        base_url: 基础URL，用于处理相对链接
+        include_assets: 是否包括图片、脚本、样式表等资源链接
+
+    Returns:
+        URL列表
+    """
+    raw = [a['href'] for a in soup.find_all('a', href=True)]
+    if include_assets:
+        for tag in soup.find_all(list(ASSET_ATTRIBUTES)):
+            value = tag.get(ASSET_ATTRIBUTES[tag.name])
+            if value:
+                raw.append(value)
+    return dedupe_links(raw, base_url)
+
+
+def dedupe_links(links: Iterable[str], base_url: str = None) -> List[str]:
+    """规范化并去重链接列表（也接受 extract_links 返回的字典列表）"""
+    seen = set()
+    result = []
+    for link in links:
+        if isinstance(link, dict):
+            link = link.get('url')
+        url = normalize_url(link, base_url)
+        if url and url not in seen:
+            seen.add(url)
+            result.append(url)
+    return result
+
+
+class AuditRateLimiter(RateLimiter):
+    """记录每个线程在限速器上等待的时间，检查耗时中扣除这部分"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+
+    def acquire(self, url: str) -> float:
+        wait = super().acquire(url)
+        self._local.waited = getattr(self._local, 'waited', 0.0) + wait
+        return wait
+
+    def take_waited(self) -> float:
+        """返回当前线程上次调用以来的等待时间并清零"""
+        waited = getattr(self._local, 'waited', 0.0)
+        self._local.waited = 0.0
+        return waited
+
+
+class LinkAuditor:
+    """并发链接检查器"""
+
+    def __init__(self, transport: HttpTransport = None, workers: int = 16, per_host: int = 4, timeout: float = 10,
+                 host_limits: Dict[str, tuple] = None):
+        """
+        Args:
+            transport: HTTP传输层，默认新建一个只重试一次、使用 AUDIT_HOST_LIMITS 限速的传输层
+            workers: 最大并发请求数
+            per_host: 同一主机的最大并发请求数
+            timeout: 单个请求超时时间（秒）
+            host_limits: 在 AUDIT_HOST_LIMITS 基础上覆盖的按主机限速 {主机: (每秒请求数, 突发请求数)}，
+                         传入transport时不使用
+        """
+        self.workers = workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.transport = transport or HttpTransport(
+            pool_connections=max(workers, 10), pool_maxsize=per_host, max_retries=1,
+            rate_limiter=AuditRateLimiter(host_limits=dict(AUDIT_HOST_LIMITS, **(host_limits or {})))
+        )
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_lock = threading.Lock()
+
+    def _host_limit(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._host_lock:
+            limit = self._host_limits.get(host)
+            if limit is None:
+                limit = threading.BoundedSemaphore(self.per_host)
+                self._host_limits[host] = limit
+            return limit
+
+    def check(self, url: str) -> Dict[str, Any]:
+        """
+        检查单个链接：先发HEAD，服务器不支持HEAD时改用GET（只读响应头）
+
+        Returns:
+            检查结果字典
+        """
+        result = {
+            'url': url,
+            'status': None,
+            'ok': False,
+            'latency_ms': 0.0,
+            'method': 'HEAD',
+            'final_url': url,
+            'redirects': [],
+            'error': '',
+        }
+        limiter = self.transport.rate_limiter
+        with self._host_limit(url):
+            # 耗时从拿到主机并发名额后开始计，并扣除限速等待
+            start = time.perf_counter()
+            if isinstance(limiter, AuditRateLimiter):
+                limiter.take_waited()
+            try:
+                try:
+                    response = self.transport.request('HEAD', url, allow_redirects=True, timeout=self.timeout)
+                    if response.status_code in HEAD_FALLBACK_STATUSES:
+                        response = None
+                except requests.exceptions.ConnectionError:
+                    # 连不上主机时GET也不会成功，不再重试
+                    raise
+                except requests.exceptions.RequestException:
+                    response = None
+
+                if response is None:
+                    result['method'] = 'GET'
+                    response = self.transport.request('GET', url, allow_redirects=True, stream=True, timeout=self.timeout)
+                    response.close()
+
+                result['status'] = response.status_code
+                result['ok'] = response.status_code < 400
+                result['final_url'] = response.url
+                result['redirects'] = [
+                    {'status': hop.status_code, 'url': hop.url} for hop in response.history
+                ]
+            except requests.exceptions.RequestException as e:
+                result['error'] = str(e)
+            elapsed = time.perf_counter() - start
+            if isinstance(limiter, AuditRateLimiter):
+                elapsed -= limiter.take_waited()
+        result['latency_ms'] = round(max(elapsed, 0.0) * 1000, 1)
+        return result
+
+    def audit(self, urls: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        并发检查所有链接，按完成顺序产出结果
+
+        Args:
+            urls: 已规范化、去重的URL
+
+        Yields:
+            检查结果字典
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self.check, url) for url in urls]
+            for future in as_completed(futures):
+                yield future.result()
+
+
+def write_report(results: Iterable[Dict[str, Any]], path: str) -> Iterator[Dict[str, Any]]:
+    """
+    边产出结果边写入报告（.csv 写CSV，其他扩展名写JSON Lines）
+
+    Args:
+        results: 检查结果
+        path: 报告文件路径
+
+    Yields:
+        原样产出每个检查结果
+    """
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.csv'):
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            for result in results:
+                row = dict(result, redirects=' -> '.join(hop['url'] for hop in result['redirects']))
+                writer.writerow(row)
+                f.flush()
+                yield result
+        else:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + '\n')
+                f.flush()
+                yield result
+
+
+def summarize_results(results: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """统计检查结果"""
+    summary = {'total': 0, 'ok': 0, 'broken': 0, 'errors': 0, 'redirected': 0, 'max_latency_ms': 0.0}
+    for result in results:
+        summary['total'] += 1
+        if result['error']:
+            summary['errors'] += 1
+        elif result['ok']:
+            summary['ok'] += 1
+        else:
+            summary['broken'] += 1
+        if result['redirects']:
+            summary['redirected'] += 1
+        summary['max_latency_ms'] = max(summary['max_latency_ms'], result['latency_ms'])
+    return summary
@@ -0,0 +1,414 @@
+"""
+多账号并行获取另存码
+每个账号在独立的进程中运行一个抓取器，使用各自的浏览器用户数据目录、调试端口、Cookie保管库和输出目录，
+按全局并发上限同时运行，结束后把各账号的结果合并成一份报告。备份全部账号的耗时约等于最大的那个账号
+
+账号列表文件（JSON）:
+    {"accounts": [
+        {"name": "编辑部", "browser": "edge"},
+        {"name": "市场部", "browser": "chrome", "browser_path": "C:/.../chrome.exe", "headless": true}
+    ]}
+
+用法:
+    python multi_account.py run accounts.json --concurrency 3
+    python multi_account.py run accounts.json --headless     # 各账号都已登录过一次后可用无头模式
+"""
+
+import argparse
+import json
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from cookie_vault import CookieVault
+
+
+_TOOLBOX_DIR = os.path.join(os.path.expanduser('~'), '.xiumi_toolbox')
+
+# 各账号的浏览器用户数据目录和Cookie保管库放在 DEFAULT_PROFILE_ROOT/<账号>/ 下，多次运行之间保持登录
+DEFAULT_PROFILE_ROOT = os.path.join(_TOOLBOX_DIR, 'accounts')
+
+# 第i个账号使用 DEFAULT_BASE_PORT 起第i个空闲端口（避开默认的9222和浏览器池的9300起）
+DEFAULT_BASE_PORT = 9400
+
+# 同时运行的账号数（每个账号一个浏览器）
+DEFAULT_CONCURRENCY = 2
+
+DEFAULT_OUTPUT_ROOT = 'multi_account_output'
+
+# 超时后等待工作进程自己关闭浏览器的时间（秒），之后强制结束
+WORKER_STOP_TIMEOUT = 15
+
+# 工作进程写入的结果文件名
+RESULT_FILE = 'result.json'
+
+# 工作进程启动的浏览器PID；工作进程关闭浏览器后删除，父进程在工作进程退出后发现它还在时结束整个浏览器进程树
+BROWSER_PID_FILE = 'browser.pid'
+
+
+def account_slug(name: str) -> str:
+    """账号名称转为目录名（保留中文，其他特殊字符替换为下划线）"""
+    return re.sub(r'[^\w.-]', '_', name.strip()) or 'account'
+
+
+def load_accounts(path: str) -> List[Dict[str, Any]]:
+    """
+    读取账号列表文件
+
+    Returns:
+        [{'name', 'browser', 'browser_path', 'headless'}]，headless为None时使用命令行的设置
+
+    Raises:
+        ValueError: 格式不正确、缺少名称或名称重复
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    items = data.get('accounts') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        raise ValueError("账号列表为空，应为 {\"accounts\": [...]} 或账号数组")
+
+    accounts = []
+    seen = set()
+    for item in items:
+        if isinstance(item, str):
+            item = {'name': item}
+        name = str(item.get('name') or '').strip()
+        if not name:
+            raise ValueError(f"账号缺少名称: {item}")
+        if account_slug(name) in seen:
+            raise ValueError(f"账号名称重复: {name}")
+        seen.add(account_slug(name))
+        accounts.append({
+            'name': name,
+            'browser': item.get('browser', 'edge'),
+            'browser_path': item.get('browser_path'),
+            'headless': item.get('headless'),
+        })
+    return accounts
+
+
+def kill_process_tree(pid: int) -> bool:
+    """
+    结束浏览器及其子进程（渲染、GPU等进程）
+
+    POSIX上浏览器以独立会话启动（进程组ID等于自身PID），结束整个进程组；
+    Windows上用 taskkill /T 结束进程树
+
+    Returns:
+        是否找到并结束了进程
+    """
+    if os.name == 'nt':
+        completed = subprocess.run(['taskkill', '/T', '/F', '/PID', str(pid)],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return completed.returncode == 0
+    try:
+        # PID可能已被其他进程复用，只结束仍以它为组长的进程组
+        if os.getpgid(pid) != pid:
+            return False
+        os.killpg(pid, signal.SIGKILL)
+        return True
+    except (ProcessLookupError, PermissionError):
+        return False
+
+
+def port_is_free(port: int, host: str = '127.0.0.1') -> bool:
+    """端口是否未被占用（已在运行的调试浏览器会被当作别的账号连上，必须避开）"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        try:
+            sock.bind((host, port))
+        except OSError:
+            return False
+    return True
+
+
+class MultiAccountRunner:
+    """按并发上限为每个账号启动一个抓取进程，并合并结果"""
+
+    def __init__(self, accounts: List[Dict[str, Any]], concurrency: int = DEFAULT_CONCURRENCY,
+                 output_root: str = DEFAULT_OUTPUT_ROOT, profile_root: str = DEFAULT_PROFILE_ROOT,
+                 base_port: int = DEFAULT_BASE_PORT, headless: bool = False, timeout: float = None):
+        """
+        Args:
+            accounts: load_accounts 返回的账号列表
+            concurrency: 同时运行的账号数
+            output_root: 输出目录，每次运行在其中新建一个以时间命名的目录
+            profile_root: 各账号浏览器用户数据和Cookie的根目录
+            base_port: 起始调试端口
+            headless: 账号未单独设置时是否使用无头模式
+            timeout: 单个账号的最长运行时间（秒），None表示不限制
+        """
+        self.accounts = accounts
+        self.concurrency = max(1, concurrency)
+        self.output_root = output_root
+        self.profile_root = profile_root
+        self.base_port = base_port
+        self.headless = headless
+        self.timeout = timeout
+        self.run_dir: Optional[str] = None
+        self._print_lock = threading.Lock()
+
+    def _print(self, message: str) -> None:
+        with self._print_lock:
+            print(message, flush=True)
+
+    def plan(self) -> List[Dict[str, Any]]:
+        """为每个账号分配用户数据目录、调试端口、Cookie保管库和输出目录"""
+        self.run_dir = os.path.join(self.output_root, datetime.now().strftime('%Y%m%d_%H%M%S'))
+        jobs = []
+        port = self.base_port
+        for account in self.accounts:
+            while not port_is_free(port):
+                port += 1
+            slug = account_slug(account['name'])
+            profile_dir = os.path.abspath(os.path.join(self.profile_root, slug))
+            headless = account['headless'] if account.get('headless') is not None else self.headless
+            jobs.append({
+                'name': account['name'],
+                'browser': account.get('browser', 'edge'),
+                'browser_path': account.get('browser_path'),
+                'headless': headless,
+                'port': port,
+                'user_data_dir': os.path.join(profile_dir, 'browser'),
+                'cookie_vault': os.path.join(profile_dir, 'cookies.json'),
+                'output_dir': os.path.abspath(os.path.join(self.run_dir, slug)),
+            })
+            port += 1
+        return jobs
+
+    def worker_command(self, job_path: str) -> List[str]:
+        """启动工作进程的命令"""
+        return [sys.executable, os.path.abspath(__file__), 'worker', job_path]
+
+    def run_account(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        在独立进程中运行一个账号，输出写入该账号目录下的 fetch.log
+
+        Returns:
+            工作进程写入的结果 {'name', 'status', 'count', 'codes', 'records', 'elapsed', 'error'}，
+            另加 'output'（输出目录）和 'log'（日志文件）
+        """
+        os.makedirs(job['output_dir'], exist_ok=True)
+        job_path = os.path.join(job['output_dir'], 'job.json')
+        with open(job_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False, indent=2)
+        log_path = os.path.join(job['output_dir'], 'fetch.log')
+        result_path = os.path.join(job['output_dir'], RESULT_FILE)
+        pid_path = os.path.join(job['output_dir'], BROWSER_PID_FILE)
+
+        env = dict(os.environ)
+        env.update({'PYTHONIOENCODING': 'utf-8', 'PYTHONUNBUFFERED': '1', 'XIUMI_COOKIE_VAULT': job['cookie_vault']})
+
+        self._print(f"▶ {job['name']}: 开始 (端口 {job['port']}，日志 {log_path})")
+        started = time.perf_counter()
+        timed_out = False
+        with open(log_path, 'w', encoding='utf-8') as log:
+            process = subprocess.Popen(self.worker_command(job_path), stdout=log, stderr=subprocess.STDOUT,
+                                       stdin=subprocess.DEVNULL, env=env)
+            try:
+                process.wait(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                timed_out = True
+                # 先让工作进程自己关闭浏览器，不响应再强制结束
+                process.terminate()
+                try:
+                    process.wait(timeout=WORKER_STOP_TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+        # 工作进程没能自己关闭浏览器（超时被结束、崩溃；Windows上terminate不会执行清理代码）
+        self._kill_orphan_browser(job, pid_path)
+
+        result = {'name': job['name'], 'status': 'failed', 'count': 0, 'codes': {}, 'records': [],
+                  'elapsed': time.perf_counter() - started, 'error': None}
+        if os.path.exists(result_path):
+            with open(result_path, 'r', encoding='utf-8') as f:
+                result.update(json.load(f))
+        else:
+            result['error'] = f"工作进程没有写入结果 (退出码 {process.returncode})"
+        if timed_out:
+            result['status'] = 'timeout'
+            result['error'] = f"超过 {self.timeout:g} 秒未完成"
+        result.update(output=job['output_dir'], log=log_path)
+
+        icon = '✓' if result['status'] == 'ok' else ('⚠️ ' if result['status'] == 'empty' else '✗')
+        detail = f"，{result['error']}" if result['error'] else ''
+        self._print(f"{icon} {job['name']}: {result['count']} 个另存码，用时 {result['elapsed']:.1f} 秒{detail}")
+        return result
+
+    def _kill_orphan_browser(self, job: Dict[str, Any], pid_path: str) -> None:
+        if not os.path.exists(pid_path):
+            return
+        try:
+            with open(pid_path, 'r') as f:
+                pid = int(f.read().strip())
+        except (OSError, ValueError):
+            return
+        if kill_process_tree(pid):
+            self._print(f"⚠️  {job['name']}: 已结束工作进程遗留的浏览器 (PID {pid})")
+        try:
+            os.remove(pid_path)
+        except OSError:
+            pass
+
+    def run(self) -> Dict[str, Any]:
+        """
+        运行全部账号并合并结果
+
+        Returns:
+            合并报告 {'timestamp', 'elapsed', 'serial_elapsed', 'concurrency', 'total_count',
+                      'accounts': [各账号概况], 'codes': {账号: {标题: 另存码}}, 'records': [带account字段的记录]}
+        """
+        jobs = self.plan()
+        workers = min(self.concurrency, len(jobs))
+        print(f"共 {len(jobs)} 个账号，同时运行 {workers} 个，输出目录: {os.path.abspath(self.run_dir)}")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='account') as executor:
+            results = list(executor.map(self.run_account, jobs))
+        elapsed = time.perf_counter() - started
+
+        report = {
+            'timestamp': datetime.now().isoformat(),
+            'elapsed': elapsed,
+            'serial_elapsed': sum(r['elapsed'] for r in results),
+            'concurrency': workers,
+            'total_count': sum(r['count'] for r in results),
+            'accounts': [{key: r.get(key) for key in ('name', 'status', 'count', 'elapsed', 'error', 'output', 'log')}
+                         for r in results],
+            'codes': {r['name']: r['codes'] for r in results},
+            'records': [dict(record, account=r['name']) for r in results for record in r['records']],
+        }
+        return report
+
+    def write_report(self, report: Dict[str, Any]) -> str:
+        """把合并报告写入本次运行的输出目录，返回文件路径"""
+        os.makedirs(self.run_dir, exist_ok=True)
+        path = os.path.join(self.run_dir, 'report.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return path
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print("\n" + "=" * 60)
+    print(f"多账号获取完成: {len(report['accounts'])} 个账号，共 {report['total_count']} 个另存码")
+    print("=" * 60)
+    for account in report['accounts']:
+        status = {'ok': '成功', 'empty': '无结果', 'timeout': '超时'}.get(account['status'], '失败')
+        print(f"  {account['name']:<16} {status:<6} {account['count']:>5} 个另存码  {account['elapsed']:>7.1f} 秒")
+        if account['error']:
+            print(f"    {account['error']} (日志: {account['log']})")
+    print(f"\n总耗时 {report['elapsed']:.1f} 秒 (逐个运行约需 {report['serial_elapsed']:.1f} 秒)")
+
+
+def run_worker(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    工作进程：用账号自己的用户数据目录和调试端口启动浏览器并运行抓取器
+
+    Returns:
+        {'name', 'status'('ok'/'empty'/'failed'), 'count', 'codes', 'records', 'elapsed', 'error'}
+    """
+    from fetch_quickshare import XiumiQuickShareFetcher
+
+    fetcher = XiumiQuickShareFetcher()
+    fetcher.account = job['name']
+    fetcher.debug_port = job['port']
+    fetcher.user_data_dir = job['user_data_dir']
+    fetcher.output_dir = job['output_dir']
+    fetcher.cookie_vault = CookieVault(job['cookie_vault'])
+    fetcher.browser_pid_file = os.path.join(job['output_dir'], BROWSER_PID_FILE)
+
+    result = {'name': job['name'], 'status': 'failed', 'count': 0, 'codes': {}, 'records': [], 'error': None}
+    started = time.perf_counter()
+    try:
+        if not fetcher.start_browser_with_debug(job['browser'], job['browser_path'],
+                                                headless=job['headless'], port=job['port']):
+            raise RuntimeError("启动浏览器失败")
+        if fetcher.debug_process is None:
+            raise RuntimeError(f"调试端口 {job['port']} 已被其他浏览器占用")
+        codes = fetcher.run(headless=job['headless'], browser=job['browser'],
+                            use_existing=True, browser_path=job['browser_path'])
+        result.update(status='ok' if codes else 'empty', count=len(codes), codes=codes, records=fetcher.records)
+        if not codes:
+            # 抓取器内部出错（登录超时、驱动初始化失败等）时只打印信息并返回空结果
+            result['error'] = "未获取到另存码，详见日志"
+    except Exception as e:
+        result['error'] = str(e)
+        print(f"✗ {e}")
+    finally:
+        # 连接已运行实例时 cleanup 只结束驱动会话，浏览器由这里关闭
+        process = fetcher.debug_process
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if process is None or process.poll() is not None:
+            # 浏览器已关闭，父进程不需要再结束它
+            try:
+                os.remove(fetcher.browser_pid_file)
+            except OSError:
+                pass
+        result['elapsed'] = time.perf_counter() - started
+    return result
+
+
+def worker_main(job_path: str) -> int:
+    with open(job_path, 'r', encoding='utf-8') as f:
+        job = json.load(f)
+    # 超时被终止时也走 finally 关闭浏览器
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
+    result = run_worker(job)
+    with open(os.path.join(job['output_dir'], RESULT_FILE), 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return 0 if result['status'] != 'failed' else 1
+
+
+def main(argv: List[str] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="多账号并行获取秀米另存码")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="运行账号列表中的全部账号")
+    run_parser.add_argument("accounts", help="账号列表文件 (JSON)")
+    run_parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                            help=f"同时运行的账号数 (默认: {DEFAULT_CONCURRENCY})")
+    run_parser.add_argument("--output", default=DEFAULT_OUTPUT_ROOT, help=f"输出目录 (默认: {DEFAULT_OUTPUT_ROOT})")
+    run_parser.add_argument("--profile-root", default=DEFAULT_PROFILE_ROOT,
+                            help=f"各账号浏览器数据目录 (默认: {DEFAULT_PROFILE_ROOT})")
+    run_parser.add_argument("--base-port", type=int, default=DEFAULT_BASE_PORT,
+                            help=f"起始调试端口 (默认: {DEFAULT_BASE_PORT})")
+    run_parser.add_argument("--headless", action="store_true", help="无头模式（账号需要已经登录过）")
+    run_parser.add_argument("--timeout", type=float, default=None, help="单个账号的最长运行秒数")
+    worker_parser = commands.add_parser("worker", help=argparse.SUPPRESS)
+    worker_parser.add_argument("job")
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        return worker_main(args.job)
+
+    try:
+        accounts = load_accounts(args.accounts)
+    except (OSError, ValueError) as e:
+        print(f"❌ 读取账号列表失败: {e}")
+        return 2
+
+    runner = MultiAccountRunner(accounts, concurrency=args.concurrency, output_root=args.output,
+                                profile_root=args.profile_root, base_port=args.base_port,
+                                headless=args.headless, timeout=args.timeout)
+    report = runner.run()
+    path = runner.write_report(report)
+    print_report(report)
+    print(f"合并报告: {path}")
+    return 0 if all(account['status'] != 'failed' for account in report['accounts']) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
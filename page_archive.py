@@ -0,0 +1,268 @@
+"""
+页面归档存储工具
+按内容哈希保存抓取到的页面，自动去重并压缩，按URL和抓取时间建立索引
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Optional, Dict, List, Any
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# 压缩方式 -> 对象文件扩展名
+COMPRESSION_SUFFIXES = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+    'none': '',
+}
+
+
+class PageArchive:
+    """内容寻址的页面归档"""
+
+    def __init__(self, root: str = os.path.join("saved_pages", "archive"), compression: str = "gzip",
+                 keep_per_url: Optional[int] = None, max_age_days: Optional[int] = None):
+        """
+        Args:
+            root: 归档根目录
+            compression: 压缩方式 ("gzip"、"zstd" 或 "none")
+            keep_per_url: 每个URL最多保留的抓取记录数，None表示不限制
+            max_age_days: 抓取记录最长保留天数，None表示不限制
+        """
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"不支持的压缩方式: {compression}")
+        if compression == 'zstd' and zstandard is None:
+            print("⚠️  未安装zstandard，改用gzip压缩")
+            compression = 'gzip'
+
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.compression = compression
+        self.keep_per_url = keep_per_url
+        self.max_age_days = max_age_days
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(root, "index.db"))
+        self.db.row_factory = sqlite3.Row
+        self._init_db()
+
+    def _init_db(self):
+        """初始化索引表"""
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS objects (
+                digest TEXT PRIMARY KEY,
+                compression TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS captures (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                digest TEXT NOT NULL REFERENCES objects(digest),
+                captured_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_captures_url_time ON captures(url, captured_at);
+            CREATE INDEX IF NOT EXISTS idx_captures_time ON captures(captured_at);
+            CREATE INDEX IF NOT EXISTS idx_captures_digest ON captures(digest);
+        """)
+        self.db.commit()
+
+    def object_path(self, digest: str, compression: str) -> str:
+        """对象文件路径（按哈希前两位分目录）"""
+        return os.path.join(self.objects_dir, digest[:2], digest + COMPRESSION_SUFFIXES[compression])
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == 'gzip':
+            return gzip.compress(data, compresslevel=6)
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return data
+
+    @staticmethod
+    def _decompress(data: bytes, compression: str) -> bytes:
+        if compression == 'gzip':
+            return gzip.decompress(data)
+        if compression == 'zstd':
+            if zstandard is None:
+                raise RuntimeError("读取zstd对象需要安装zstandard")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return data
+
+    def put(self, url: str, html_content: str, captured_at: datetime = None) -> Dict[str, Any]:
+        """
+        保存一次页面抓取
+
+        Args:
+            url: 页面URL
+            html_content: HTML内容
+            captured_at: 抓取时间，默认为当前时间
+
+        Returns:
+            抓取记录信息 {digest, path, size, stored_size, deduplicated, captured_at}
+        """
+        data = html_content.encode('utf-8') if isinstance(html_content, str) else bytes(html_content)
+        digest = hashlib.sha256(data).hexdigest()
+        captured_at = (captured_at or datetime.now()).isoformat(timespec='seconds')
+
+        row = self.db.execute(
+            "SELECT compression, stored_size FROM objects WHERE digest = ?", (digest,)
+        ).fetchone()
+        deduplicated = row is not None and os.path.exists(self.object_path(digest, row['compression']))
+
+        if deduplicated:
+            compression, stored_size = row['compression'], row['stored_size']
+        else:
+            # 相同内容只压缩、写入一次；先写临时文件再重命名，避免留下半个对象
+            compression = self.compression
+            payload = self._compress(data)
+            path = self.object_path(digest, compression)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            stored_size = len(payload)
+            self.db.execute(
+                "INSERT OR REPLACE INTO objects (digest, compression, size, stored_size) VALUES (?, ?, ?, ?)",
+                (digest, compression, len(data), stored_size)
+            )
+
+        self.db.execute(
+            "INSERT INTO captures (url, digest, captured_at) VALUES (?, ?, ?)",
+            (url, digest, captured_at)
+        )
+        self.db.commit()
+
+        if self.keep_per_url is not None or self.max_age_days is not None:
+            self.prune(url)
+
+        return {
+            'digest': digest,
+            'path': self.object_path(digest, compression),
+            'size': len(data),
+            'stored_size': stored_size,
+            'deduplicated': deduplicated,
+            'captured_at': captured_at,
+        }
+
+    def get(self, digest: str) -> Optional[str]:
+        """按内容哈希读取页面，不存在返回None"""
+        row = self.db.execute(
+            "SELECT compression FROM objects WHERE digest = ?", (digest,)
+        ).fetchone()
+        if not row:
+            return None
+        path = self.object_path(digest, row['compression'])
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return self._decompress(f.read(), row['compression']).decode('utf-8')
+
+    def history(self, url: str, limit: int = None) -> List[Dict[str, Any]]:
+        """按时间倒序列出某个URL的抓取记录"""
+        sql = ("SELECT c.url, c.digest, c.captured_at, o.size, o.stored_size, o.compression "
+               "FROM captures c JOIN objects o ON o.digest = c.digest "
+               "WHERE c.url = ? ORDER BY c.captured_at DESC, c.id DESC")
+        params: tuple = (url,)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        return [dict(row) for row in self.db.execute(sql, params)]
+
+    def latest(self, url: str) -> Optional[Dict[str, Any]]:
+        """某个URL最近一次的抓取记录"""
+        records = self.history(url, limit=1)
+        return records[0] if records else None
+
+    def read_latest(self, url: str) -> Optional[str]:
+        """读取某个URL最近一次抓取的页面内容"""
+        record = self.latest(url)
+        return self.get(record['digest']) if record else None
+
+    def captures_between(self, start: datetime, end: datetime = None) -> List[Dict[str, Any]]:
+        """列出某个时间段内的全部抓取记录"""
+        end = end or datetime.now()
+        rows = self.db.execute(
+            "SELECT url, digest, captured_at FROM captures "
+            "WHERE captured_at >= ? AND captured_at <= ? ORDER BY captured_at",
+            (start.isoformat(timespec='seconds'), end.isoformat(timespec='seconds'))
+        )
+        return [dict(row) for row in rows]
+
+    def prune(self, url: str = None) -> int:
+        """
+        按保留策略清理抓取记录，并删除不再被引用的对象文件
+
+        Args:
+            url: 只清理指定URL，None表示清理全部
+
+        Returns:
+            删除的抓取记录数
+        """
+        removed = 0
+
+        if self.max_age_days is not None:
+            cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat(timespec='seconds')
+            if url:
+                cur = self.db.execute("DELETE FROM captures WHERE url = ? AND captured_at < ?", (url, cutoff))
+            else:
+                cur = self.db.execute("DELETE FROM captures WHERE captured_at < ?", (cutoff,))
+            removed += cur.rowcount
+
+        if self.keep_per_url is not None:
+            urls = [url] if url else [row[0] for row in self.db.execute("SELECT DISTINCT url FROM captures")]
+            for target in urls:
+                cur = self.db.execute(
+                    "DELETE FROM captures WHERE url = ? AND id NOT IN ("
+                    "SELECT id FROM captures WHERE url = ? ORDER BY captured_at DESC, id DESC LIMIT ?)",
+                    (target, target, self.keep_per_url)
+                )
+                removed += cur.rowcount
+
+        if removed:
+            self._collect_garbage()
+        self.db.commit()
+        return removed
+
+    def _collect_garbage(self):
+        """删除没有任何抓取记录引用的对象"""
+        orphans = self.db.execute(
+            "SELECT digest, compression FROM objects "
+            "WHERE digest NOT IN (SELECT DISTINCT digest FROM captures)"
+        ).fetchall()
+        for row in orphans:
+            path = self.object_path(row['digest'], row['compression'])
+            if os.path.exists(path):
+                os.remove(path)
+            self.db.execute("DELETE FROM objects WHERE digest = ?", (row['digest'],))
+
+    def stats(self) -> Dict[str, int]:
+        """归档统计信息"""
+        captures, urls = self.db.execute("SELECT COUNT(*), COUNT(DISTINCT url) FROM captures").fetchone()
+        objects, size, stored = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM objects"
+        ).fetchone()
+        return {
+            'captures': captures,
+            'urls': urls,
+            'objects': objects,
+            'size': size,
+            'stored_size': stored,
+        }
+
+    def close(self):
+        """关闭索引数据库"""
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,165 @@
+"""
+按行访问的页面对象
+只保存一份原始字节，行偏移表在第一次按行访问时才计算，每一行在访问时才解码成字符串
+"""
+
+import codecs
+import re
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from typing import List, Tuple, Iterator, Optional
+
+
+# 行结束符与 str.splitlines 的常用部分一致：\r\n、\n、\r
+_LINE_BREAK = re.compile(rb'\r\n|\r|\n')
+_NEWLINE = re.compile(rb'\n')
+
+
+class PageLines(Sequence):
+    """
+    页面内容的按行只读视图
+
+    可以像行列表一样使用：len()、下标、切片、遍历都返回解码后的行（不含换行符）。
+    str(page) 得到完整文本，bytes(page) 得到UTF-8编码的内容
+    """
+
+    def __init__(self, content: bytes, encoding: str = 'utf-8'):
+        """
+        Args:
+            content: 页面原始字节
+            encoding: 页面编码
+        """
+        encoding = codecs.lookup(encoding or 'utf-8').name
+        # UTF-16等编码中换行符不是单字节，按字节找行会出错，先统一转成UTF-8
+        if '\n'.encode(encoding, errors='ignore') != b'\n':
+            content = content.decode(encoding, errors='replace').encode('utf-8')
+            encoding = 'utf-8'
+        self.content = content
+        self.encoding = encoding
+        self._starts: Optional[array] = None
+
+    @classmethod
+    def from_text(cls, text: str) -> "PageLines":
+        """从字符串创建（内部以UTF-8字节保存）"""
+        return cls(text.encode('utf-8'), 'utf-8')
+
+    @classmethod
+    def from_response(cls, response) -> "PageLines":
+        """从requests响应创建，编码规则与 response.text 相同"""
+        return cls(response.content, response.encoding or response.apparent_encoding or 'utf-8')
+
+    def _line_starts(self) -> array:
+        """每一行的起始偏移（按需计算并缓存）"""
+        if self._starts is None:
+            content = self.content
+            size = len(content)
+            starts = array('I' if size < 2 ** 32 else 'Q')
+            if size:
+                # 没有\r时用单字符正则，速度快一倍多
+                pattern = _LINE_BREAK if b'\r' in content else _NEWLINE
+                starts.append(0)
+                starts.extend(match.end() for match in pattern.finditer(content))
+                # 以换行结尾时不产生额外的空行（与 splitlines 一致）
+                if starts[-1] == size:
+                    starts.pop()
+            self._starts = starts
+        return self._starts
+
+    def _line_bytes(self, index: int) -> bytes:
+        starts = self._line_starts()
+        start = starts[index]
+        end = starts[index + 1] if index + 1 < len(starts) else len(self.content)
+        line = self.content[start:end]
+        if line.endswith(b'\r\n'):
+            return line[:-2]
+        if line.endswith((b'\n', b'\r')):
+            return line[:-1]
+        return line
+
+    def _decode(self, data: bytes) -> str:
+        return data.decode(self.encoding, errors='replace')
+
+    def __len__(self) -> int:
+        return len(self._line_starts())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._decode(self._line_bytes(i)) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("行号超出范围")
+        return self._decode(self._line_bytes(index))
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self._decode(self._line_bytes(i))
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __bytes__(self) -> bytes:
+        if self.encoding == 'utf-8':
+            return self.content
+        return self.text.encode('utf-8')
+
+    def __repr__(self) -> str:
+        return f"<PageLines {len(self.content)} bytes, encoding={self.encoding}>"
+
+    @property
+    def text(self) -> str:
+        """完整文本（每次调用都重新解码，不缓存）"""
+        return self._decode(self.content)
+
+    @property
+    def nbytes(self) -> int:
+        """原始内容字节数"""
+        return len(self.content)
+
+    def _pattern(self, search_term: str):
+        """大小写不敏感的字节正则（与 str.lower() 比较的效果相同）"""
+        from archive_search import compile_term
+        if self.encoding == 'utf-8':
+            return compile_term(search_term)
+        try:
+            term_bytes = search_term.encode(self.encoding)
+        except UnicodeEncodeError:
+            # 页面编码无法表示该关键词，不可能命中
+            return re.compile(b'(?!)')
+        return re.compile(re.escape(term_bytes), re.IGNORECASE)
+
+    def contains(self, search_term: str) -> bool:
+        """页面中是否包含关键词（不区分大小写）"""
+        return self._pattern(search_term).search(self.content) is not None
+
+    def search(self, search_term: str) -> List[Tuple[int, str]]:
+        """
+        按行搜索关键词，只解码命中的行
+
+        Args:
+            search_term: 搜索关键词（不区分大小写）
+
+        Returns:
+            [(行号, 去掉首尾空白的行内容), ...]，行号从1开始
+        """
+        pattern = self._pattern(search_term)
+        starts = self._line_starts()
+        matches = []
+        pos = 0
+        while True:
+            match = pattern.search(self.content, pos)
+            if not match:
+                break
+            index = bisect_right(starts, match.start()) - 1
+            line = self._line_bytes(index)
+            if match.end() > starts[index] + len(line):
+                # 跨越换行符的匹配不算命中（按行搜索时不可能出现），从下一个字节继续
+                pos = match.start() + 1
+                continue
+            matches.append((index + 1, self._decode(line).strip()))
+            # 每行只算一次，从下一行继续搜索
+            if index + 1 >= len(starts):
+                break
+            pos = starts[index + 1]
+        return matches
@@ -0,0 +1,176 @@
+"""
+流式页面摘要
+边读取响应边解析，一遍得到标题、描述、关键词、链接数、图片数和正文长度，不构建DOM树
+"""
+
+import codecs
+from html.parser import HTMLParser
+from typing import Dict, Any, Iterable, Iterator, Optional
+
+from text_extract import NON_TEXT_TAGS, TextNormalizer
+
+
+# 只需要元数据时，遇到这些位置就可以停止解析
+HEAD_END_TAGS = frozenset(['body'])
+
+
+class PageSummarizer(HTMLParser):
+    """增量HTML摘要解析器"""
+
+    def __init__(self, metadata_only: bool = False):
+        """
+        Args:
+            metadata_only: 只提取标题、描述和关键词，解析完<head>后即停止
+        """
+        super().__init__(convert_charrefs=True)
+        self.metadata_only = metadata_only
+        self.done = False
+        self.title: Optional[str] = None
+        self.description: Optional[str] = None
+        self.keywords: Optional[str] = None
+        self.links_count = 0
+        self.images_count = 0
+        self.text_length = 0
+        self._phrase_count = 0
+        self._title_parts = None
+        self._skip_depth = 0
+        self._normalizer = TextNormalizer()
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag in HEAD_END_TAGS and self.metadata_only:
+            self.done = True
+            return
+        if tag == 'title' and self.title is None and self._title_parts is None:
+            self._title_parts = []
+        elif tag == 'meta':
+            attrs = dict(attrs)
+            name = attrs.get('name')
+            if name == 'description' and self.description is None:
+                self.description = attrs.get('content') or ''
+            elif name == 'keywords' and self.keywords is None:
+                self.keywords = attrs.get('content') or ''
+        elif tag == 'a':
+            if any(key == 'href' for key, _ in attrs):
+                self.links_count += 1
+        elif tag == 'img':
+            self.images_count += 1
+        if tag in NON_TEXT_TAGS:
+            self._skip_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        # <img/>、<meta/> 这类自闭合标签没有结束标签，不能增加跳过深度
+        self.handle_starttag(tag, attrs)
+        if tag in NON_TEXT_TAGS and not self.done:
+            self._skip_depth -= 1
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if tag == 'head' and self.metadata_only:
+            self.done = True
+        if tag == 'title' and self._title_parts is not None:
+            self.title = ''.join(self._title_parts).strip()
+            self._title_parts = None
+        if tag in NON_TEXT_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self.done:
+            return
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+        if self._skip_depth == 0:
+            self._count(self._normalizer.feed(data))
+
+    def _count(self, phrases: Iterable[str]) -> None:
+        for phrase in phrases:
+            # 短语之间用一个空格连接
+            self.text_length += len(phrase) + (1 if self._phrase_count else 0)
+            self._phrase_count += 1
+
+    def close(self):
+        super().close()
+        if self._title_parts is not None:
+            self.title = ''.join(self._title_parts).strip()
+            self._title_parts = None
+        self._count(self._normalizer.close())
+
+    def result(self) -> Dict[str, Any]:
+        """摘要字段（与 SimpleWebAccess.get_page_info 的字段名一致）"""
+        summary = {
+            'title': self.title or '',
+            'description': self.description or '',
+            'keywords': self.keywords or '',
+        }
+        if not self.metadata_only:
+            summary.update({
+                'links_count': self.links_count,
+                'images_count': self.images_count,
+                'text_length': self.text_length,
+            })
+        return summary
+
+
+def summarize_chunks(chunks: Iterable[str], metadata_only: bool = False) -> Dict[str, Any]:
+    """
+    对分块传入的HTML文本做摘要
+
+    Args:
+        chunks: HTML文本块
+        metadata_only: 只提取元数据，解析完<head>后不再读取后续文本块
+
+    Returns:
+        摘要字典
+    """
+    parser = PageSummarizer(metadata_only=metadata_only)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    parser.close()
+    return parser.result()
+
+
+def summarize_html(html: str, metadata_only: bool = False, chunk_size: int = 64 * 1024) -> Dict[str, Any]:
+    """对完整的HTML文本做摘要（分块传入解析器，只需要元数据时可以提前结束）"""
+    chunks = (html[i:i + chunk_size] for i in range(0, len(html), chunk_size))
+    return summarize_chunks(chunks, metadata_only)
+
+
+def iter_response_text(response, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """
+    以流式方式读取requests响应并增量解码
+
+    requests对没有声明charset的text/html默认使用ISO-8859-1，这里改为UTF-8
+    """
+    encoding = response.encoding
+    if 'charset' not in response.headers.get('content-type', '').lower():
+        encoding = 'utf-8'
+    decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def summarize_response(response, metadata_only: bool = False, chunk_size: int = 64 * 1024) -> Dict[str, Any]:
+    """
+    对流式响应（stream=True）做摘要，只需要元数据时读完<head>就关闭连接
+
+    Args:
+        response: 以 stream=True 发起请求得到的响应
+        metadata_only: 只提取元数据
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        摘要字典
+    """
+    try:
+        return summarize_chunks(iter_response_text(response, chunk_size), metadata_only)
+    finally:
+        response.close()
@@ -0,0 +1,260 @@
+"""
+性能分析
+同时记录cProfile的CPU profile和按固定间隔采样的调用栈（墙钟时间，包括等待网络、等待页面加载的时间），
+输出 .pstats 文件、折叠调用栈文件（flamegraph.pl、speedscope 可直接打开），
+并按工具箱模块汇总最耗时的函数，不用在Selenium和requests的内部调用里翻找
+
+各入口脚本都支持 --profile:
+    python fetch_quickshare.py --profile
+    python simple_html.py --profile --profile-dir profiles
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 工具箱模块所在目录，位于此目录下的文件按模块名汇总
+TOOLBOX_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 调用栈采样间隔（秒）
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+# 汇总中显示的函数数量
+DEFAULT_TOP = 15
+
+_LIBRARY_DIRS = sorted({
+    os.path.abspath(path) for path in (
+        sysconfig.get_paths().get('purelib'),
+        sysconfig.get_paths().get('platlib'),
+        sysconfig.get_paths().get('stdlib'),
+    ) if path
+}, key=len, reverse=True)
+
+
+def module_of(filename: str) -> Tuple[str, bool]:
+    """
+    根据源文件路径判断函数所属的模块
+
+    Returns:
+        (模块名, 是否为工具箱模块)；第三方库和标准库按顶层包名归类
+    """
+    if not filename or filename.startswith('<') or filename == '~':
+        return '(内置)', False
+    path = os.path.abspath(filename)
+    if os.path.dirname(path) == TOOLBOX_DIR:
+        return os.path.splitext(os.path.basename(path))[0], True
+    for library_dir in _LIBRARY_DIRS:
+        if path.startswith(library_dir + os.sep):
+            relative = path[len(library_dir) + 1:]
+            top = relative.split(os.sep)[0]
+            if top == 'site-packages':
+                top = relative.split(os.sep)[1]
+            return os.path.splitext(top)[0], False
+    return os.path.splitext(os.path.basename(path))[0], False
+
+
+class StackSampler:
+    """后台线程按固定间隔采样所有线程的调用栈，统计折叠调用栈"""
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._labels: Dict[object, str] = {}
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            module, _ = module_of(code.co_filename)
+            name = getattr(code, 'co_qualname', code.co_name)
+            label = f"{module}.{name}".replace(';', ':')
+            self._labels[code] = label
+        return label
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write_collapsed(self, path: str) -> None:
+        """写入折叠调用栈（每行 "帧1;帧2;...;帧n 次数"）"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """
+    同时进行CPU profile和调用栈采样
+
+    with Profiler('simple_html') as profiler:
+        main()
+    profiler.save()
+    profiler.print_summary()
+    """
+
+    def __init__(self, name: str = 'profile', output_dir: str = 'profiles',
+                 interval: float = DEFAULT_SAMPLE_INTERVAL):
+        """
+        Args:
+            name: 输出文件名前缀（一般为入口脚本名）
+            output_dir: 输出目录
+            interval: 调用栈采样间隔（秒）
+        """
+        self.name = name
+        self.output_dir = output_dir
+        self.profile = cProfile.Profile()
+        self.sampler = StackSampler(interval)
+        self.elapsed = 0.0
+        self._start = 0.0
+        self.paths: Dict[str, str] = {}
+
+    def start(self) -> None:
+        self._start = time.perf_counter()
+        self.sampler.start()
+        self.profile.enable()
+
+    def stop(self) -> None:
+        self.profile.disable()
+        self.sampler.stop()
+        self.elapsed = time.perf_counter() - self._start
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def save(self) -> Dict[str, str]:
+        """
+        写入分析结果
+
+        Returns:
+            {'pstats': CPU profile文件, 'collapsed': 折叠调用栈文件}
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, f"{self.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self.paths = {'pstats': prefix + '.pstats', 'collapsed': prefix + '.collapsed.txt'}
+        self.profile.dump_stats(self.paths['pstats'])
+        self.sampler.write_collapsed(self.paths['collapsed'])
+        return self.paths
+
+    def summarize(self, top: int = DEFAULT_TOP) -> Dict[str, List]:
+        """
+        汇总结果
+
+        Returns:
+            {'functions': 工具箱函数按累计CPU时间排序 [(模块, 函数, 调用次数, 自身时间, 累计时间)],
+             'modules': 各模块自身CPU时间 [(模块, 是否工具箱模块, 时间)],
+             'wall': 各工具箱函数占总墙钟时间的比例 [(模块.函数, 比例)]（多个线程时合计可超过100%）}
+        """
+        stats = pstats.Stats(self.profile)
+        functions = []
+        module_time: Dict[Tuple[str, bool], float] = defaultdict(float)
+        for (filename, line, func), (_, calls, self_time, cumulative, _) in stats.stats.items():
+            module, is_toolbox = module_of(filename)
+            if module == __name__:
+                # 分析器自身的函数不计入
+                continue
+            module_time[(module, is_toolbox)] += self_time
+            if is_toolbox:
+                functions.append((module, func, calls, self_time, cumulative))
+        functions.sort(key=lambda item: item[4], reverse=True)
+        modules = sorted(((m, t, sec) for (m, t), sec in module_time.items()), key=lambda item: item[2], reverse=True)
+
+        # 墙钟时间：每个样本归到调用栈中最深的工具箱函数（等待网络、sleep的时间也计入）
+        toolbox_prefixes = self._toolbox_prefixes()
+        wall: Counter = Counter()
+        total = self.sampler.samples
+        for stack, count in self.sampler.stacks.items():
+            frames = stack.split(';')
+            owner = next((frame for frame in reversed(frames) if frame.split('.', 1)[0] in toolbox_prefixes), None)
+            if owner is not None:
+                wall[owner] += count
+        return {
+            'functions': functions[:top],
+            'modules': modules[:top],
+            'wall': [(name, count / total) for name, count in wall.most_common(top)] if total else [],
+        }
+
+    @staticmethod
+    def _toolbox_prefixes() -> set:
+        names = {os.path.splitext(name)[0] for name in os.listdir(TOOLBOX_DIR) if name.endswith('.py')}
+        names.discard(__name__)
+        return names
+
+    def print_summary(self, top: int = 10) -> None:
+        summary = self.summarize(top)
+        print("\n" + "=" * 60)
+        print(f"性能分析 (总耗时 {self.elapsed:.2f} 秒，调用栈采样 {self.sampler.samples} 次)")
+        print("=" * 60)
+        print("\n工具箱函数 (按累计CPU时间):")
+        print(f"{'模块':<20} {'函数':<32} {'调用次数':>8} {'自身':>9} {'累计':>9}")
+        for module, func, calls, self_time, cumulative in summary['functions']:
+            print(f"{module:<20} {func:<32} {calls:>8} {self_time:>8.3f}s {cumulative:>8.3f}s")
+        print("\n各模块自身CPU时间:")
+        for module, is_toolbox, seconds in summary['modules']:
+            kind = '' if is_toolbox or module.startswith('(') else ' (外部)'
+            print(f"  {module + kind:<30} {seconds:>8.3f}s")
+        if summary['wall']:
+            print("\n墙钟时间分布 (含等待网络和页面加载):")
+            for name, share in summary['wall']:
+                print(f"  {name:<50} {share:>6.1%}")
+        if self.paths:
+            print(f"\nCPU profile: {self.paths['pstats']}  (python -m pstats 查看)")
+            print(f"折叠调用栈: {self.paths['collapsed']}  (flamegraph.pl 或 https://www.speedscope.app 打开)")
+
+
+def run_with_profiling(main: Callable[[], object], name: str, argv: List[str] = None):
+    """
+    入口脚本使用：命令行带 --profile 时在分析器中运行main，否则直接运行
+
+    --profile、--profile-dir、--profile-interval 会从 sys.argv 中移除，其余参数留给main
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--profile', action='store_true')
+    parser.add_argument('--profile-dir', default='profiles')
+    parser.add_argument('--profile-interval', type=float, default=DEFAULT_SAMPLE_INTERVAL)
+    args, remaining = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    if not args.profile:
+        return main()
+
+    sys.argv[1:] = remaining
+    profiler = Profiler(name, args.profile_dir, args.profile_interval)
+    print(f"⚙️  性能分析已开启，结果保存到: {os.path.abspath(args.profile_dir)}")
+    try:
+        with profiler:
+            return main()
+    finally:
+        profiler.save()
+        profiler.print_summary()
@@ -0,0 +1,317 @@
+"""
+另存码数据库
+用SQLite保存每次运行获取到的另存码（文章ID、标题、另存码、获取时间、运行批次），
+按文章ID和标题建立索引，查询某篇文章的最新另存码不需要翻遍历史JSON文件。
+页面上没有文章ID的记录article_id为NULL，这些文章按标题（多账号时加上账号）查询
+
+用法:
+    python quickshare_store.py import .                    # 导入目录下的 xiumi_quickshare_codes_*.json
+    python quickshare_store.py latest "文章标题"            # 查询最新另存码（也可以是文章ID）
+    python quickshare_store.py latest "文章标题" --account 编辑部   # 只查某个账号的另存码
+    python quickshare_store.py history "文章标题"           # 查询历史另存码
+    python quickshare_store.py search 关键词                # 按标题模糊搜索
+    python quickshare_store.py runs                         # 列出运行批次
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+from typing import Optional, Dict, List, Any, Iterable
+
+
+DEFAULT_STORE_PATH = os.environ.get(
+    'XIUMI_QUICKSHARE_DB',
+    os.path.join(os.path.expanduser('~'), '.xiumi_toolbox', 'quickshare.db')
+)
+
+# save_codes_to_file 生成的文件名
+JSON_FILE_PATTERN = 'xiumi_quickshare_codes_*.json'
+
+# 按文章ID或标题查询：两个条件各自走索引（SQLite把OR拆成两次索引查找）
+_KEY_CLAUSE = "(c.article_id = :key OR c.title = :key)"
+
+# 查询结果带上运行批次的账号
+_CODES_WITH_ACCOUNT = "SELECT c.*, r.account FROM codes c JOIN runs r ON r.id = c.run_id"
+
+
+def _account_clause(account: Optional[str], params: Dict[str, Any]) -> str:
+    """account不为None时只查询该账号的记录"""
+    if account is None:
+        return ''
+    params['account'] = account
+    return " AND r.account = :account"
+
+
+def new_run_id(started_at: datetime = None) -> str:
+    """运行批次ID：时间戳加随机后缀，按字符串排序即按时间排序"""
+    started_at = started_at or datetime.now()
+    return f"{started_at.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+class QuickShareStore:
+    """另存码数据库"""
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: 数据库文件路径，默认为 ~/.xiumi_toolbox/quickshare.db
+                  （可用环境变量 XIUMI_QUICKSHARE_DB 修改）
+        """
+        self.path = path or DEFAULT_STORE_PATH
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        self._init_db()
+
+    def _init_db(self):
+        """初始化表和索引"""
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id TEXT PRIMARY KEY,
+                started_at TEXT NOT NULL,
+                account TEXT,
+                source TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS codes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL REFERENCES runs(id),
+                article_id TEXT,
+                title TEXT NOT NULL,
+                code TEXT NOT NULL,
+                fetched_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_codes_article_time ON codes(article_id, fetched_at);
+            CREATE INDEX IF NOT EXISTS idx_codes_title_time ON codes(title, fetched_at);
+            CREATE INDEX IF NOT EXISTS idx_codes_run ON codes(run_id);
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_runs_source ON runs(source) WHERE source LIKE 'file:%';
+        """)
+        # 旧版本在页面没有文章ID时记录的是列表位置（article_0、article_1……），不是真正的ID
+        self.db.execute("UPDATE codes SET article_id = NULL WHERE article_id GLOB 'article_[0-9]*'")
+        self.db.commit()
+
+    def add_run(self, records: Iterable[Dict[str, Any]], account: str = None, source: str = 'fetch',
+                started_at: datetime = None, run_id: str = None) -> str:
+        """
+        保存一次运行获取到的另存码
+
+        Args:
+            records: [{'title', 'code', 'article_id'(可选，没有真正的文章ID时为None), 'fetched_at'(可选，默认为运行开始时间)}]
+            account: 账号名称（多账号时区分来源）
+            source: 来源，'fetch' 表示抓取，导入的文件为 'file:<路径>'
+            started_at: 运行开始时间，默认为现在
+            run_id: 运行批次ID，默认自动生成
+
+        Returns:
+            运行批次ID
+        """
+        started_at = started_at or datetime.now()
+        run_id = run_id or new_run_id(started_at)
+        default_time = started_at.isoformat(timespec='seconds')
+        with self.db:
+            self.db.execute(
+                "INSERT INTO runs (id, started_at, account, source) VALUES (?, ?, ?, ?)",
+                (run_id, default_time, account, source)
+            )
+            self.db.executemany(
+                "INSERT INTO codes (run_id, article_id, title, code, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, r.get('article_id'), r['title'], r['code'], r.get('fetched_at') or default_time)
+                 for r in records]
+            )
+        return run_id
+
+    def import_json(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        导入 save_codes_to_file 生成的JSON文件（同一个文件只导入一次）
+
+        Returns:
+            {'run_id', 'count'}，文件已经导入过时返回None
+        """
+        source = f"file:{os.path.abspath(path)}"
+        if self.db.execute("SELECT 1 FROM runs WHERE source = ?", (source,)).fetchone():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        timestamp = data.get('timestamp')
+        started_at = datetime.fromisoformat(timestamp) if timestamp else \
+            datetime.fromtimestamp(os.path.getmtime(path))
+        codes = data.get('codes', {})
+        if isinstance(codes, dict):
+            records = [{'title': title, 'code': code} for title, code in codes.items()]
+        else:
+            # 列表格式：[{'title', 'code', 'article_id', 'fetched_at'}]
+            records = codes
+        run_id = self.add_run(records, account=data.get('account'), source=source, started_at=started_at)
+        return {'run_id': run_id, 'count': len(records)}
+
+    def import_paths(self, paths: Iterable[str]) -> Dict[str, int]:
+        """
+        导入文件或目录（目录中按 xiumi_quickshare_codes_*.json 查找）
+
+        Returns:
+            {'files': 导入的文件数, 'skipped': 已导入过的文件数, 'codes': 导入的另存码数, 'errors': 出错的文件数}
+        """
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                files.extend(sorted(glob.glob(os.path.join(path, JSON_FILE_PATTERN))))
+            else:
+                files.append(path)
+
+        result = {'files': 0, 'skipped': 0, 'codes': 0, 'errors': 0}
+        for path in files:
+            try:
+                imported = self.import_json(path)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"✗ 导入失败 {path}: {e}")
+                result['errors'] += 1
+                continue
+            if imported is None:
+                result['skipped'] += 1
+            else:
+                result['files'] += 1
+                result['codes'] += imported['count']
+        return result
+
+    def latest(self, key: str, account: str = None) -> Optional[Dict[str, Any]]:
+        """按文章ID或标题（可限定账号）查询最新的另存码"""
+        params: Dict[str, Any] = {'key': key}
+        row = self.db.execute(
+            f"{_CODES_WITH_ACCOUNT} WHERE {_KEY_CLAUSE}{_account_clause(account, params)} "
+            "ORDER BY c.fetched_at DESC, c.id DESC LIMIT 1",
+            params
+        ).fetchone()
+        return dict(row) if row else None
+
+    def history(self, key: str, limit: int = None, account: str = None) -> List[Dict[str, Any]]:
+        """按文章ID或标题（可限定账号）查询历史另存码（最新的在前）"""
+        params: Dict[str, Any] = {'key': key}
+        sql = (f"{_CODES_WITH_ACCOUNT} WHERE {_KEY_CLAUSE}{_account_clause(account, params)} "
+               "ORDER BY c.fetched_at DESC, c.id DESC")
+        if limit:
+            sql += " LIMIT :limit"
+            params['limit'] = limit
+        return [dict(row) for row in self.db.execute(sql, params)]
+
+    def search(self, term: str, limit: int = 50, account: str = None) -> List[Dict[str, Any]]:
+        """按标题模糊搜索，每个账号的每篇文章（按标题区分）只返回最新的另存码"""
+        params: Dict[str, Any] = {
+            'pattern': '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%',
+            'limit': limit,
+        }
+        rows = self.db.execute(f"""
+            SELECT id, run_id, article_id, title, code, fetched_at, account FROM (
+                SELECT c.*, r.account, ROW_NUMBER() OVER (
+                    PARTITION BY r.account, c.title ORDER BY c.fetched_at DESC, c.id DESC) AS n
+                FROM codes c JOIN runs r ON r.id = c.run_id
+                WHERE c.title LIKE :pattern ESCAPE '\\'{_account_clause(account, params)}
+            ) WHERE n = 1 ORDER BY title, account LIMIT :limit
+        """, params)
+        return [dict(row) for row in rows]
+
+    def run_codes(self, run_id: str) -> List[Dict[str, Any]]:
+        """某次运行获取到的全部另存码"""
+        rows = self.db.execute("SELECT * FROM codes WHERE run_id = ? ORDER BY id", (run_id,))
+        return [dict(row) for row in rows]
+
+    def runs(self, limit: int = None) -> List[Dict[str, Any]]:
+        """运行批次列表（最新的在前），包含每批的另存码数量"""
+        sql = """
+            SELECT r.*, COUNT(c.id) AS count FROM runs r
+            LEFT JOIN codes c ON c.run_id = r.id
+            GROUP BY r.id ORDER BY r.started_at DESC, r.id DESC
+        """
+        params = ()
+        if limit:
+            sql += " LIMIT ?"
+            params = (limit,)
+        return [dict(row) for row in self.db.execute(sql, params)]
+
+    def stats(self) -> Dict[str, int]:
+        row = self.db.execute("""
+            SELECT (SELECT COUNT(*) FROM runs) AS runs,
+                   (SELECT COUNT(*) FROM codes) AS codes,
+                   (SELECT COUNT(DISTINCT title) FROM codes) AS titles
+        """).fetchone()
+        return dict(row)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _print_codes(rows: List[Dict[str, Any]]) -> None:
+    for row in rows:
+        article = f" [{row['article_id']}]" if row.get('article_id') else ''
+        account = f"  账号: {row['account']}" if row.get('account') else ''
+        print(f"{row['fetched_at']}  {row['title']}{article}{account}")
+        print(f"    另存码: {row['code']}  (运行批次 {row['run_id']})")
+
+
+def main(argv: List[str] = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="另存码数据库：导入历史JSON文件并查询另存码")
+    parser.add_argument("--db", default=DEFAULT_STORE_PATH, help=f"数据库文件 (默认: {DEFAULT_STORE_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="导入 save_codes_to_file 生成的JSON文件")
+    import_parser.add_argument("paths", nargs="*", default=["."], help="文件或目录 (默认: 当前目录)")
+    latest_parser = commands.add_parser("latest", help="查询文章的最新另存码")
+    latest_parser.add_argument("key", help="文章标题或ID")
+    latest_parser.add_argument("--account", help="只查询这个账号的另存码")
+    history_parser = commands.add_parser("history", help="查询文章的历史另存码")
+    history_parser.add_argument("key", help="文章标题或ID")
+    history_parser.add_argument("--limit", type=int, default=20, help="最多显示的记录数 (默认: 20)")
+    history_parser.add_argument("--account", help="只查询这个账号的另存码")
+    search_parser = commands.add_parser("search", help="按标题模糊搜索")
+    search_parser.add_argument("term", help="标题关键词")
+    search_parser.add_argument("--limit", type=int, default=50, help="最多显示的文章数 (默认: 50)")
+    search_parser.add_argument("--account", help="只搜索这个账号的另存码")
+    runs_parser = commands.add_parser("runs", help="列出运行批次")
+    runs_parser.add_argument("--limit", type=int, default=20, help="最多显示的批次数 (默认: 20)")
+    commands.add_parser("stats", help="统计信息")
+    args = parser.parse_args(argv)
+
+    with QuickShareStore(args.db) as store:
+        if args.command == "import":
+            result = store.import_paths(args.paths)
+            print(f"✓ 导入 {result['files']} 个文件，{result['codes']} 个另存码"
+                  f"（跳过已导入的 {result['skipped']} 个文件，失败 {result['errors']} 个）")
+        elif args.command == "latest":
+            row = store.latest(args.key, args.account)
+            if row:
+                _print_codes([row])
+            else:
+                print(f"❌ 没有找到: {args.key}")
+        elif args.command == "history":
+            rows = store.history(args.key, args.limit, args.account)
+            if rows:
+                _print_codes(rows)
+            else:
+                print(f"❌ 没有找到: {args.key}")
+        elif args.command == "search":
+            rows = store.search(args.term, args.limit, args.account)
+            print(f"找到 {len(rows)} 篇文章")
+            _print_codes(rows)
+        elif args.command == "runs":
+            for run in store.runs(args.limit):
+                account = f"  账号: {run['account']}" if run['account'] else ''
+                print(f"{run['id']}  {run['started_at']}  {run['count']:>5} 个另存码  {run['source']}{account}")
+        elif args.command == "stats":
+            stats = store.stats()
+            print(f"运行批次: {stats['runs']}  另存码: {stats['codes']}  文章标题: {stats['titles']}")
+            print(f"数据库: {os.path.abspath(args.db)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+请求限速
+按主机的令牌桶限速器，线程和asyncio通用。所有HTTP工具和Selenium抓取器共用一个默认实例，
+在不给秀米服务器造成压力的前提下尽量快地发请求，代替固定的 time.sleep
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# 未单独设置的主机的默认限速：每秒请求数（None表示不限速）和突发请求数
+# 默认只限制下面配置的主机；需要对所有主机统一限速时，创建 RateLimiter(default_rate=...)
+# 传给 HttpTransport / AsyncWebAccess 等，或对默认限速器调用 set_default_limit
+DEFAULT_RATE = None
+DEFAULT_BURST = 20
+
+# 秀米相关主机（含子域名）的限速
+DEFAULT_HOST_LIMITS = {
+    'xiumi.us': (2.0, 5),
+}
+
+
+class TokenBucket:
+    """令牌桶：以rate个/秒的速度补充令牌，最多积攒burst个"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, now: float = None) -> float:
+        """
+        预订一个令牌
+
+        令牌不足时令牌数记为负数（相当于排队），后来的请求等待更久
+
+        Returns:
+            需要等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic() if now is None else now
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class RateLimiter:
+    """按主机限速的令牌桶集合"""
+
+    def __init__(self, default_rate: Optional[float] = DEFAULT_RATE, default_burst: int = DEFAULT_BURST,
+                 host_limits: Dict[str, Tuple[float, int]] = None):
+        """
+        Args:
+            default_rate: 未单独设置的主机每秒最多请求数，None（默认）表示不限速
+            default_burst: 未单独设置的主机允许的突发请求数
+            host_limits: 按主机设置 (每秒请求数, 突发请求数)，同时作用于子域名，
+                         默认对 xiumi.us 使用 DEFAULT_HOST_LIMITS
+        """
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.host_limits = dict(DEFAULT_HOST_LIMITS if host_limits is None else host_limits)
+        self.waits = 0
+        self.total_wait = 0.0
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def set_limit(self, host: str, rate: Optional[float], burst: int = 1) -> None:
+        """设置主机（含子域名）的限速，rate为None表示不限速"""
+        with self._lock:
+            self.host_limits[host.lower()] = (rate, burst)
+            # 已经创建的桶按新配置重建
+            self._buckets.clear()
+
+    def set_default_limit(self, rate: Optional[float], burst: int = DEFAULT_BURST) -> None:
+        """设置未单独配置的主机的限速，rate为None表示不限速"""
+        with self._lock:
+            self.default_rate = rate
+            self.default_burst = burst
+            self._buckets.clear()
+
+    def _limit_key(self, host: str) -> Tuple[str, Optional[float], int]:
+        """找到主机适用的限速配置：先查主机本身，再逐级查上级域名"""
+        parts = host.split('.')
+        for i in range(len(parts)):
+            domain = '.'.join(parts[i:])
+            if domain in self.host_limits:
+                rate, burst = self.host_limits[domain]
+                return domain, rate, burst
+        return host, self.default_rate, self.default_burst
+
+    def _bucket(self, url: str) -> Optional[TokenBucket]:
+        host = (urlsplit(url).hostname or '').lower()
+        with self._lock:
+            if host in self._buckets:
+                return self._buckets[host]
+            key, rate, burst = self._limit_key(host)
+            # 同一个配置域名下的主机共用一个桶
+            bucket = self._buckets.get('=' + key)
+            if bucket is None and rate:
+                bucket = TokenBucket(rate, burst)
+                self._buckets['=' + key] = bucket
+            self._buckets[host] = bucket
+            return bucket
+
+    def reserve(self, url: str) -> float:
+        """为访问url预订一个令牌，返回需要等待的秒数"""
+        bucket = self._bucket(url)
+        if bucket is None:
+            return 0.0
+        wait = bucket.reserve()
+        if wait:
+            with self._lock:
+                self.waits += 1
+                self.total_wait += wait
+        return wait
+
+    def acquire(self, url: str) -> float:
+        """等待到可以访问url（阻塞当前线程），返回等待的秒数"""
+        wait = self.reserve(url)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, url: str) -> float:
+        """asyncio版本的 acquire，等待期间不阻塞事件循环"""
+        wait = self.reserve(url)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {'waits': self.waits, 'total_wait': self.total_wait}
+
+
+class RateLimitedRetry(Retry):
+    """
+    urllib3在一次 send() 内部重试时，每次重试前也向限速器取令牌
+
+    Retry-After和退避等待之后再取令牌，重试请求和普通请求一样计入主机的限速
+    """
+
+    def __init__(self, *args, rate_limiter: RateLimiter = None, **kwargs):
+        self.rate_limiter = rate_limiter
+        # 下一次重试要访问的URL，由 increment 记录
+        self.next_url: Optional[str] = None
+        super().__init__(*args, **kwargs)
+
+    def new(self, **kw) -> 'RateLimitedRetry':
+        kw.setdefault('rate_limiter', self.rate_limiter)
+        return super().new(**kw)
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        new_retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        if _pool is not None and url:
+            netloc = f"{_pool.host}:{_pool.port}" if _pool.port else _pool.host
+            new_retry.next_url = f"{_pool.scheme}://{netloc}{url}"
+        return new_retry
+
+    def sleep(self, response=None) -> None:
+        super().sleep(response)
+        if self.rate_limiter is not None and self.next_url:
+            self.rate_limiter.acquire(self.next_url)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    发出每个请求（包括重定向后的请求）前先向限速器取令牌的传输适配器
+
+    max_retries 为 RateLimitedRetry 且没有指定限速器时使用本适配器的限速器，
+    urllib3内部的每次重试也会取令牌
+    """
+
+    def __init__(self, rate_limiter: RateLimiter = None, **kwargs):
+        self.rate_limiter = rate_limiter
+        super().__init__(**kwargs)
+        if isinstance(self.max_retries, RateLimitedRetry) and self.max_retries.rate_limiter is None:
+            self.max_retries = self.max_retries.new(rate_limiter=rate_limiter)
+
+    def send(self, request, *args, **kwargs):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(request.url)
+        return super().send(request, *args, **kwargs)
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def get_default_limiter() -> RateLimiter:
+    """获取所有工具共用的默认限速器"""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
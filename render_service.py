@@ -0,0 +1,322 @@
+"""
+无头浏览器渲染服务
+维护一个预热好的无头浏览器池，按需租用浏览器加载页面，等待网络空闲后返回渲染后的DOM
+"""
+
+import atexit
+import json
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, List
+from urllib.parse import urlparse
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.edge.service import Service as EdgeService
+from selenium.common.exceptions import WebDriverException
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.microsoft import EdgeChromiumDriverManager
+
+from rate_limiter import get_default_limiter
+
+
+# 页面加载完成后，资源请求数保持不变多长时间视为网络空闲
+NETWORK_IDLE_SECONDS = 0.5
+
+# 资源计时缓冲区大小（浏览器默认250条，写满后不再增长，资源多的页面会被误判为空闲）
+RESOURCE_BUFFER_SIZE = 100000
+
+_RESOURCE_BUFFER_SCRIPT = f"performance.setResourceTimingBufferSize({RESOURCE_BUFFER_SIZE});"
+
+# 已加载完成时返回资源请求数，否则返回-1
+_RESOURCE_COUNT_SCRIPT = (
+    _RESOURCE_BUFFER_SCRIPT +
+    "return document.readyState === 'complete' "
+    "? performance.getEntriesByType('resource').length : -1;"
+)
+
+
+def create_headless_driver(browser: str = "chrome", browser_path: str = None):
+    """
+    创建一个无头浏览器驱动
+
+    Args:
+        browser: 浏览器类型 ("chrome" 或 "edge")
+        browser_path: 浏览器可执行文件路径
+
+    Returns:
+        WebDriver实例
+    """
+    if browser.lower() == "edge":
+        options = webdriver.EdgeOptions()
+    else:
+        options = webdriver.ChromeOptions()
+
+    options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_argument('--window-size=1920,1080')
+    # 开启performance日志，用其中的Network事件统计尚未完成的请求
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    options.set_capability('ms:loggingPrefs', {'performance': 'ALL'})
+    if browser_path:
+        options.binary_location = browser_path
+
+    if browser.lower() == "edge":
+        try:
+            service = EdgeService(EdgeChromiumDriverManager().install())
+        except Exception:
+            service = EdgeService()
+        return webdriver.Edge(service=service, options=options)
+
+    try:
+        service = ChromeService(ChromeDriverManager().install())
+    except Exception:
+        service = ChromeService()
+    return webdriver.Chrome(service=service, options=options)
+
+
+def set_driver_cookies(driver, url: str, cookies: Dict[str, str]) -> None:
+    """
+    通过DevTools协议直接写入Cookie，不需要先打开目标域名的页面
+
+    Args:
+        driver: WebDriver实例
+        url: 目标URL，用于确定Cookie所属域名
+        cookies: Cookie字典
+    """
+    parsed = urlparse(url)
+    domain = parsed.hostname or ''
+    # xiumi.us 的Cookie对所有子域名生效
+    if domain.endswith('xiumi.us'):
+        domain = '.xiumi.us'
+    for name, value in cookies.items():
+        driver.execute_cdp_cmd('Network.setCookie', {
+            'name': name,
+            'value': value,
+            'domain': domain,
+            'path': '/',
+            'secure': parsed.scheme == 'https',
+        })
+
+
+class NetworkTracker:
+    """从performance日志的Network事件中统计尚未完成的请求"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pending = set()
+        self.available = True
+
+    def update(self) -> None:
+        """读取新的日志条目（驱动不支持performance日志时 available 变为False）"""
+        if not self.available:
+            return
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception:
+            self.available = False
+            return
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, TypeError, ValueError):
+                continue
+            method = message.get('method')
+            request_id = message.get('params', {}).get('requestId')
+            if method == 'Network.requestWillBeSent':
+                self.pending.add(request_id)
+            elif method in ('Network.loadingFinished', 'Network.loadingFailed'):
+                self.pending.discard(request_id)
+
+    def reset(self) -> None:
+        """丢弃之前页面的日志，加载新页面前调用"""
+        self.update()
+        self.pending.clear()
+
+
+def wait_for_network_idle(driver, timeout: float = 30, idle_seconds: float = NETWORK_IDLE_SECONDS,
+                          tracker: NetworkTracker = None) -> bool:
+    """
+    等待页面加载完成、没有进行中的请求，且一段时间内没有新的资源请求
+
+    Args:
+        driver: WebDriver实例
+        timeout: 最长等待时间（秒）
+        idle_seconds: 保持空闲多久视为网络空闲
+        tracker: 统计进行中请求的NetworkTracker，None时只根据资源请求数判断
+
+    Returns:
+        是否在超时前达到空闲
+    """
+    deadline = time.time() + timeout
+    last_count = None
+    stable_since = time.time()
+    while time.time() < deadline:
+        count = driver.execute_script(_RESOURCE_COUNT_SCRIPT)
+        in_flight = 0
+        if tracker is not None:
+            tracker.update()
+            in_flight = len(tracker.pending)
+        now = time.time()
+        if count != last_count or count < 0 or in_flight:
+            last_count = count
+            stable_since = now
+        elif now - stable_since >= idle_seconds:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+class BrowserPool:
+    """预热的无头浏览器池"""
+
+    def __init__(self, size: int = 2, browser: str = "chrome", browser_path: str = None):
+        """
+        Args:
+            size: 浏览器实例数量
+            browser: 浏览器类型 ("chrome" 或 "edge")
+            browser_path: 浏览器可执行文件路径
+        """
+        self.size = size
+        self.browser = browser
+        self.browser_path = browser_path
+        self._idle: "queue.Queue" = queue.Queue()
+        self._drivers: List = []
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self) -> None:
+        """启动并预热所有浏览器实例"""
+        with self._lock:
+            if self._started:
+                return
+            print(f"正在预热 {self.size} 个无头{self.browser.upper()}浏览器...")
+            for _ in range(self.size):
+                driver = self._new_driver()
+                self._idle.put(driver)
+            self._started = True
+            print("✓ 浏览器池已就绪")
+
+    def _new_driver(self):
+        driver = create_headless_driver(self.browser, self.browser_path)
+        try:
+            # 每个新页面在加载资源之前就扩大资源计时缓冲区
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': _RESOURCE_BUFFER_SCRIPT})
+        except Exception:
+            pass
+        driver.get('about:blank')
+        self._drivers.append(driver)
+        return driver
+
+    def _discard(self, driver) -> None:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        if driver in self._drivers:
+            self._drivers.remove(driver)
+
+    @staticmethod
+    def _is_alive(driver) -> bool:
+        try:
+            driver.execute_script("return 1;")
+            return True
+        except WebDriverException:
+            return False
+
+    @contextmanager
+    def lease(self, timeout: float = None):
+        """
+        租用一个浏览器，用完自动归还
+
+        Args:
+            timeout: 等待空闲浏览器的超时时间（秒），None表示一直等待
+        """
+        self.start()
+        # 空位上可能是None（之前创建浏览器失败），此时在这里重新创建
+        driver = self._idle.get(timeout=timeout)
+        try:
+            if driver is not None and not self._is_alive(driver):
+                print("⚠️  浏览器实例已失效，正在替换...")
+                self._discard(driver)
+                driver = None
+            if driver is None:
+                driver = self._new_driver()
+        except Exception:
+            # 创建失败时归还空位，池的容量不变
+            self._idle.put(None)
+            raise
+
+        healthy = True
+        try:
+            yield driver
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            if healthy:
+                try:
+                    # 离开当前页面，释放页面占用的内存；清除本次写入的Cookie，下一个租用者不会带上别人的登录状态
+                    driver.get('about:blank')
+                    driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+                except WebDriverException:
+                    healthy = False
+            if not healthy:
+                self._discard(driver)
+                try:
+                    driver = self._new_driver()
+                except Exception as e:
+                    print(f"⚠️  替换浏览器实例失败，下次租用时重试: {e}")
+                    driver = None
+            self._idle.put(driver)
+
+    def render(self, url: str, cookies: Dict[str, str] = None, timeout: float = 30) -> str:
+        """
+        租用浏览器渲染页面
+
+        Args:
+            url: 网页URL
+            cookies: Cookie字典
+            timeout: 页面加载超时时间（秒）
+
+        Returns:
+            渲染后的页面HTML
+        """
+        with self.lease() as driver:
+            driver.set_page_load_timeout(timeout)
+            if cookies:
+                set_driver_cookies(driver, url, cookies)
+            tracker = NetworkTracker(driver)
+            tracker.reset()
+            get_default_limiter().acquire(url)
+            driver.get(url)
+            if not wait_for_network_idle(driver, timeout=timeout, tracker=tracker):
+                print("⚠️  等待网络空闲超时，返回当前DOM")
+            return driver.page_source
+
+    def close(self) -> None:
+        """关闭所有浏览器实例"""
+        with self._lock:
+            for driver in list(self._drivers):
+                self._discard(driver)
+            self._idle = queue.Queue()
+            self._started = False
+
+
+_default_pool: Optional[BrowserPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool(size: int = 2, browser: str = "chrome") -> BrowserPool:
+    """获取进程内共享的浏览器池（首次调用时创建，进程退出时关闭）"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = BrowserPool(size=size, browser=browser)
+            atexit.register(_default_pool.close)
+        return _default_pool
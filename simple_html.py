@@ -3,17 +3,31 @@
 获取整个页面源码保存到列表，支持Cookie
 """
 
-import requests
 import json
 import os
 import time
 from datetime import datetime
 
+from requests.cookies import RequestsCookieJar
+
+from cookie_vault import CookieVault, DEFAULT_DOMAIN
+from http_transport import get_shared_transport
+from page_archive import PageArchive
+from page_lines import PageLines
+
 
 def get_xiumi_cookies():
     """
     获取秀米Cookie的便捷方式
     """
+    # 优先使用保管库中登录后保存的Cookie
+    vault = CookieVault()
+    if vault.has_login():
+        use_vault = input(f"检测到Cookie保管库中有 {len(vault.valid_cookies())} 个有效Cookie，是否使用? (y/n，默认y): ").strip().lower()
+        if use_vault in ['', 'y', 'yes']:
+            print("✓ 使用Cookie保管库")
+            return vault.as_dict()
+    
     print("请选择Cookie输入方式:")
     print("1. 使用已知的秀米Cookie")
     print("2. 手动输入完整Cookie字符串")
@@ -35,6 +49,10 @@ def get_xiumi_cookies():
     elif choice == '2':
         cookie_str = input("请粘贴Cookie字符串: ").strip()
         if cookie_str:
+            save = input("是否保存到Cookie保管库供其他工具使用? (y/n): ").strip().lower()
+            if save in ['y', 'yes']:
+                vault.store_dict(cookie_dict(cookie_str))
+                print(f"✓ 已保存到: {vault.path}")
             return cookie_str
         return None
     
@@ -42,55 +60,90 @@ def get_xiumi_cookies():
         return None
 
 
-def get_full_page_lines_with_cookies(url: str, cookies=None, wait_seconds=5) -> tuple:
+def cookie_dict(cookies) -> dict:
     """
-    获取整个页面的所有行，支持Cookie和等待时间
+    把Cookie字典或Cookie字符串统一转换成字典
+    
+    Args:
+        cookies: Cookie字典或 "name=value; name2=value2" 形式的字符串
+        
+    Returns:
+        Cookie字典
+    """
+    if not cookies:
+        return {}
+    if isinstance(cookies, dict):
+        return dict(cookies)
+    
+    # 解析Cookie字符串
+    result = {}
+    for cookie in cookies.split(';'):
+        if '=' in cookie:
+            name, value = cookie.strip().split('=', 1)
+            result[name] = value
+    return result
+
+
+def get_rendered_page_lines(url: str, cookies=None, pool=None) -> tuple:
+    """
+    用无头浏览器渲染页面后获取所有行（适用于JavaScript动态生成的页面）
     
     Args:
         url: 网页URL
         cookies: Cookie字典或字符串
-        wait_seconds: 等待秒数，让页面加载完成
+        pool: 浏览器池，默认使用进程内共享的浏览器池
         
     Returns:
-        包含所有HTML行的列表和完整HTML内容
+        按行访问的页面对象和完整HTML内容（同一个PageLines对象）
     """
     try:
-        # 创建session
-        session = requests.Session()
+        from render_service import get_default_pool
         
-        # 设置headers
-        session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edge/120.0.0.0',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Referer': 'https://xiumi.us/',
-        })
+        pool = pool or get_default_pool()
+        print(f"正在渲染: {url}")
+        html = pool.render(url, cookie_dict(cookies))
+        print(f"✓ 渲染完成，页面大小: {len(html)} 字符")
+        page = PageLines.from_text(html)
+        return page, page
         
-        # 设置Cookie
-        if cookies:
-            if isinstance(cookies, dict):
-                for name, value in cookies.items():
-                    session.cookies.set(name, value, domain='xiumi.us')
-            elif isinstance(cookies, str):
-                # 解析Cookie字符串
-                for cookie in cookies.split(';'):
-                    if '=' in cookie:
-                        name, value = cookie.strip().split('=', 1)
-                        session.cookies.set(name, value, domain='xiumi.us')
+    except Exception as e:
+        return [f"错误：{e}"], None
+
+
+def get_full_page_lines_with_cookies(url: str, cookies=None, wait_seconds=5, render: bool = False) -> tuple:
+    """
+    获取整个页面的所有行，支持Cookie和等待时间
+    
+    Args:
+        url: 网页URL
+        cookies: Cookie字典或字符串
+        wait_seconds: 等待秒数后重新请求一次（普通请求不会执行页面中的JavaScript）
+        render: 是否使用无头浏览器渲染动态内容，为True时忽略wait_seconds
+        
+    Returns:
+        按行访问的页面对象和完整HTML内容。两者是同一个PageLines对象：
+        只保存一份原始字节，按行访问时才切分解码，str(page) 得到完整HTML
+    """
+    if render:
+        return get_rendered_page_lines(url, cookies)
+    
+    try:
+        # 使用共用的传输层（连接池、Cookie、限速和请求统计与其他工具一致），按浏览器的请求头访问
+        transport = get_shared_transport()
+        
+        # 本次传入的Cookie只随本次请求发送，不写入共用会话的Cookie；
+        # 限定秀米域名，其他主机（包括重定向后的目标）收不到
+        request_cookies = RequestsCookieJar()
+        for name, value in cookie_dict(cookies).items():
+            request_cookies.set(name, value, domain=DEFAULT_DOMAIN)
         
         print(f"正在请求: {url}")
-        if cookies:
+        if request_cookies:
             print("✓ 使用最新Cookie访问")
-            print(f"✓ Cookie数量: {len(session.cookies)}")
+            print(f"✓ Cookie数量: {len(request_cookies)}")
         
         # 发起请求
-        response = session.get(url, timeout=30)
+        response = transport.get(url, profile='browser', cookies=request_cookies)
         
         # 等待页面加载（对于动态内容）
         if wait_seconds > 0:
@@ -98,21 +151,21 @@ def get_full_page_lines_with_cookies(url: str, cookies=None, wait_seconds=5) ->
             time.sleep(wait_seconds)
             
             # 可能需要再次请求获取动态加载的内容
-            response = session.get(url, timeout=30)
+            response = transport.get(url, profile='browser', cookies=request_cookies)
         
         if response.status_code == 200:
             print(f"✓ 访问成功，状态码: {response.status_code}")
-            print(f"✓ 响应大小: {len(response.text)} 字符")
+            page = PageLines.from_response(response)
+            print(f"✓ 响应大小: {page.nbytes} 字节")
             
             # 检查是否有登录状态
-            if 'login' in response.text.lower() or '登录' in response.text:
+            if page.contains('login') or page.contains('登录'):
                 print("⚠️  页面可能包含登录相关内容")
-            if 'user' in response.text.lower() or '用户' in response.text:
+            if page.contains('user') or page.contains('用户'):
                 print("✓ 页面可能包含用户相关内容")
                 
-            # 获取整个页面，按行分割成列表
-            all_lines = response.text.splitlines()
-            return all_lines, response.text  # 返回行列表和完整HTML
+            # 整个页面只保存一份，按行访问时再切分
+            return page, page
         else:
             return [f"错误：状态码 {response.status_code}"], None
             
@@ -120,7 +173,7 @@ def get_full_page_lines_with_cookies(url: str, cookies=None, wait_seconds=5) ->
         return [f"错误：{e}"], None
 
 
-def save_html_file(html_content: str, url: str, save_dir: str = "saved_pages"):
+def save_html_file(html_content: str, url: str, save_dir: str = "saved_pages", archive: bool = False):
     """
     保存HTML内容到文件（原样保存）
     
@@ -128,10 +181,14 @@ def save_html_file(html_content: str, url: str, save_dir: str = "saved_pages"):
         html_content: HTML内容
         url: 原始URL
         save_dir: 保存目录
+        archive: 是否存入压缩归档（按内容去重），而不是单独写一个HTML文件
         
     Returns:
         保存的文件路径
     """
+    if archive:
+        return archive_html_page(html_content, url, save_dir)
+    
     try:
         # 创建保存目录
         if not os.path.exists(save_dir):
@@ -143,12 +200,16 @@ def save_html_file(html_content: str, url: str, save_dir: str = "saved_pages"):
         filename = f"xiumi_page_{timestamp}_{safe_url}.html"
         filepath = os.path.join(save_dir, filename)
         
-        # 原样保存HTML文件
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        # 原样保存HTML文件（PageLines直接写入字节，不再解码成字符串）
+        if isinstance(html_content, PageLines):
+            data = bytes(html_content)
+        else:
+            data = html_content.encode('utf-8')
+        with open(filepath, 'wb') as f:
+            f.write(data)
         
         print(f"✓ HTML文件已保存: {filepath}")
-        print(f"✓ 文件大小: {len(html_content)} 字符")
+        print(f"✓ 文件大小: {len(data)} 字节")
         return filepath
         
     except Exception as e:
@@ -156,6 +217,34 @@ def save_html_file(html_content: str, url: str, save_dir: str = "saved_pages"):
         return None
 
 
+def archive_html_page(html_content: str, url: str, save_dir: str = "saved_pages"):
+    """
+    把HTML内容存入页面归档（内容相同的页面只保存一份）
+    
+    Args:
+        html_content: HTML内容
+        url: 原始URL
+        save_dir: 保存目录，归档位于其下的 archive 子目录
+        
+    Returns:
+        归档对象文件路径
+    """
+    try:
+        with PageArchive(os.path.join(save_dir, "archive")) as page_archive:
+            record = page_archive.put(url, html_content)
+        
+        if record['deduplicated']:
+            print(f"✓ 页面内容未变化，复用已有归档: {record['digest'][:12]}")
+        else:
+            print(f"✓ 页面已归档: {record['path']}")
+            print(f"✓ 压缩后大小: {record['stored_size']} / {record['size']} 字节")
+        return record['path']
+        
+    except Exception as e:
+        print(f"归档HTML失败: {e}")
+        return None
+
+
 def save_search_results(search_results: list, search_term: str, save_dir: str = "saved_pages"):
     """
     保存搜索结果到HTML文件
@@ -240,10 +329,14 @@ def save_search_results(search_results: list, search_term: str, save_dir: str =
 
 def search_in_page(page_lines: list, search_term: str):
     """在页面中搜索关键词"""
-    matches = []
-    for line_num, line in enumerate(page_lines, 1):
-        if search_term.lower() in line.lower():
-            matches.append((line_num, line.strip()))
+    if isinstance(page_lines, PageLines):
+        # 直接在原始字节上搜索，只解码命中的行
+        matches = page_lines.search(search_term)
+    else:
+        matches = []
+        for line_num, line in enumerate(page_lines, 1):
+            if search_term.lower() in line.lower():
+                matches.append((line_num, line.strip()))
     
     if matches:
         print(f"\n🎯 找到 {len(matches)} 个匹配结果:")
@@ -279,18 +372,29 @@ def main():
     if not url:
         return
     
-    # 设置等待时间
-    wait_time = input("\n请输入等待时间(秒，默认5秒): ").strip()
-    try:
-        wait_seconds = int(wait_time) if wait_time else 5
-    except ValueError:
-        wait_seconds = 5
+    # 选择获取方式
+    print("\n请选择获取方式:")
+    print("1. 直接请求 (静态页面)")
+    print("2. 无头浏览器渲染 (动态页面)")
+    render = input("请选择 (1/2，默认1): ").strip() == '2'
+    
+    wait_seconds = 0
+    if not render:
+        # 设置等待时间
+        wait_time = input("\n请输入等待时间(秒，默认5秒): ").strip()
+        try:
+            wait_seconds = int(wait_time) if wait_time else 5
+        except ValueError:
+            wait_seconds = 5
         
     print(f"\n🚀 正在获取整个页面: {url}")
-    print(f"⏱️  将等待 {wait_seconds} 秒让页面完全加载")
+    if render:
+        print("🖥️  将使用无头浏览器渲染，等待网络空闲后获取DOM")
+    else:
+        print(f"⏱️  将等待 {wait_seconds} 秒让页面完全加载")
     
     # 获取整个页面保存到 page_lines 列表中
-    result = get_full_page_lines_with_cookies(url, cookies, wait_seconds)
+    result = get_full_page_lines_with_cookies(url, cookies, wait_seconds, render=render)
     if len(result) == 2:
         page_lines, full_html = result
     else:
@@ -304,11 +408,13 @@ def main():
     
     # 询问是否保存完整HTML
     if full_html:
-        save_choice = input("\n💾 是否保存完整页面到HTML文件? (y/n): ").strip().lower()
+        save_choice = input("\n💾 是否保存完整页面? (y=HTML文件 / a=压缩归档 / n): ").strip().lower()
         if save_choice == 'y':
             saved_file = save_html_file(full_html, url)
             if saved_file:
                 print(f"📂 可以用浏览器打开查看: {os.path.abspath(saved_file)}")
+        elif save_choice == 'a':
+            save_html_file(full_html, url, archive=True)
     
     # 显示前3行内容预览
     print("\n📄 前3行内容预览:")
@@ -328,4 +434,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    from profiling import run_with_profiling
+    run_with_profiling(main, "simple_html")
@@ -5,37 +5,63 @@
 
 import requests
 import json
-import time
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    DEFAULT_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_PARSER = 'html.parser'
+
+from cookie_vault import CookieVault
+from downloader import Downloader, format_size
+from http_cache import HttpCache
+from http_transport import HttpTransport, get_shared_transport
+from link_audit import LinkAuditor, collect_links, write_report, summarize_results
+from page_summary import summarize_response
+from text_extract import extract_text, iter_text
 
 
 class SimpleWebAccess:
     """简单网页访问类"""
     
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, cookie_vault: CookieVault = None, transport: HttpTransport = None, cache: HttpCache = None):
+        """
+        Args:
+            cookie_vault: Cookie保管库，默认使用 ~/.xiumi_toolbox/cookies.json
+            transport: HTTP传输层（连接池、重试和耗时统计），默认使用所有工具共用的传输层；
+                       传入非默认位置的cookie_vault时默认使用独立的传输层，不把它的Cookie写入共用会话
+            cache: HTTP响应缓存。同时传入transport时在该传输层上启用；
+                   只传入cache时使用带缓存的独立传输层，不改变共用传输层
+        """
+        self.cookie_vault = cookie_vault if cookie_vault is not None else CookieVault()
+        if transport is None and (cache is not None or not self.cookie_vault.is_default()):
+            transport = HttpTransport(cache=cache)
+        self.transport = transport or get_shared_transport()
+        if cache is not None and self.transport.cache is not cache:
+            self.transport.enable_cache(cache)
+        self.session = self.transport.session
         self.setup_session()
     
     def setup_session(self):
-        """设置会话参数"""
-        # 设置用户代理
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+        """设置会话参数（请求头由传输层的请求头配置统一设置）"""
+        # 加载保管库中的登录Cookie
+        self.cookie_vault.load_into_session(self.session)
         
         # 设置超时
-        self.timeout = 30
+        self.timeout = self.transport.timeout
     
-    def get_page(self, url: str, params: Dict = None) -> Optional[requests.Response]:
+    def get_page(self, url: str, params: Dict = None, stream: bool = False) -> Optional[requests.Response]:
         """
         获取网页内容
         
         Args:
             url: 网页URL
             params: URL参数
+            stream: 是否流式读取响应体（调用方负责读取或关闭响应）
             
         Returns:
             Response对象，如果失败返回None
@@ -43,11 +69,12 @@ class SimpleWebAccess:
         try:
             print(f"正在访问: {url}")
             
-            response = self.session.get(
+            response = self.transport.get(
                 url, 
                 params=params, 
                 timeout=self.timeout,
-                allow_redirects=True
+                allow_redirects=True,
+                stream=stream
             )
             
             # 检查响应状态
@@ -56,6 +83,7 @@ class SimpleWebAccess:
                 return response
             else:
                 print(f"✗ 访问失败 (状态码: {response.status_code})")
+                response.close()
                 return None
                 
         except requests.exceptions.RequestException as e:
@@ -78,13 +106,13 @@ class SimpleWebAccess:
             print(f"正在POST到: {url}")
             
             if json_data:
-                response = self.session.post(
+                response = self.transport.post(
                     url, 
                     json=json_data, 
                     timeout=self.timeout
                 )
             else:
-                response = self.session.post(
+                response = self.transport.post(
                     url, 
                     data=data, 
                     timeout=self.timeout
@@ -101,18 +129,24 @@ class SimpleWebAccess:
             print(f"✗ POST异常: {e}")
             return None
     
-    def parse_html(self, response: requests.Response) -> Optional[BeautifulSoup]:
+    def parse_html(self, response: requests.Response, parser: str = None,
+                   tags: Iterable[str] = None, parse_only: SoupStrainer = None) -> Optional[BeautifulSoup]:
         """
         解析HTML内容
         
         Args:
             response: requests响应对象
+            parser: 解析器，默认在安装了lxml时使用lxml，否则使用html.parser
+            tags: 只解析这些标签（例如 ['title', 'meta', 'a', 'img']），其余内容直接跳过
+            parse_only: 自定义的SoupStrainer，优先于tags
             
         Returns:
             BeautifulSoup对象，如果失败返回None
         """
         try:
-            soup = BeautifulSoup(response.text, 'html.parser')
+            if parse_only is None and tags:
+                parse_only = SoupStrainer(list(tags))
+            soup = BeautifulSoup(response.text, parser or DEFAULT_PARSER, parse_only=parse_only)
             return soup
         except Exception as e:
             print(f"✗ HTML解析失败: {e}")
@@ -149,34 +183,77 @@ class SimpleWebAccess:
             print(f"✗ 提取链接失败: {e}")
             return []
     
-    def extract_text(self, soup: BeautifulSoup) -> str:
+    def audit_links(self, url: str, report_path: str = None, include_assets: bool = True,
+                    workers: int = 16, per_host: int = 4) -> Dict[str, Any]:
+        """
+        检查页面中的所有链接（去重后并发发送HEAD请求，不支持时改用GET）
+        
+        Args:
+            url: 网页URL
+            report_path: 报告文件路径（.csv 或 .jsonl），为None时不写报告
+            include_assets: 是否包括图片、脚本、样式表等资源链接
+            workers: 最大并发请求数
+            per_host: 同一主机的最大并发请求数
+            
+        Returns:
+            统计结果字典
+        """
+        response = self.get_page(url)
+        if not response:
+            return summarize_results([])
+        soup = self.parse_html(response)
+        if not soup:
+            return summarize_results([])
+        
+        urls = collect_links(soup, url, include_assets)
+        print(f"✓ 共 {len(urls)} 个不重复链接，开始检查...")
+        
+        auditor = LinkAuditor(workers=workers, per_host=per_host)
+        auditor.transport.session.headers.update(self.session.headers)
+        auditor.transport.session.cookies.update(self.session.cookies)
+        
+        results = auditor.audit(urls)
+        if report_path:
+            results = write_report(results, report_path)
+        
+        def show(results):
+            for result in results:
+                if result['error']:
+                    print(f"  ✗ {result['url']} - {result['error']}")
+                else:
+                    mark = '✓' if result['ok'] else '✗'
+                    hops = f" ({len(result['redirects'])}次重定向)" if result['redirects'] else ''
+                    print(f"  {mark} {result['status']} {result['latency_ms']:.0f}ms {result['url']}{hops}")
+                yield result
+        
+        summary = summarize_results(show(results))
+        print(f"✓ 检查完成: 正常 {summary['ok']}，失效 {summary['broken']}，"
+              f"出错 {summary['errors']}，重定向 {summary['redirected']}")
+        if report_path:
+            print(f"✓ 报告已保存到: {report_path}")
+        return summary
+    
+    def extract_text(self, soup: BeautifulSoup, stream: bool = False):
         """
         提取页面中的纯文本
         
+        一次遍历文档树完成提取和清理，跳过script/style，不修改传入的文档树
+        
         Args:
-            soup: BeautifulSoup对象
+            soup: BeautifulSoup对象，也可以是lxml树
+            stream: 为True时返回文本块迭代器（所有块拼接起来就是完整文本）
             
         Returns:
-            纯文本内容
+            纯文本内容，或文本块迭代器
         """
         try:
-            # 移除script和style标签
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # 获取文本
-            text = soup.get_text()
-            
-            # 清理文本
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-            
-            return text
+            if stream:
+                return iter_text(soup)
+            return extract_text(soup)
             
         except Exception as e:
             print(f"✗ 提取文本失败: {e}")
-            return ""
+            return iter(()) if stream else ""
     
     def save_to_file(self, content: Any, filename: str, content_type: str = "text") -> bool:
         """
@@ -208,46 +285,50 @@ class SimpleWebAccess:
             print(f"✗ 保存文件失败: {e}")
             return False
     
-    def download_file(self, url: str, filename: str = None) -> bool:
+    def download_file(self, url: str, filename: str = None, segments: int = 4, resume: bool = True) -> bool:
         """
         下载文件
         
+        服务器支持Range时大文件分段并行下载；中断后再次调用会从断点继续
+        
         Args:
             url: 文件URL
             filename: 保存的文件名，如果为None则从URL自动生成
+            segments: 最大并行分段数，1表示单连接下载
+            resume: 是否从上次中断的位置继续
             
         Returns:
             是否下载成功
         """
         try:
-            if not filename:
-                filename = url.split('/')[-1] or 'downloaded_file'
-            
             print(f"正在下载: {url}")
             
-            response = self.session.get(url, stream=True, timeout=self.timeout)
+            downloader = Downloader(self.transport, segments=segments, timeout=self.timeout)
+            result = downloader.download(url, filename, resume=resume)
             
-            if response.status_code == 200:
-                with open(filename, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                
-                print(f"✓ 文件下载成功: {filename}")
-                return True
-            else:
-                print(f"✗ 下载失败 (状态码: {response.status_code})")
-                return False
+            speed = format_size(result['throughput'])
+            resumed = "，断点续传" if result['resumed'] else ""
+            print(f"✓ 文件下载成功: {result['filename']} ({format_size(result['size'])}，"
+                  f"{result['elapsed']:.1f}秒，{speed}/s，{result['segments']}段{resumed})")
+            return True
                 
+        except requests.exceptions.HTTPError as e:
+            print(f"✗ 下载失败 ({e})")
+            return False
         except Exception as e:
             print(f"✗ 下载异常: {e}")
+            print("  再次下载同一文件会从中断处继续")
             return False
     
-    def get_page_info(self, url: str) -> Dict[str, Any]:
+    def get_page_info(self, url: str, metadata_only: bool = False) -> Dict[str, Any]:
         """
         获取页面基本信息
         
+        边下载边解析，一遍得到所有字段，不构建DOM树
+        
         Args:
             url: 网页URL
+            metadata_only: 只获取标题、描述和关键词，读完<head>就停止下载
             
         Returns:
             页面信息字典
@@ -266,44 +347,14 @@ class SimpleWebAccess:
         }
         
         try:
-            response = self.get_page(url)
+            response = self.get_page(url, stream=True)
             if not response:
                 return info
             
             info['status_code'] = response.status_code
             info['content_type'] = response.headers.get('content-type', '')
             
-            soup = self.parse_html(response)
-            if not soup:
-                return info
-            
-            # 提取标题
-            title_tag = soup.find('title')
-            if title_tag:
-                info['title'] = title_tag.text.strip()
-            
-            # 提取描述
-            desc_tag = soup.find('meta', attrs={'name': 'description'})
-            if desc_tag:
-                info['description'] = desc_tag.get('content', '')
-            
-            # 提取关键词
-            keywords_tag = soup.find('meta', attrs={'name': 'keywords'})
-            if keywords_tag:
-                info['keywords'] = keywords_tag.get('content', '')
-            
-            # 统计链接数量
-            links = soup.find_all('a', href=True)
-            info['links_count'] = len(links)
-            
-            # 统计图片数量
-            images = soup.find_all('img')
-            info['images_count'] = len(images)
-            
-            # 提取文本长度
-            text = self.extract_text(soup)
-            info['text_length'] = len(text)
-            
+            info.update(summarize_response(response, metadata_only=metadata_only))
             return info
             
         except Exception as e:
@@ -345,8 +396,6 @@ def demo_usage():
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"page_info_{timestamp}.json"
         web_access.save_to_file(info, filename, "json")
-        
-        time.sleep(1)  # 避免请求过于频繁
 
 
 def interactive_mode():
@@ -355,7 +404,7 @@ def interactive_mode():
     print("交互式网页访问模式")
     print("=" * 60)
     
-    web_access = SimpleWebAccess()
+    web_access = SimpleWebAccess(cache=HttpCache())
     
     while True:
         print("\n请选择操作:")
@@ -363,9 +412,10 @@ def interactive_mode():
         print("2. 下载文件")
         print("3. 获取页面信息")
         print("4. 提取链接")
-        print("5. 退出")
+        print("5. 检查链接")
+        print("6. 退出")
         
-        choice = input("请输入选择 (1-5): ").strip()
+        choice = input("请输入选择 (1-6): ").strip()
         
         if choice == '1':
             url = input("请输入网页URL: ").strip()
@@ -412,6 +462,18 @@ def interactive_mode():
                             print(f"  ... 还有 {len(links) - 10} 个链接")
         
         elif choice == '5':
+            url = input("请输入网页URL: ").strip()
+            if url:
+                report = input("请输入报告文件名 (默认: link_report.csv，输入n不保存): ").strip()
+                if not report:
+                    report = "link_report.csv"
+                web_access.audit_links(url, None if report.lower() == 'n' else report)
+        
+        elif choice == '6':
+            print("\n请求统计:")
+            web_access.transport.stats.print_summary()
+            if web_access.transport.cache is not None:
+                web_access.transport.cache.print_stats()
             print("退出程序")
             break
         
@@ -419,7 +481,8 @@ def interactive_mode():
             print("无效选择，请重新输入")
 
 
-if __name__ == "__main__":
+def main():
+    """主函数"""
     print("=" * 60)
     print("简单网页访问工具")
     print("=" * 60)
@@ -441,3 +504,8 @@ if __name__ == "__main__":
             break
         else:
             print("无效选择，请重新输入")
+
+
+if __name__ == "__main__":
+    from profiling import run_with_profiling
+    run_with_profiling(main, "simple_web_access")
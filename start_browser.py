@@ -2,83 +2,237 @@
 浏览器调试模式启动工具
 
 这个脚本可以帮助启动带有远程调试端口的浏览器，
-便于后续的自动化脚本连接。
+便于后续的自动化脚本连接。启动后会轮询DevTools接口，
+确认调试端口可用后才返回，连接脚本不会和浏览器启动过程抢跑。
 """
 
+import json
 import os
+import shutil
 import subprocess
+import sys
 import time
-from typing import Dict, Optional
+import urllib.error
+import urllib.request
+from typing import Dict, Optional, Any
+
+# 等待DevTools就绪的默认超时时间（秒）
+DEFAULT_READY_TIMEOUT = 30.0
+
+# 轮询间隔从这个值开始逐次翻倍，最多到 MAX_POLL_INTERVAL
+INITIAL_POLL_INTERVAL = 0.05
+MAX_POLL_INTERVAL = 0.5
+
+# 不同系统上命令名和安装位置不同，按顺序查找
+_LINUX_BROWSER_COMMANDS = {
+    'edge': ['microsoft-edge', 'microsoft-edge-stable', 'microsoft-edge-beta', 'microsoft-edge-dev'],
+    'chrome': ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser'],
+}
+
+_MAC_BROWSER_PATHS = {
+    'edge': ['/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge'],
+    'chrome': [
+        '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+        '/Applications/Chromium.app/Contents/MacOS/Chromium',
+    ],
+}
+
+# 本机的DevTools接口不走系统代理
+_devtools_opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
 
 def detect_browser_paths() -> Dict[str, str]:
-    """检测浏览器安装路径"""
+    """检测浏览器安装路径（Windows、macOS、Linux）"""
     browser_paths = {}
     
-    # Edge浏览器常见路径
-    edge_paths = [
-        r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
-        r"C:\Program Files\Microsoft\Edge\Application\msedge.exe",
-        r"C:\Users\{}\AppData\Local\Microsoft\Edge\Application\msedge.exe".format(os.environ.get('USERNAME', '')),
-    ]
-    
-    for path in edge_paths:
-        if os.path.exists(path):
-            browser_paths['edge'] = path
-            break
-    
-    # Chrome浏览器常见路径
-    chrome_paths = [
-        r"C:\Program Files\Google\Chrome\Application\chrome.exe",
-        r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
-        r"C:\Users\{}\AppData\Local\Google\Chrome\Application\chrome.exe".format(os.environ.get('USERNAME', '')),
-    ]
+    if os.name == 'nt':
+        candidates = {
+            # Edge浏览器常见路径
+            'edge': [
+                r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
+                r"C:\Program Files\Microsoft\Edge\Application\msedge.exe",
+                r"C:\Users\{}\AppData\Local\Microsoft\Edge\Application\msedge.exe".format(os.environ.get('USERNAME', '')),
+            ],
+            # Chrome浏览器常见路径
+            'chrome': [
+                r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+                r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+                r"C:\Users\{}\AppData\Local\Google\Chrome\Application\chrome.exe".format(os.environ.get('USERNAME', '')),
+            ],
+        }
+    elif sys.platform == 'darwin':
+        candidates = _MAC_BROWSER_PATHS
+    else:
+        # Linux：在PATH中查找命令（Chromium也使用ChromeDriver，归入chrome）
+        candidates = {
+            name: [shutil.which(command) for command in commands]
+            for name, commands in _LINUX_BROWSER_COMMANDS.items()
+        }
     
-    for path in chrome_paths:
-        if os.path.exists(path):
-            browser_paths['chrome'] = path
-            break
+    for browser, paths in candidates.items():
+        for path in paths:
+            if path and os.path.exists(path):
+                browser_paths[browser] = path
+                break
     
     return browser_paths
 
-def start_browser_debug_mode(browser: str, browser_path: str = None, port: int = 9222) -> bool:
-    """启动浏览器调试模式"""
+def get_devtools_version(port: int = 9222, host: str = "127.0.0.1", timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+    """
+    读取DevTools的 /json/version 接口
+
+    Returns:
+        浏览器版本信息（含 webSocketDebuggerUrl），端口未就绪时返回None
+    """
+    url = f"http://{host}:{port}/json/version"
     try:
+        with _devtools_opener.open(url, timeout=timeout) as response:
+            info = json.loads(response.read().decode('utf-8'))
+    except (OSError, ValueError):
+        # 连接被拒绝、超时、浏览器还没准备好返回内容
+        return None
+    if not info.get('webSocketDebuggerUrl'):
+        return None
+    return info
+
+def wait_for_devtools(port: int = 9222, host: str = "127.0.0.1", timeout: float = DEFAULT_READY_TIMEOUT,
+                      process: subprocess.Popen = None) -> Optional[Dict[str, Any]]:
+    """
+    轮询DevTools接口直到调试端口可用
+
+    Args:
+        port: 远程调试端口
+        host: 调试地址
+        timeout: 最长等待时间（秒）
+        process: 刚启动的浏览器进程，进程提前退出时立即停止等待
+
+    Returns:
+        /json/version 返回的信息（含 webSocketDebuggerUrl），超时或进程退出时返回None
+    """
+    deadline = time.monotonic() + timeout
+    interval = INITIAL_POLL_INTERVAL
+    while True:
+        info = get_devtools_version(port, host, timeout=min(1.0, max(0.1, deadline - time.monotonic())))
+        if info:
+            return info
+        if process is not None and process.poll() is not None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+def build_debug_command(browser_path: str, port: int, user_data_dir: str, headless: bool = False) -> list:
+    """生成调试模式启动命令"""
+    cmd = [
+        browser_path,
+        f"--remote-debugging-port={port}",
+        f"--user-data-dir={user_data_dir}",
+        "--no-first-run",
+        "--no-default-browser-check",
+        "--disable-background-timer-throttling",
+        "--disable-renderer-backgrounding",
+        "--disable-backgrounding-occluded-windows"
+    ]
+    if headless:
+        cmd.append("--headless=new")
+    if sys.platform.startswith('linux'):
+        # 容器里/dev/shm通常很小；root用户运行时Chromium要求关闭沙箱
+        cmd.append("--disable-dev-shm-usage")
+        if hasattr(os, 'geteuid') and os.geteuid() == 0:
+            cmd.append("--no-sandbox")
+    return cmd
+
+def launch_debug_browser(browser: str, browser_path: str = None, port: int = 9222,
+                         user_data_dir: str = None, headless: bool = False,
+                         timeout: float = DEFAULT_READY_TIMEOUT) -> Dict[str, Any]:
+    """
+    启动调试模式浏览器并等待DevTools就绪
+
+    Args:
+        browser: 浏览器类型 ("chrome" 或 "edge")
+        browser_path: 浏览器可执行文件路径，为None时自动检测
+        port: 远程调试端口
+        user_data_dir: 用户数据目录，默认在当前目录下创建 temp_browser_profile_<浏览器>
+        headless: 是否使用无头模式（没有图形界面的Linux服务器需要）
+        timeout: 等待调试端口就绪的最长时间（秒）
+
+    Returns:
+        {'process': 浏览器进程（端口已被占用时为None）, 'port': 端口,
+         'ws_url': 浏览器级WebSocket调试地址, 'version': 浏览器版本, 'user_data_dir': 用户数据目录,
+         'startup_time': 从启动到就绪的秒数}
+
+    Raises:
+        FileNotFoundError: 找不到浏览器
+        RuntimeError: 浏览器退出或超时仍未就绪
+    """
+    # 端口上已经有可用的浏览器时直接复用，避免再启动一个抢同一个端口
+    info = get_devtools_version(port)
+    if info:
+        return {
+            'process': None,
+            'port': port,
+            'ws_url': info['webSocketDebuggerUrl'],
+            'version': info.get('Browser', ''),
+            'user_data_dir': None,
+            'startup_time': 0.0,
+        }
+
+    if not browser_path:
+        browser_path = detect_browser_paths().get(browser.lower())
         if not browser_path:
-            detected_paths = detect_browser_paths()
-            browser_path = detected_paths.get(browser.lower())
-            
-            if not browser_path:
-                print(f"❌ 未找到{browser}浏览器路径")
-                return False
-        
-        # 创建临时用户数据目录
-        temp_dir = os.path.join(os.getcwd(), f"temp_browser_profile_{browser}")
-        
-        # 启动命令
-        cmd = [
-            browser_path,
-            f"--remote-debugging-port={port}",
-            f"--user-data-dir={temp_dir}",
-            "--no-first-run",
-            "--no-default-browser-check",
-            "--disable-background-timer-throttling",
-            "--disable-renderer-backgrounding",
-            "--disable-backgrounding-occluded-windows"
-        ]
-        
+            raise FileNotFoundError(f"未找到{browser}浏览器路径")
+
+    user_data_dir = os.path.abspath(user_data_dir or f"temp_browser_profile_{browser}")
+    cmd = build_debug_command(browser_path, port, user_data_dir, headless)
+
+    popen_kwargs = {}
+    if os.name == 'nt':
+        if not headless:
+            popen_kwargs['creationflags'] = subprocess.CREATE_NEW_CONSOLE
+    else:
+        # 独立的进程组：脚本被Ctrl+C时浏览器不会一起收到信号
+        popen_kwargs['start_new_session'] = True
+        popen_kwargs['stdout'] = subprocess.DEVNULL
+        popen_kwargs['stderr'] = subprocess.DEVNULL
+
+    started = time.monotonic()
+    process = subprocess.Popen(cmd, **popen_kwargs)
+    info = wait_for_devtools(port, timeout=timeout, process=process)
+    if info is None:
+        exit_code = process.poll()
+        if exit_code is None:
+            process.kill()
+            process.wait()
+            raise RuntimeError(f"等待{timeout:.0f}秒后调试端口 {port} 仍未就绪")
+        raise RuntimeError(f"浏览器已退出 (退出码: {exit_code})，调试端口 {port} 未就绪")
+
+    return {
+        'process': process,
+        'port': port,
+        'ws_url': info['webSocketDebuggerUrl'],
+        'version': info.get('Browser', ''),
+        'user_data_dir': user_data_dir,
+        'startup_time': time.monotonic() - started,
+    }
+
+def start_browser_debug_mode(browser: str, browser_path: str = None, port: int = 9222,
+                             headless: bool = False) -> bool:
+    """启动浏览器调试模式，调试端口可用后才返回"""
+    try:
         print(f"正在启动{browser.upper()}浏览器(调试模式)...")
         print(f"调试端口: {port}")
-        print(f"用户数据目录: {temp_dir}")
-        print(f"执行命令: {' '.join(cmd)}")
         print("-" * 50)
         
-        # 启动浏览器
-        process = subprocess.Popen(
-            cmd, 
-            creationflags=subprocess.CREATE_NEW_CONSOLE if os.name == 'nt' else 0
-        )
+        result = launch_debug_browser(browser, browser_path, port, headless=headless)
         
-        print("✅ 浏览器已启动!")
+        if result['process'] is None:
+            print(f"⚠️ 端口 {port} 上已有调试模式浏览器在运行，直接使用")
+        else:
+            print(f"✅ 浏览器已启动! (用时 {result['startup_time']:.1f} 秒)")
+            print(f"用户数据目录: {result['user_data_dir']}")
+        print(f"浏览器版本: {result['version']}")
+        print(f"WebSocket地址: {result['ws_url']}")
         print(f"📋 现在你可以:")
         print("1. 在浏览器中打开秀米网站并登录")
         print("2. 进行任何必要的手动操作")
@@ -154,11 +308,16 @@ def main():
         except ValueError:
             print("请输入有效的端口号")
     
+    # 没有图形界面的Linux只能使用无头模式
+    headless = sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+    if headless:
+        print("⚠️ 未检测到图形界面，将使用无头模式启动")
+    
     # 启动浏览器
     print(f"\n即将启动 {selected_browser.upper()} 浏览器...")
     input("按回车键继续...")
     
-    if start_browser_debug_mode(selected_browser, browser_path, port):
+    if start_browser_debug_mode(selected_browser, browser_path, port, headless=headless):
         print("\n🎉 浏览器启动成功!")
         print("现在可以运行主脚本并选择连接模式了")
         print(f"主脚本: python fetch_quickshare.py")
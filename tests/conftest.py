@@ -0,0 +1,162 @@
+"""
+离线测试的公共夹具
+本地HTTP服务器提供秀米风格的页面和接口；FakeDriver（定义在 benchmarks.py）用lxml在这些页面上执行XPath，
+代替真实浏览器测试抓取器的页面逻辑。所有测试都不访问外网，也不需要安装浏览器
+"""
+
+import json
+import os
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+# 在导入工具模块之前隔离用户目录下的Cookie保管库和HTTP缓存
+_TMP_HOME = tempfile.mkdtemp(prefix='xiumi_toolbox_tests_')
+os.environ['XIUMI_COOKIE_VAULT'] = os.path.join(_TMP_HOME, 'cookies.json')
+os.environ['XIUMI_HTTP_CACHE'] = os.path.join(_TMP_HOME, 'http_cache')
+os.environ['XIUMI_QUICKSHARE_DB'] = os.path.join(_TMP_HOME, 'quickshare.db')
+os.environ['XIUMI_BROWSER_POOL_SOCKET'] = os.path.join(_TMP_HOME, 'browser_pool.sock')
+os.environ['NO_PROXY'] = os.environ['no_proxy'] = '127.0.0.1,localhost'
+
+import pytest
+from selenium.webdriver.support.ui import WebDriverWait
+
+# FakeDriver 和编辑器页面也被 benchmarks.py 的抓取器用例使用
+from benchmarks import make_xiumi_page, editor_page, article_page, FakeDriver, EDITOR_ARTICLE_COUNT
+
+
+# 编辑器页面中的文章数量
+ARTICLE_COUNT = EDITOR_ARTICLE_COUNT
+
+
+def articles_json(count: int) -> bytes:
+    """文章列表接口的响应"""
+    items = [{'id': i, 'title': f'测试文章 {i}', 'tags': ['秀米', str(i)]} for i in range(count)]
+    return json.dumps({'code': 0, 'data': {'total': count, 'list': items}}, ensure_ascii=False).encode('utf-8')
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    xiumi_page = make_xiumi_page(200).encode('utf-8')
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = 'text/html; charset=utf-8', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path, query = parts.path, parse_qs(parts.query)
+        if path == '/editor':
+            self._send(200, editor_page(ARTICLE_COUNT).encode('utf-8'))
+        elif path.startswith('/article/'):
+            self._send(200, article_page(int(path.rsplit('/', 1)[1])).encode('utf-8'))
+        elif path == '/page':
+            self._send(200, self.xiumi_page)
+        elif path == '/api/articles':
+            count = int(query.get('count', ['50'])[0])
+            self._send(200, articles_json(count), 'application/json; charset=utf-8')
+        elif path == '/echo':
+            data = {
+                'cookie': self.headers.get('Cookie', ''),
+                'user_agent': self.headers.get('User-Agent', ''),
+                'query': {k: v[0] for k, v in query.items()},
+            }
+            self._send(200, json.dumps(data).encode('utf-8'), 'application/json')
+        elif path == '/redirect':
+            self._send(302, b'', headers={'Location': '/page'})
+        else:
+            self._send(404, b'<html><body>not found</body></html>')
+
+    do_HEAD = do_GET
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        data = {'content_type': self.headers.get('Content-Type', ''), 'body': body.decode('utf-8')}
+        self._send(201 if self.path == '/create' else 200, json.dumps(data).encode('utf-8'), 'application/json')
+
+
+@pytest.fixture(scope='session')
+def local_server():
+    """本地HTTP服务器，返回基础URL（如 http://127.0.0.1:12345）"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FixtureHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope='session', autouse=True)
+def unlimited_local_hosts():
+    """共用的默认限速器对本机测试服务器不限速（即使以后给未配置的主机加上默认限速）"""
+    from rate_limiter import get_default_limiter
+    limiter = get_default_limiter()
+    for host in ('127.0.0.1', 'localhost'):
+        limiter.set_limit(host, None)
+
+
+@pytest.fixture
+def cookie_vault(tmp_path):
+    from cookie_vault import CookieVault
+    return CookieVault(str(tmp_path / 'cookies.json'))
+
+
+@pytest.fixture
+def transport():
+    """独立的传输层，测试之间不共享Cookie和统计"""
+    from http_transport import HttpTransport
+    transport = HttpTransport(max_retries=0)
+    yield transport
+    transport.close()
+
+
+@pytest.fixture
+def fake_driver():
+    driver = FakeDriver()
+    yield driver
+    driver.quit()
+
+
+@pytest.fixture
+def fetcher(fake_driver, cookie_vault, monkeypatch):
+    """接上FakeDriver、不限速、不等待的抓取器"""
+    import fetch_quickshare
+    from rate_limiter import RateLimiter
+
+    monkeypatch.setattr(fetch_quickshare.time, 'sleep', lambda seconds: None)
+    fetcher = fetch_quickshare.XiumiQuickShareFetcher()
+    fetcher.cookie_vault = cookie_vault
+    fetcher.rate_limiter = RateLimiter(default_rate=None, host_limits={})
+    fetcher.driver = fake_driver
+    fetcher.wait = WebDriverWait(fake_driver, 0.05, poll_frequency=0.01)
+    return fetcher
+
+
+@pytest.fixture
+def no_input(monkeypatch):
+    """交互函数中的 input() 一律回答 n"""
+    monkeypatch.setattr('builtins.input', lambda prompt='': 'n')
+
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    # 没有安装 pytest-benchmark 时基准用例只执行一次，仍然检查结果是否正确
+    @pytest.fixture
+    def benchmark():
+        def run(func, *args, **kwargs):
+            return func(*args, **kwargs)
+        return run
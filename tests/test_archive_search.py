@@ -0,0 +1,80 @@
+"""archive_search：与按行搜索结果一致（内存映射、分块解压、块边界、进程池）和归档索引标签"""
+
+import gzip
+
+import pytest
+
+import archive_search
+from archive_search import search_file, search_archive, load_archive_labels, describe_path
+from page_archive import PageArchive
+
+
+def expected_hits(text, term):
+    """与 simple_html.search_in_page 相同的规则：按行、不区分大小写、每行只算一次"""
+    return [(i, line.strip()) for i, line in enumerate(text.split('\n'), 1) if term.lower() in line.lower()]
+
+
+SAMPLE = '\n'.join(
+    [f"<p>第{i}段 Xiumi 秀米 Édition</p>" if i % 7 == 0 else f"<p>普通段落 {i}</p>" for i in range(1, 400)]
+    + ['<p>最后一行没有换行 XIUMI</p>']
+)
+
+
+@pytest.fixture
+def pages(tmp_path):
+    root = tmp_path / 'saved_pages'
+    root.mkdir()
+    (root / 'page.html').write_text(SAMPLE, encoding='utf-8')
+    (root / 'page.html.gz').write_bytes(gzip.compress(SAMPLE.encode('utf-8')))
+    (root / 'empty.html').write_bytes(b'')
+    (root / 'search_results_xiumi.html').write_text('Xiumi', encoding='utf-8')
+    return root
+
+
+@pytest.mark.parametrize('term', ['xiumi', '秀米', 'édition', '普通段落 39', '不存在'])
+def test_mapped_and_compressed_match_line_search(pages, term):
+    expected = expected_hits(SAMPLE, term)
+    assert search_file(str(pages / 'page.html'), term) == (str(pages / 'page.html'), expected, None)
+    assert search_file(str(pages / 'page.html.gz'), term)[1] == expected
+
+
+def test_compressed_chunk_boundaries(pages, monkeypatch):
+    # 块很小时，行和多字节字符都会被切在两块之间
+    for size in (1, 7, 64):
+        monkeypatch.setattr(archive_search, 'READ_CHUNK_SIZE', size)
+        assert search_file(str(pages / 'page.html.gz'), '秀米')[1] == expected_hits(SAMPLE, '秀米')
+
+
+def test_line_numbers_across_count_chunks(pages, monkeypatch):
+    monkeypatch.setattr(archive_search, 'COUNT_CHUNK_SIZE', 5)
+    assert search_file(str(pages / 'page.html'), 'xiumi')[1] == expected_hits(SAMPLE, 'xiumi')
+
+
+def test_max_hits(pages):
+    assert len(search_file(str(pages / 'page.html'), 'xiumi', max_hits=3)[1]) == 3
+    assert len(search_file(str(pages / 'page.html.gz'), 'xiumi', max_hits=3)[1]) == 3
+
+
+def test_search_archive_process_pool_matches_serial(pages):
+    serial = sorted(search_archive('xiumi', str(pages), workers=1))
+    parallel = sorted(search_archive('xiumi', str(pages), workers=2))
+    assert serial == parallel
+    # 搜索结果文件和空文件不参与搜索
+    assert {path for path, _, _ in serial} == {str(pages / 'page.html'), str(pages / 'page.html.gz')}
+    assert len(serial) == 2 * len(expected_hits(SAMPLE, 'xiumi'))
+
+
+def test_errors_are_reported_not_raised(pages, capsys):
+    (pages / 'broken.gz').write_bytes(b'not gzip')
+    results = list(search_archive('xiumi', str(pages), workers=1))
+    assert all(path != str(pages / 'broken.gz') for path, _, _ in results)
+    assert '搜索失败' in capsys.readouterr().err
+
+
+def test_archive_labels(pages):
+    with PageArchive(str(pages / 'archive')) as archive:
+        record = archive.put('https://xiumi.us/board', SAMPLE)
+    labels = load_archive_labels(str(pages))
+    assert describe_path(record['path'], labels) == 'https://xiumi.us/board'
+    hits = [path for path, _, _ in search_archive('xiumi', str(pages), workers=1)]
+    assert record['path'] in hits
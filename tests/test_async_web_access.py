@@ -0,0 +1,265 @@
+"""async_web_access：分块和gzip解码、keep-alive复用、重定向、Cookie、并发限制、多次asyncio.run（本地桩服务器）"""
+
+import asyncio
+import gzip
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from async_web_access import AsyncWebAccess, should_strip_credentials
+from cookie_vault import CookieVault
+from rate_limiter import RateLimiter
+
+
+class _AsyncHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+    drop_hits = []
+
+    def log_message(self, *args):
+        pass
+
+    def _drop_reused(self) -> bool:
+        """/drop：同一连接上的第二个请求读完后不回复，直接断开（模拟服务器关闭了空闲连接）"""
+        served = getattr(self, 'served', 0)
+        self.served = served + 1
+        type(self).drop_hits.append(self.command)
+        if served:
+            self.close_connection = True
+            return True
+        self._send(b'ok')
+        return False
+
+    def _send(self, body: bytes, status: int = 200, headers=None):
+        self.send_response(status)
+        for name, value in (headers or []):
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, data, headers=None):
+        self._send(json.dumps(data).encode(), headers=[('Content-Type', 'application/json')] + (headers or []))
+
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        if path == '/chunked':
+            self.send_response(200)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for chunk in (b'hello ', b'chunked ', b'world'):
+                self.wfile.write(f"{len(chunk):x};ext=1\r\n".encode() + chunk + b'\r\n')
+            self.wfile.write(b'0\r\nX-Trailer: 1\r\n\r\n')
+        elif path == '/gzip':
+            self._send(gzip.compress('压缩内容'.encode('utf-8')),
+                       headers=[('Content-Encoding', 'gzip'), ('Content-Type', 'text/plain; charset=utf-8')])
+        elif path == '/port':
+            self._json({'port': self.client_address[1]})
+        elif path.endswith('/headers'):
+            self._json({'authorization': self.headers.get('Authorization'),
+                        'cookie': self.headers.get('Cookie'),
+                        'host': self.headers.get('Host')})
+        elif path == '/redirect':
+            self._send(b'', 302, [('Location', query.partition('=')[2])])
+        elif path == '/login':
+            self._send(b'ok', headers=[('Set-Cookie', 'sid=s1; Path=/'),
+                                       ('Set-Cookie', 'scoped=p1; Path=/private'),
+                                       ('Set-Cookie', 'short=t1; Max-Age=1'),
+                                       ('Set-Cookie', 'evil=x; Domain=example.com')])
+        elif path == '/logout':
+            self._send(b'ok', headers=[('Set-Cookie', 'sid=; Max-Age=0; Path=/')])
+        elif path == '/drop':
+            self._drop_reused()
+        elif path == '/slow':
+            with self.lock:
+                type(self).active += 1
+                type(self).peak = max(type(self).peak, type(self).active)
+            time.sleep(0.1)
+            with self.lock:
+                type(self).active -= 1
+            self._send(b'done')
+        else:
+            self._send(b'not found', 404)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._drop_reused()
+
+
+def _start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _AsyncHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture(scope='module')
+def servers():
+    # 两个端口不同的服务器，用来测试跨源重定向
+    first, second = _start_server(), _start_server()
+    yield [f"http://127.0.0.1:{s.server_address[1]}" for s in (first, second)]
+    for server in (first, second):
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def server(servers):
+    return servers[0]
+
+
+@pytest.fixture
+def make_client(tmp_path):
+    def make(**kwargs):
+        kwargs.setdefault('cookie_vault', CookieVault(str(tmp_path / 'cookies.json')))
+        kwargs.setdefault('rate_limiter', RateLimiter(default_rate=None, host_limits={}))
+        return AsyncWebAccess(timeout=5, **kwargs)
+    return make
+
+
+def run(client, coro_factory):
+    """在新的事件循环中运行，结束前关闭该循环的空闲连接"""
+    async def main():
+        try:
+            return await coro_factory()
+        finally:
+            await client.close()
+    return asyncio.run(main())
+
+
+def test_chunked_and_gzip_bodies(make_client, server):
+    client = make_client()
+
+    async def fetch():
+        return await asyncio.gather(client.get(f"{server}/chunked"), client.get(f"{server}/gzip"))
+
+    chunked, gzipped = run(client, fetch)
+    assert chunked.content == b'hello chunked world'
+    assert gzipped.text == '压缩内容'
+
+
+def test_keep_alive_connection_reused(make_client, server):
+    client = make_client()
+
+    async def fetch():
+        return [(await client.get_json(f"{server}/port"))['port'] for _ in range(5)]
+
+    ports = run(client, fetch)
+    assert len(set(ports)) == 1
+
+
+def test_client_reusable_across_event_loops(make_client, server):
+    client = make_client()
+    for _ in range(2):
+        # 第二次 asyncio.run 使用新的信号量和连接，而不是上一个事件循环的
+        assert asyncio.run(client.get_text(f"{server}/chunked")) == 'hello chunked world'
+
+
+def test_redirect_keeps_credentials_on_same_origin(make_client, server):
+    client = make_client()
+    headers = {'Authorization': 'Bearer token', 'Cookie': 'manual=1'}
+
+    async def fetch():
+        return await client.request('GET', f"{server}/redirect?to=/headers", headers=headers)
+
+    response = run(client, fetch)
+    assert len(response.history) == 1 and response.history[0].status_code == 302
+    assert response.json()['authorization'] == 'Bearer token'
+    assert response.json()['cookie'] == 'manual=1'
+
+
+def test_cross_origin_redirect_strips_credentials(make_client, servers):
+    first, second = servers
+    client = make_client()
+    headers = {'Authorization': 'Bearer token', 'Cookie': 'manual=1', 'X-Trace': 'abc'}
+
+    async def fetch():
+        return await client.request('GET', f"{first}/redirect?to={second}/headers", headers=headers)
+
+    echoed = run(client, fetch).json()
+    assert echoed['authorization'] is None and echoed['cookie'] is None
+    assert echoed['host'] == second.split('//')[1]
+
+
+def test_should_strip_credentials():
+    assert not should_strip_credentials('http://xiumi.us/a', 'http://xiumi.us/b')
+    assert not should_strip_credentials('http://xiumi.us/a', 'https://xiumi.us/b')
+    assert should_strip_credentials('https://xiumi.us/a', 'http://xiumi.us/b')
+    assert should_strip_credentials('http://xiumi.us/a', 'http://evil.example/b')
+    assert should_strip_credentials('http://xiumi.us:8080/a', 'http://xiumi.us/b')
+
+
+def test_cookies_respect_path_expiry_and_domain(make_client, server):
+    client = make_client()
+
+    async def fetch():
+        await client.get(f"{server}/login")
+        root = (await client.get_json(f"{server}/headers"))['cookie']
+        private = (await client.get_json(f"{server}/private/headers"))['cookie']
+        await asyncio.sleep(1.1)
+        expired = (await client.get_json(f"{server}/headers"))['cookie']
+        await client.get(f"{server}/logout")
+        logged_out = (await client.get_json(f"{server}/headers"))['cookie']
+        return root, private, expired, logged_out
+
+    root, private, expired, logged_out = run(client, fetch)
+    assert set(root.split('; ')) == {'sid=s1', 'short=t1'}
+    assert set(private.split('; ')) == {'sid=s1', 'short=t1', 'scoped=p1'}
+    assert expired == 'sid=s1'
+    assert logged_out is None
+    # 其他域名的Cookie被拒绝
+    assert not any(c.domain.endswith('example.com') for c in client.cookies)
+
+
+def test_secure_vault_cookie_not_sent_over_http(make_client, server, tmp_path):
+    vault = CookieVault(str(tmp_path / 'vault.json'))
+    vault.cookies = [
+        CookieVault._make_cookie('sid', 'secret', domain='127.0.0.1', secure=True),
+        CookieVault._make_cookie('lang', 'zh', domain='127.0.0.1'),
+        CookieVault._make_cookie('other', '1', domain='xiumi.us'),
+    ]
+    client = make_client(cookie_vault=vault)
+
+    async def fetch():
+        return (await client.get_json(f"{server}/headers"))['cookie']
+
+    assert run(client, fetch) == 'lang=zh'
+
+
+@pytest.mark.parametrize('kwargs, expected', [
+    ({'concurrency': 3}, 3),
+    ({'concurrency': 10, 'per_host': 2}, 2),
+])
+def test_concurrency_limits(make_client, server, kwargs, expected):
+    _AsyncHandler.peak = 0
+    client = make_client(**kwargs)
+
+    async def fetch():
+        return await asyncio.gather(*(client.get_text(f"{server}/slow") for _ in range(8)))
+
+    assert run(client, fetch) == ['done'] * 8
+    assert _AsyncHandler.peak == expected
+
+
+def test_reused_connection_retry_only_for_idempotent_methods(make_client, server):
+    client = make_client()
+
+    async def fetch(method):
+        await client.request(method, f"{server}/drop")
+        return await client.request(method, f"{server}/drop")
+
+    _AsyncHandler.drop_hits = []
+    assert run(client, lambda: fetch('GET')).text == 'ok'
+    # 第二个GET在复用的连接上失败，换新连接重发
+    assert _AsyncHandler.drop_hits == ['GET'] * 3
+
+    _AsyncHandler.drop_hits = []
+    with pytest.raises(ConnectionResetError):
+        run(client, lambda: fetch('POST'))
+    # POST可能已被服务器处理，不重发
+    assert _AsyncHandler.drop_hits == ['POST'] * 2
@@ -0,0 +1,37 @@
+"""benchmarks.py 的基线比较"""
+
+import benchmarks
+
+
+def _result(median, throughput):
+    return {'best': median, 'median': median, 'throughput': throughput, 'unit': 'MB/s'}
+
+
+def test_compare_results_flags_regressions():
+    baseline = {'a': _result(0.10, 10.0), 'b': _result(0.10, 10.0), 'c': _result(0.10, 10.0), 'gone': _result(0.1, 1.0)}
+    current = {'a': _result(0.11, 9.1), 'b': _result(0.13, 7.7), 'c': _result(0.05, 20.0), 'added': _result(0.1, 1.0)}
+    rows = {row['name']: row for row in benchmarks.compare_results(baseline, current, 0.2)}
+    assert rows['a']['status'] == 'ok'
+    assert rows['b']['status'] == 'regressed'
+    assert rows['c']['status'] == 'faster'
+    assert rows['gone']['status'] == 'missing'
+    assert rows['added']['status'] == 'new'
+    # 吞吐量变化只列出，不单独判断
+    assert rows['b']['throughput_delta'] == 7.7 / 10.0 - 1
+
+
+def test_baseline_gate_end_to_end(tmp_path, capsys):
+    path = str(tmp_path / 'baseline.json')
+    html = benchmarks.make_xiumi_page(50)
+    benchmarks.save_baseline(benchmarks.run_suite(html, repeat=1), path)
+    data = benchmarks.load_baseline(path)
+    assert data['machine'] == benchmarks.machine_info()
+    fetcher_case = f"抓取器: run() {benchmarks.EDITOR_ARTICLE_COUNT}篇文章"
+    assert data['results'][fetcher_case]['unit'] == '篇/s'
+    # 基线中的耗时极短时，当前结果一定超过容差
+    for result in data['results'].values():
+        result['median'] /= 1000
+        result['throughput'] *= 1000
+    benchmarks.save_baseline(data['results'], path)
+    assert benchmarks.main(['compare', '--file', path, '--repeat', '1', '--sections', '50']) == 1
+    assert '✗ 退化' in capsys.readouterr().out
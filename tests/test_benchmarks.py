@@ -0,0 +1,93 @@
+"""
+热点路径的性能基准（pytest-benchmark）
+
+    python -m pytest tests/test_benchmarks.py --benchmark-only
+
+没有安装 pytest-benchmark 时这些用例只执行一次，检查结果是否正确
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import simple_html
+from benchmarks import make_xiumi_page, to_single_line, run_fetcher
+from conftest import ARTICLE_COUNT
+from page_lines import PageLines
+from page_summary import summarize_html
+from simple_web_access import SimpleWebAccess
+from text_extract import extract_text, html_to_text
+
+
+@pytest.fixture(scope='module')
+def big_page():
+    return make_xiumi_page(2000)
+
+
+@pytest.fixture
+def web(transport, cookie_vault):
+    return SimpleWebAccess(cookie_vault=cookie_vault, transport=transport)
+
+
+def test_bench_article_list_extraction(benchmark, fetcher, local_server):
+    fetcher.driver.get(f"{local_server}/editor")
+    articles = benchmark(fetcher.get_articles_list)
+    assert len(articles) == ARTICLE_COUNT
+
+
+def test_bench_quickshare_code(benchmark, fetcher, local_server):
+    fetcher.driver.get(f"{local_server}/editor")
+    element = fetcher.get_articles_list()[1]['element']
+    assert benchmark(fetcher.get_quickshare_code, element) == 'XM-0001'
+
+
+def test_bench_fetcher_run(benchmark, local_server, tmp_path):
+    # 完整的 run()：登录检测、文章列表、逐篇获取另存码、保存文件和数据库
+    assert benchmark(run_fetcher, f"{local_server}/editor", str(tmp_path)) == ARTICLE_COUNT
+
+
+def test_bench_page_search(benchmark, big_page, no_input):
+    page = PageLines.from_text(big_page)
+    matches = benchmark(simple_html.search_in_page, page, '小标题 1999')
+    assert len(matches) == 1
+
+
+def test_bench_parse_html(benchmark, web, big_page):
+    soup = benchmark(web.parse_html, SimpleNamespace(text=big_page))
+    assert len(soup.find_all('img')) == 2000
+
+
+def test_bench_parse_html_partial(benchmark, web, big_page):
+    soup = benchmark(web.parse_html, SimpleNamespace(text=big_page), tags=['title', 'meta'])
+    assert soup.find('title').text == '秀米图文 - 基准测试页面'
+
+
+def test_bench_page_summary(benchmark, big_page):
+    assert benchmark(summarize_html, big_page)['images_count'] == 2000
+
+
+def test_bench_page_summary_single_line(benchmark, big_page):
+    # 压缩成一行的页面：文本规范化只扫描新传入的文字，不随行长变成平方复杂度
+    html = to_single_line(big_page)
+    assert benchmark(summarize_html, html)['text_length'] == len(html_to_text(html))
+
+
+def test_bench_extract_text(benchmark, web, big_page):
+    soup = web.parse_html(SimpleNamespace(text=big_page))
+    assert '第1999段' in benchmark(extract_text, soup)
+
+
+def test_bench_html_to_text(benchmark, big_page):
+    assert '第1999段' in benchmark(html_to_text, big_page)
+
+
+def test_bench_save_codes(benchmark, fetcher, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    codes = {f'测试文章 {i}': f'XM-{i:04d}' for i in range(2000)}
+    path = benchmark(fetcher.save_codes_to_file, codes, 'codes.json')
+    assert path.endswith('codes.json')
+
+
+def test_bench_save_search_results(benchmark, tmp_path):
+    results = [(i, f'<p>第{i}段 秀米排版示例文字</p>') for i in range(2000)]
+    assert benchmark(simple_html.save_search_results, results, '秀米', str(tmp_path))
@@ -0,0 +1,92 @@
+"""browser_pool_daemon：归还时检查并重置浏览器，客户端断开时同样处理（本地套接字，不启动浏览器）"""
+
+import threading
+import time
+
+import pytest
+
+import browser_pool_daemon
+from browser_pool_daemon import BrowserPoolDaemon, BrowserPoolClient
+
+
+class _FakeProcess:
+    pid = 0
+
+    def poll(self):
+        return None
+
+
+@pytest.fixture
+def pool(tmp_path, cookie_vault, monkeypatch):
+    """一个浏览器的池：进程、健康检查和DevTools调用都是替身"""
+    calls = []
+    state = {'healthy': True, 'restarts': 0}
+
+    def fake_cdp(ws_url, method, params=None, timeout=10):
+        calls.append((method, params))
+        if method == 'Target.getTargets':
+            return {'targetInfos': [{'targetId': 'old-page', 'type': 'page'},
+                                    {'targetId': 'worker', 'type': 'service_worker'}]}
+        return {}
+
+    monkeypatch.setattr(browser_pool_daemon, 'cdp_call', fake_cdp)
+    daemon = BrowserPoolDaemon(size=1, socket_path=str(tmp_path / 'pool.sock'),
+                               profile_root=str(tmp_path / 'profiles'), cookie_vault=cookie_vault)
+    slot = daemon.slots[0]
+    slot.process, slot.ws_url = _FakeProcess(), 'ws://127.0.0.1/devtools/browser/x'
+    monkeypatch.setattr(daemon, '_is_healthy', lambda s: state['healthy'])
+
+    def fake_restart(s, reason):
+        state['restarts'] += 1
+        state['reason'] = reason
+
+    monkeypatch.setattr(daemon, '_restart_slot', fake_restart)
+
+    server = daemon._make_server()
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+    yield daemon, calls, state
+    server.shutdown()
+    server.server_close()
+
+
+def _wait_released(slot, timeout=5):
+    deadline = time.monotonic() + timeout
+    while slot.leased and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return not slot.leased
+
+
+def test_release_resets_to_blank_page(pool):
+    daemon, calls, state = pool
+    with BrowserPoolClient(daemon.socket_path) as client:
+        client.release(client.lease(timeout=1))
+
+    assert ('Target.createTarget', {'url': 'about:blank'}) in calls
+    # 只关闭标签页，不关闭其他类型的目标
+    assert ('Target.closeTarget', {'targetId': 'old-page'}) in calls
+    assert ('Target.closeTarget', {'targetId': 'worker'}) not in calls
+    assert state['restarts'] == 0 and not daemon.slots[0].leased
+
+
+def test_disconnect_without_release_checks_and_resets(pool):
+    daemon, calls, state = pool
+    client = BrowserPoolClient(daemon.socket_path)
+    client.lease(timeout=1)
+    assert daemon.slots[0].leased
+    client.close()
+
+    assert _wait_released(daemon.slots[0])
+    assert ('Target.createTarget', {'url': 'about:blank'}) in calls
+    assert state['restarts'] == 0
+
+
+def test_disconnect_with_dead_browser_restarts(pool):
+    daemon, calls, state = pool
+    client = BrowserPoolClient(daemon.socket_path)
+    client.lease(timeout=1)
+    state['healthy'] = False
+    client.close()
+
+    assert _wait_released(daemon.slots[0])
+    assert state['restarts'] == 1 and state['reason'] == "归还时没有响应"
+    assert not any(method == 'Target.createTarget' for method, _ in calls)
@@ -0,0 +1,145 @@
+"""downloader：分段下载、服务器不支持Range时的回退、中断后续传（本地桩服务器）"""
+
+import json
+import os
+import re
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from downloader import Downloader, READ_CHUNK_SIZE
+
+
+FILE_SIZE = 300 * 1024
+FILE_BODY = bytes((i * 7 + i // 1024) % 251 for i in range(FILE_SIZE))
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    """/file 支持Range；/norange 忽略Range总是返回完整文件"""
+    protocol_version = 'HTTP/1.1'
+    ranges = []
+    # 不为None时，非探测请求只发送这么多字节就断开连接
+    truncate_after = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = FILE_BODY
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if self.path == '/file' and match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else FILE_SIZE - 1
+            type(self).ranges.append((start, end))
+            body = FILE_BODY[start:end + 1]
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{FILE_SIZE}')
+        else:
+            type(self).ranges.append(None)
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+
+        limit = self.truncate_after
+        if limit is not None and len(body) > 1:
+            self.wfile.write(body[:limit])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture(scope='module')
+def range_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _RangeHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def reset_handler():
+    _RangeHandler.ranges = []
+    _RangeHandler.truncate_after = None
+    yield
+    _RangeHandler.truncate_after = None
+
+
+@pytest.fixture
+def downloader(transport):
+    return Downloader(transport=transport, segments=4, min_segment_size=64 * 1024, buffer_size=16 * 1024)
+
+
+def test_segmented_download(downloader, range_server, tmp_path):
+    target = str(tmp_path / 'file.bin')
+    result = downloader.download(f"{range_server}/file", target)
+
+    assert result['segments'] == 4 and not result['resumed']
+    assert result['size'] == FILE_SIZE
+    with open(target, 'rb') as f:
+        assert f.read() == FILE_BODY
+    # 探测请求 + 4个互不重叠、覆盖整个文件的分段
+    segments = sorted(r for r in _RangeHandler.ranges if r != (0, 0))
+    assert len(segments) == 4
+    assert segments[0][0] == 0 and segments[-1][1] == FILE_SIZE - 1
+    assert all(a[1] + 1 == b[0] for a, b in zip(segments, segments[1:]))
+    assert not os.path.exists(target + '.part') and not os.path.exists(target + '.part.json')
+
+
+def test_falls_back_to_single_request_without_range(downloader, range_server, tmp_path):
+    target = str(tmp_path / 'file.bin')
+    result = downloader.download(f"{range_server}/norange", target)
+
+    assert result['segments'] == 1
+    with open(target, 'rb') as f:
+        assert f.read() == FILE_BODY
+    assert _RangeHandler.ranges == [None, None]
+
+
+def test_resume_after_interrupted_download(downloader, range_server, tmp_path):
+    target = str(tmp_path / 'file.bin')
+    # 每段先收到完整的一个读取块（64KB）再断开
+    _RangeHandler.truncate_after = 70 * 1024
+    with pytest.raises(requests.exceptions.RequestException):
+        downloader.download(f"{range_server}/file", target)
+    assert os.path.exists(target + '.part.json')
+    assert not os.path.exists(target)
+
+    _RangeHandler.truncate_after = None
+    _RangeHandler.ranges = []
+    result = downloader.download(f"{range_server}/file", target)
+
+    assert result['resumed']
+    assert result['downloaded'] < FILE_SIZE
+    with open(target, 'rb') as f:
+        assert f.read() == FILE_BODY
+    # 续传的分段从上次写到的位置开始，而不是从段首开始
+    resumed = [r for r in _RangeHandler.ranges if r != (0, 0)]
+    assert resumed and all(start % (FILE_SIZE // 4) >= READ_CHUNK_SIZE for start, _ in resumed)
+
+
+def test_resume_restarts_when_file_changed(downloader, range_server, tmp_path):
+    target = str(tmp_path / 'file.bin')
+    _RangeHandler.truncate_after = 70 * 1024
+    with pytest.raises(requests.exceptions.RequestException):
+        downloader.download(f"{range_server}/file", target)
+
+    # 进度文件记录的ETag与服务器不同时从头下载
+    state_path = target + '.part.json'
+    with open(state_path, encoding='utf-8') as f:
+        state = json.load(f)
+    state['etag'] = '"v0"'
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+
+    _RangeHandler.truncate_after = None
+    result = downloader.download(f"{range_server}/file", target)
+    assert not result['resumed'] and result['downloaded'] == FILE_SIZE
+    with open(target, 'rb') as f:
+        assert f.read() == FILE_BODY
@@ -0,0 +1,100 @@
+"""XiumiQuickShareFetcher 的页面逻辑（FakeDriver + 本地页面）"""
+
+import json
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+from browser_watchdog import BrowserWatchdog
+from conftest import ARTICLE_COUNT, FakeDriver
+
+
+def test_get_articles_list(fetcher, local_server):
+    fetcher.driver.get(f"{local_server}/editor")
+    articles = fetcher.get_articles_list()
+    assert len(articles) == ARTICLE_COUNT
+    assert articles[0]['title'] == '测试文章 0'
+    # 页面上没有文章ID，不用列表位置代替
+    assert articles[3]['id'] is None
+
+
+def test_get_articles_list_max_articles(fetcher, local_server):
+    fetcher.driver.get(f"{local_server}/editor")
+    fetcher.max_articles = 4
+    assert [a['title'] for a in fetcher.get_articles_list()] == [f"测试文章 {i}" for i in range(4)]
+
+
+def test_get_articles_list_empty_page(fetcher, local_server):
+    fetcher.driver.get(f"{local_server}/page")
+    assert fetcher.get_articles_list() == []
+
+
+def test_get_quickshare_code(fetcher, local_server):
+    fetcher.driver.get(f"{local_server}/editor")
+    articles = fetcher.get_articles_list()
+    code = fetcher.get_quickshare_code(articles[5]['element'])
+    assert code == 'XM-0005'
+    assert fetcher.driver.current_url.endswith('/article/5')
+
+
+def test_get_quickshare_code_missing(fetcher, local_server):
+    fetcher.driver.get(f"{local_server}/page")
+    element = fetcher.driver.find_element('xpath', '//p')
+    assert fetcher.get_quickshare_code(element) is None
+
+
+def test_wait_for_login_detects_user_element(fetcher, local_server):
+    fetcher.driver.get(f"{local_server}/editor")
+    assert fetcher.wait_for_login(timeout=1)
+
+
+def test_save_codes_to_file(fetcher, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    codes = {'测试文章 1': 'XM-0001', '测试文章 2': 'XM-0002'}
+    path = fetcher.save_codes_to_file(codes, 'codes.json')
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['total_count'] == 2
+    assert data['codes'] == codes
+
+
+def test_watchdog_records_articles(fetcher, local_server):
+    fetcher.driver.get(f"{local_server}/editor")
+    fetcher.watchdog.attach(fetcher.driver)
+    for _ in range(3):
+        assert fetcher.watchdog.record_article(0.01) is None
+    assert fetcher.watchdog.summary()['articles'] == 3
+
+
+def test_run_recycles_browser_and_continues(fetcher, local_server, tmp_path, monkeypatch):
+    """同一个浏览器处理满5篇就回收，换新浏览器后从下一篇继续，所有文章都处理一次"""
+    drivers = []
+
+    class RecordingDriver(FakeDriver):
+        def __init__(self):
+            super().__init__()
+            self.visited = []
+
+        def get(self, url):
+            self.visited.append(url)
+            super().get(url)
+
+    def fake_setup_driver(**options):
+        fetcher._driver_options = dict(options)
+        fetcher.driver = RecordingDriver()
+        fetcher.wait = WebDriverWait(fetcher.driver, 0.05, poll_frequency=0.01)
+        drivers.append(fetcher.driver)
+
+    monkeypatch.setattr(fetcher, 'setup_driver', fake_setup_driver)
+    fetcher.login_url = fetcher.editor_url = f"{local_server}/editor"
+    fetcher.output_dir = str(tmp_path)
+    fetcher.store_path = str(tmp_path / 'quickshare.db')
+    fetcher.watchdog = BrowserWatchdog(max_rss_mb=None, max_js_heap_mb=None, max_articles=5)
+
+    codes = fetcher.run()
+
+    assert codes == {f"测试文章 {i}": f"XM-{i:04d}" for i in range(ARTICLE_COUNT)}
+    assert len(drivers) == 3
+    assert fetcher.watchdog.summary()['recycles'] == 2
+    # 回收后的浏览器从当前位置继续，而不是从第一篇重新开始
+    visited = [[int(url.rsplit('/', 1)[1]) for url in d.visited if '/article/' in url] for d in drivers]
+    assert visited == [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9], [10, 11]]
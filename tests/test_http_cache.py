@@ -0,0 +1,188 @@
+"""http_cache：新鲜度、no-store/no-cache、ETag/Last-Modified重新验证、304合并响应头、Vary（本地桩服务器）"""
+
+import threading
+from collections import Counter
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from http_cache import HttpCache, freshness_lifetime
+from http_transport import HttpTransport
+
+
+LAST_MODIFIED = 'Mon, 01 Jan 2024 00:00:00 GMT'
+
+
+class _CacheHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    hits: Counter = Counter()
+    conditional = []
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, headers, body=b''):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        count = self.hits[path] = self.hits[path] + 1
+        inm = self.headers.get('If-None-Match')
+        ims = self.headers.get('If-Modified-Since')
+        if inm or ims:
+            type(self).conditional.append((path, inm, ims))
+        body = f"{path} #{count}".encode()
+        date = {'Date': formatdate(usegmt=True)}
+
+        if path == '/fresh':
+            self._send(200, dict(date, **{'Cache-Control': 'max-age=60'}), body)
+        elif path == '/nostore':
+            self._send(200, dict(date, **{'Cache-Control': 'no-store, max-age=60'}), body)
+        elif path == '/nocache':
+            if inm == '"n1"':
+                self._send(304, dict(date, ETag='"n1"'))
+            else:
+                self._send(200, dict(date, **{'Cache-Control': 'no-cache', 'ETag': '"n1"'}), body)
+        elif path == '/etag':
+            if inm == '"v1"':
+                # 304带来新的新鲜期和新的头，应合并进缓存的响应
+                self._send(304, dict(date, **{'ETag': '"v1"', 'Cache-Control': 'max-age=60', 'X-Version': str(count)}))
+            else:
+                self._send(200, dict(date, **{'ETag': '"v1"', 'Cache-Control': 'max-age=0', 'X-Version': str(count)}),
+                           body)
+        elif path == '/lastmod':
+            if ims == LAST_MODIFIED:
+                self._send(304, date)
+            else:
+                self._send(200, dict(date, **{'Last-Modified': LAST_MODIFIED, 'Cache-Control': 'max-age=0'}), body)
+        elif path == '/vary':
+            language = self.headers.get('Accept-Language', '')
+            self._send(200, dict(date, **{'Cache-Control': 'max-age=60', 'Vary': 'Accept-Language'}),
+                       f"{language} #{count}".encode())
+        elif path == '/expired':
+            self._send(200, dict(date, Expires='Thu, 01 Jan 1970 00:00:00 GMT'), body)
+        else:
+            self._send(404, date, b'not found')
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._send(200, {}, b'ok')
+
+
+@pytest.fixture(scope='module')
+def cache_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _CacheHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cached(tmp_path):
+    _CacheHandler.hits = Counter()
+    _CacheHandler.conditional = []
+    cache = HttpCache(str(tmp_path / 'cache'))
+    transport = HttpTransport(cache=cache, max_retries=0)
+    yield transport
+    transport.close()
+
+
+def test_fresh_response_served_from_cache(cached, cache_server):
+    first = cached.get(f"{cache_server}/fresh")
+    second = cached.get(f"{cache_server}/fresh")
+    assert not first.from_cache and second.from_cache
+    assert second.text == first.text == '/fresh #1'
+    assert _CacheHandler.hits['/fresh'] == 1
+    assert cached.cache.stats()['hits'] == 1
+
+
+def test_request_no_cache_forces_revalidation(cached, cache_server):
+    cached.get(f"{cache_server}/fresh")
+    response = cached.get(f"{cache_server}/fresh", headers={'Cache-Control': 'no-cache'})
+    # 没有验证器，只能完整地重新请求
+    assert not response.from_cache and response.text == '/fresh #2'
+
+
+def test_no_store_is_never_cached(cached, cache_server):
+    cached.get(f"{cache_server}/nostore")
+    response = cached.get(f"{cache_server}/nostore")
+    assert not response.from_cache and response.text == '/nostore #2'
+    assert cached.cache.stats()['entries'] == 0
+
+
+def test_response_no_cache_revalidates_every_time(cached, cache_server):
+    cached.get(f"{cache_server}/nocache")
+    second = cached.get(f"{cache_server}/nocache")
+    third = cached.get(f"{cache_server}/nocache")
+    assert second.from_cache and third.from_cache
+    assert third.text == '/nocache #1'
+    assert _CacheHandler.hits['/nocache'] == 3
+    assert [c[1] for c in _CacheHandler.conditional] == ['"n1"', '"n1"']
+
+
+def test_etag_revalidation_merges_304_headers(cached, cache_server):
+    first = cached.get(f"{cache_server}/etag")
+    assert first.headers['X-Version'] == '1'
+
+    revalidated = cached.get(f"{cache_server}/etag")
+    assert revalidated.from_cache and revalidated.status_code == 200
+    assert revalidated.text == '/etag #1'
+    assert revalidated.headers['X-Version'] == '2'
+    assert cached.cache.stats()['revalidated'] == 1
+
+    # 304带来的 max-age=60 使条目重新变为新鲜，不再发请求
+    third = cached.get(f"{cache_server}/etag")
+    assert third.from_cache and third.headers['X-Version'] == '2'
+    assert _CacheHandler.hits['/etag'] == 2
+
+
+def test_last_modified_revalidation(cached, cache_server):
+    cached.get(f"{cache_server}/lastmod")
+    response = cached.get(f"{cache_server}/lastmod")
+    assert response.from_cache and response.text == '/lastmod #1'
+    assert _CacheHandler.conditional == [('/lastmod', None, LAST_MODIFIED)]
+
+
+def test_vary_keeps_variants_apart(cached, cache_server):
+    url = f"{cache_server}/vary"
+    zh = cached.get(url, headers={'Accept-Language': 'zh-CN'})
+    en = cached.get(url, headers={'Accept-Language': 'en'})
+    assert not en.from_cache and en.text.startswith('en')
+    # 缓存按URL只保存最近的变体，匹配时命中
+    again = cached.get(url, headers={'Accept-Language': 'en'})
+    assert again.from_cache and again.text == en.text
+    assert zh.text.startswith('zh-CN')
+
+
+def test_expired_without_validator_is_not_stored(cached, cache_server):
+    cached.get(f"{cache_server}/expired")
+    assert cached.cache.stats()['entries'] == 0
+
+
+def test_unsafe_method_invalidates_entry(cached, cache_server):
+    url = f"{cache_server}/fresh"
+    cached.get(url)
+    cached.request('POST', url, data=b'x')
+    assert not cached.get(url).from_cache
+
+
+def test_freshness_lifetime():
+    date = 'Mon, 01 Jan 2024 00:00:00 GMT'
+    assert freshness_lifetime({'Cache-Control': 'max-age=30', 'Expires': date}) == 30
+    assert freshness_lifetime({'Cache-Control': 'no-cache, max-age=30'}) == 0
+    assert freshness_lifetime({'Date': date, 'Expires': 'Mon, 01 Jan 2024 00:02:00 GMT'}) == 120
+    assert freshness_lifetime({'Date': date, 'Expires': 'invalid'}) == 0
+    # 启发式：距上次修改10天的10%
+    assert freshness_lifetime({'Date': date, 'Last-Modified': 'Fri, 22 Dec 2023 00:00:00 GMT'}) == 86400
+    assert freshness_lifetime({'Date': date, 'Last-Modified': 'Sun, 31 Dec 2023 00:00:00 GMT'}) == 8640
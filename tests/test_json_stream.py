@@ -0,0 +1,104 @@
+"""json_stream：任意块边界（转义序列、UTF-8多字节字符、数字）、跳过很大的字段和错误处理"""
+
+import io
+import json
+import time
+
+import pytest
+
+import json_stream
+from json_stream import iter_json_items, JSONStreamError
+
+
+DOC = {
+    'code': 0,
+    'msg': '成功 \\ "引号" é \U0001f600 \n\t',
+    'skip': {'nested': [1, '{[不是结构]}', {'s': 'a\\"b'}], 'n': -2.5e10},
+    'data': {
+        'total': 3,
+        'list': [
+            {'id': 1, 'title': '秀米 "排版"', 'tags': ['a\\b', ' ']},
+            {'id': 12345, 'score': -0.125e-3, 'ok': True, 'none': None},
+            '末尾 \U0001f600',
+        ],
+    },
+}
+
+
+def split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('ensure_ascii', [True, False])
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64])
+def test_any_chunk_boundary(ensure_ascii, size):
+    text = json.dumps(DOC, ensure_ascii=ensure_ascii)
+    expected = DOC['data']['list']
+    # 文本块：\\uXXXX、\\" 等转义序列被切开
+    assert list(iter_json_items(split(text, size), 'data.list')) == expected
+    # 字节块：UTF-8多字节字符被切开
+    assert list(iter_json_items(split(text.encode('utf-8'), size), 'data.list')) == expected
+
+
+def test_top_level_array_and_files():
+    data = [1, 22, 333, {'a': [1, 2]}, 'x']
+    text = json.dumps(data)
+    assert list(iter_json_items(io.StringIO(text), chunk_size=2)) == data
+    # 带BOM的UTF-8文件
+    assert list(iter_json_items(io.BytesIO(b'\xef\xbb\xbf' + text.encode()), chunk_size=3)) == data
+    assert list(iter_json_items([' [ ] '])) == []
+
+
+@pytest.mark.parametrize('size', [1, 3, 4096])
+def test_skip_big_values(size):
+    big = 'x' * 100000 + '\\"' + '秀' * 1000
+    text = '{"skip": "%s", "other": [["%s"], {"k": "%s"}], "data": {"list": [1, 2]}}' % (big, big, big)
+    chunks = split(text, size) if size > 1 else list(text[:200]) + split(text[200:], 4096)
+    assert list(iter_json_items(chunks, 'data.list')) == [1, 2]
+
+
+def test_big_strings_are_linear():
+    # 4MB字符串分成1KB的块：跳过和读取都只扫描新读入的部分
+    big = 'x' * (4 << 20)
+    skipped = json.dumps({'skip': big, 'list': [1]})
+    kept = json.dumps([big])
+    start = time.perf_counter()
+    assert list(iter_json_items(split(skipped, 1024), 'list')) == [1]
+    assert list(iter_json_items(split(kept, 1024))) == [big]
+    assert time.perf_counter() - start < 2
+
+
+def test_skipped_string_does_not_keep_buffer(monkeypatch):
+    sizes = []
+    fill = json_stream._Reader.fill
+
+    def record(reader, size=1):
+        sizes.append(len(reader.buf))
+        return fill(reader, size)
+
+    monkeypatch.setattr(json_stream._Reader, 'fill', record)
+    text = json.dumps({'skip': 'x' * 200000, 'list': [1]})
+    assert list(iter_json_items(split(text, 1000), 'list')) == [1]
+    assert max(sizes) <= 2000
+
+
+@pytest.mark.parametrize('text, path, message', [
+    ('{"data": {}}', 'data.list', '找不到路径: data.list'),
+    ('{"data": [1]}', 'data.list', '找不到路径: data.list'),
+    ('{"data": {"list": {}}}', 'data.list', '不是数组'),
+    ('[1, ', '', '意外的结尾'),
+    ('[1 2]', '', "应为 ',' 或 ']'"),
+    ('[{"a": }]', '', 'JSON格式错误'),
+    ('{"skip": "abc', 'list', '字符串没有结束'),
+    ('{"skip": [1, 2', 'list', '意外的结尾'),
+    ('{"bad\\x": 1}', 'list', '字符串格式错误'),
+    ('{1: 2}', 'list', '应为字符串'),
+])
+def test_errors(text, path, message):
+    with pytest.raises(JSONStreamError, match=message):
+        list(iter_json_items(split(text, 2), path))
+
+
+def test_invalid_utf8_raises():
+    with pytest.raises(UnicodeDecodeError):
+        list(iter_json_items([b'["\xff"]']))
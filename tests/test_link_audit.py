@@ -0,0 +1,26 @@
+"""link_audit：并发检查、耗时统计和链接检查专用限速"""
+
+from link_audit import LinkAuditor, AUDIT_HOST_LIMITS
+
+
+def test_latency_excludes_rate_limit_wait(local_server):
+    # 本机限速为每秒2次：第二、三个请求要排队等待，但等待时间不计入耗时
+    auditor = LinkAuditor(workers=3, host_limits={'127.0.0.1': (2.0, 1)})
+    urls = [f"{local_server}/page", f"{local_server}/redirect", f"{local_server}/missing"]
+    results = {r['url']: r for r in auditor.audit(urls)}
+
+    assert results[f"{local_server}/page"]['ok']
+    assert results[f"{local_server}/redirect"]['redirects'][0]['status'] == 302
+    assert results[f"{local_server}/missing"]['status'] == 404
+    assert auditor.transport.rate_limiter.total_wait >= 0.5
+    assert max(r['latency_ms'] for r in results.values()) < 400
+
+
+def test_auditor_uses_own_limiter():
+    from rate_limiter import get_default_limiter
+
+    auditor = LinkAuditor()
+    assert auditor.transport.rate_limiter is not get_default_limiter()
+    assert auditor.transport.rate_limiter.host_limits['img.xiumi.us'] == AUDIT_HOST_LIMITS['img.xiumi.us']
+    # 秀米页面和接口仍按默认限速
+    assert auditor.transport.rate_limiter.host_limits['xiumi.us'] == (2.0, 5)
@@ -0,0 +1,156 @@
+"""multi_account：账号隔离、并发上限和结果合并（用不启动浏览器的替身工作进程）"""
+
+import json
+import os
+import socket
+import sys
+import time
+
+import pytest
+
+import multi_account
+from multi_account import MultiAccountRunner, load_accounts
+
+
+# 替身工作进程：读取任务，等待一会儿，写入结果（记录开始和结束时间用于检查并发数）
+FAKE_WORKER = r'''
+import json, os, sys, time
+job = json.load(open(sys.argv[1], encoding='utf-8'))
+started = time.time()
+if job['name'] == '崩溃':
+    sys.exit(3)
+if job['name'] == '遗留浏览器':
+    # 模拟浏览器：独立会话中的进程，再带一个子进程；工作进程不响应SIGTERM，只能被强制结束
+    import signal, subprocess
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    browser = subprocess.Popen([sys.executable, '-c',
+                                'import subprocess, sys, time; '
+                                'child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"]); '
+                                'print(child.pid, flush=True); time.sleep(60)'],
+                               stdout=subprocess.PIPE, start_new_session=True)
+    child_pid = browser.stdout.readline().strip().decode()
+    open(os.path.join(job['output_dir'], 'pids.txt'), 'w').write(f"{browser.pid} {child_pid}")
+    open(os.path.join(job['output_dir'], 'browser.pid'), 'w').write(str(browser.pid))
+    time.sleep(60)
+time.sleep(30 if job['name'] == '超时' else 0.4)
+codes = {f"{job['name']} 文章": f"XM-{job['port']}"}
+result = {'name': job['name'], 'status': 'ok', 'count': 1, 'codes': codes,
+          'records': [{'article_id': 'article_0', 'title': f"{job['name']} 文章", 'code': f"XM-{job['port']}"}],
+          'elapsed': time.time() - started, 'error': None,
+          'window': [started, time.time()], 'vault': os.environ['XIUMI_COOKIE_VAULT']}
+json.dump(result, open(os.path.join(job['output_dir'], 'result.json'), 'w', encoding='utf-8'))
+'''
+
+
+class FakeWorkerRunner(MultiAccountRunner):
+    def worker_command(self, job_path):
+        return [sys.executable, '-c', FAKE_WORKER, job_path]
+
+
+def make_runner(tmp_path, names, **kwargs):
+    accounts = [{'name': name, 'browser': 'chrome', 'browser_path': None, 'headless': None} for name in names]
+    return FakeWorkerRunner(accounts, output_root=str(tmp_path / 'out'), profile_root=str(tmp_path / 'profiles'),
+                            **kwargs)
+
+
+def test_load_accounts(tmp_path):
+    path = tmp_path / 'accounts.json'
+    path.write_text(json.dumps({'accounts': ['编辑部', {'name': '市场部', 'browser': 'chrome', 'headless': True}]}),
+                    encoding='utf-8')
+    accounts = load_accounts(str(path))
+    assert [a['name'] for a in accounts] == ['编辑部', '市场部']
+    assert accounts[0]['browser'] == 'edge' and accounts[0]['headless'] is None
+    assert accounts[1]['headless'] is True
+
+    path.write_text(json.dumps(['编辑部', '编辑部']), encoding='utf-8')
+    with pytest.raises(ValueError):
+        load_accounts(str(path))
+
+
+def test_plan_isolates_accounts_and_skips_busy_ports(tmp_path):
+    with socket.socket() as busy:
+        busy.bind(('127.0.0.1', 0))
+        busy.listen()
+        port = busy.getsockname()[1]
+        jobs = make_runner(tmp_path, ['编辑部', '市场部/上海'], base_port=port, headless=True).plan()
+
+    assert port not in [job['port'] for job in jobs]
+    assert len({job['port'] for job in jobs}) == 2
+    assert len({job['user_data_dir'] for job in jobs}) == 2
+    assert len({job['output_dir'] for job in jobs}) == 2
+    assert jobs[1]['user_data_dir'].endswith('市场部_上海/browser')
+    assert all(job['headless'] for job in jobs)
+
+
+def test_run_merges_results_within_concurrency_limit(tmp_path):
+    runner = make_runner(tmp_path, ['A', 'B', 'C', '崩溃'], concurrency=2, base_port=9400)
+    report = runner.run()
+
+    by_name = {account['name']: account for account in report['accounts']}
+    assert [by_name[name]['status'] for name in ['A', 'B', 'C', '崩溃']] == ['ok', 'ok', 'ok', 'failed']
+    assert '退出码 3' in by_name['崩溃']['error']
+    assert report['total_count'] == 3
+    assert set(report['codes']) == {'A', 'B', 'C', '崩溃'}
+    assert {record['account'] for record in report['records']} == {'A', 'B', 'C'}
+
+    # 每个账号使用自己的Cookie保管库；同时运行的进程数不超过上限
+    results = [json.load(open(f"{account['output']}/result.json", encoding='utf-8'))
+               for account in report['accounts'] if account['status'] == 'ok']
+    assert len({result['vault'] for result in results}) == 3
+    events = sorted([(w[0], 1) for w in (r['window'] for r in results)] +
+                    [(w[1], -1) for w in (r['window'] for r in results)])
+    running = peak = 0
+    for _, delta in events:
+        running += delta
+        peak = max(peak, running)
+    assert peak <= 2
+    assert report['elapsed'] < report['serial_elapsed'] + 1
+
+    path = runner.write_report(report)
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)['total_count'] == 3
+
+
+def test_run_account_timeout(tmp_path):
+    runner = make_runner(tmp_path, ['超时'], timeout=0.5, base_port=9400)
+    report = runner.run()
+    assert report['accounts'][0]['status'] == 'timeout'
+    assert report['accounts'][0]['elapsed'] < 20
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # 已结束但还没被回收的进程
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except OSError:
+        return True
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="用进程组模拟浏览器")
+def test_timeout_kills_orphaned_browser_tree(tmp_path, monkeypatch):
+    # 工作进程不响应SIGTERM，不必等满15秒
+    monkeypatch.setattr(multi_account, 'WORKER_STOP_TIMEOUT', 0.5)
+    runner = make_runner(tmp_path, ['遗留浏览器'], timeout=1.5, base_port=9400)
+    report = runner.run()
+
+    account = report['accounts'][0]
+    assert account['status'] == 'timeout'
+    with open(os.path.join(account['output'], 'pids.txt')) as f:
+        pids = [int(pid) for pid in f.read().split()]
+    deadline = time.monotonic() + 5
+    while any(_alive(pid) for pid in pids) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not any(_alive(pid) for pid in pids)
+    assert not os.path.exists(os.path.join(account['output'], multi_account.BROWSER_PID_FILE))
+
+
+def test_main_rejects_bad_account_file(tmp_path, capsys):
+    path = tmp_path / 'accounts.json'
+    path.write_text('[]', encoding='utf-8')
+    assert multi_account.main(['run', str(path)]) == 2
+    assert '读取账号列表失败' in capsys.readouterr().out
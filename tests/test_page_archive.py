@@ -0,0 +1,105 @@
+"""page_archive：内容寻址去重、压缩、按URL和时间查询、保留策略和索引一致性"""
+
+import gzip
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from page_archive import PageArchive
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = PageArchive(str(tmp_path / 'archive'))
+    yield archive
+    archive.close()
+
+
+def object_files(archive):
+    return sorted(os.path.join(d, f) for d, _, files in os.walk(archive.objects_dir) for f in files)
+
+
+def test_put_is_content_addressed_and_deduplicated(archive):
+    html = '<html><body>秀米</body></html>'
+    first = archive.put('https://xiumi.us/a', html)
+    second = archive.put('https://xiumi.us/b', html)
+
+    digest = hashlib.sha256(html.encode('utf-8')).hexdigest()
+    assert first['digest'] == second['digest'] == digest
+    assert not first['deduplicated'] and second['deduplicated']
+    assert first['path'].endswith(os.path.join(digest[:2], digest + '.gz'))
+    with open(first['path'], 'rb') as f:
+        assert gzip.decompress(f.read()).decode('utf-8') == html
+    assert object_files(archive) == [first['path']]
+    assert archive.stats() == {'captures': 2, 'urls': 2, 'objects': 1,
+                               'size': len(html.encode('utf-8')), 'stored_size': first['stored_size']}
+
+
+def test_missing_object_file_is_rewritten(archive):
+    record = archive.put('https://xiumi.us/a', 'page')
+    os.remove(record['path'])
+    assert archive.get(record['digest']) is None
+    again = archive.put('https://xiumi.us/a', 'page')
+    assert not again['deduplicated']
+    assert archive.get(record['digest']) == 'page'
+
+
+def test_history_latest_and_time_range(archive):
+    url = 'https://xiumi.us/a'
+    archive.put(url, 'v1', captured_at=datetime(2024, 1, 1))
+    archive.put(url, 'v2', captured_at=datetime(2024, 2, 1))
+    archive.put('https://xiumi.us/other', 'x', captured_at=datetime(2024, 3, 1))
+
+    assert [archive.get(r['digest']) for r in archive.history(url)] == ['v2', 'v1']
+    assert archive.read_latest(url) == 'v2'
+    assert archive.read_latest('https://xiumi.us/none') is None
+    between = archive.captures_between(datetime(2024, 1, 15), datetime(2024, 2, 15))
+    assert [r['captured_at'] for r in between] == ['2024-02-01T00:00:00']
+
+
+def test_keep_per_url_prunes_and_collects_garbage(tmp_path):
+    with PageArchive(str(tmp_path / 'archive'), keep_per_url=2) as archive:
+        url = 'https://xiumi.us/a'
+        shared = archive.put('https://xiumi.us/b', 'v1')
+        for i, content in enumerate(['v1', 'v2', 'v3']):
+            archive.put(url, content, captured_at=datetime(2024, 1, 1 + i))
+
+        assert [archive.get(r['digest']) for r in archive.history(url)] == ['v3', 'v2']
+        # v1 仍被另一个URL引用，对象保留
+        assert archive.get(shared['digest']) == 'v1'
+        assert archive.stats()['objects'] == 3
+
+        archive.put('https://xiumi.us/b', 'v4')
+        archive.put('https://xiumi.us/b', 'v5')
+        # b 的 v1 被清理后不再有引用，对象文件和索引一起删除
+        assert archive.get(shared['digest']) is None
+        assert not os.path.exists(shared['path'])
+        assert len(object_files(archive)) == archive.stats()['objects'] == 4
+
+
+def test_max_age_prune(tmp_path):
+    with PageArchive(str(tmp_path / 'archive'), max_age_days=30) as archive:
+        old = archive.put('https://xiumi.us/a', 'old', captured_at=datetime.now() - timedelta(days=60))
+        archive.put('https://xiumi.us/a', 'new')
+        assert [archive.get(r['digest']) for r in archive.history('https://xiumi.us/a')] == ['new']
+        assert not os.path.exists(old['path'])
+
+
+def test_index_persists_across_reopen(tmp_path):
+    root = str(tmp_path / 'archive')
+    with PageArchive(root, compression='none') as archive:
+        record = archive.put('https://xiumi.us/a', 'plain')
+    with PageArchive(root) as archive:
+        # 按对象自己的压缩方式读取，与当前设置无关
+        assert archive.read_latest('https://xiumi.us/a') == 'plain'
+        assert archive.put('https://xiumi.us/a', 'plain')['deduplicated']
+        assert archive.latest('https://xiumi.us/a')['compression'] == 'none'
+    with open(record['path'], 'rb') as f:
+        assert f.read() == b'plain'
+
+
+def test_rejects_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        PageArchive(str(tmp_path / 'archive'), compression='brotli')
@@ -0,0 +1,80 @@
+"""page_lines：行偏移与 str.splitlines 一致、行首行尾的命中、非UTF-8编码的搜索"""
+
+import pytest
+
+from page_lines import PageLines
+
+
+def expected_hits(text, term):
+    """与 simple_html.search_in_page 相同的规则：按行、不区分大小写、每行只算一次"""
+    return [(i, line.strip()) for i, line in enumerate(text.splitlines(), 1) if term.lower() in line.lower()]
+
+
+@pytest.mark.parametrize('text', [
+    '',
+    '\n',
+    'one line',
+    'a\nb\n',
+    'a\r\nb\rc\n\nd',
+    '\r\n\r\n',
+    '秀米\n编辑器\r\n',
+])
+def test_lines_match_splitlines(text):
+    page = PageLines.from_text(text)
+    assert list(page) == text.splitlines()
+    assert len(page) == len(text.splitlines())
+    assert page[:] == text.splitlines()
+    assert str(page) == text and bytes(page) == text.encode('utf-8')
+
+
+def test_index_and_slice():
+    page = PageLines.from_text('a\nb\nc')
+    assert page[0] == 'a' and page[-1] == 'c'
+    assert page[1:] == ['b', 'c'] and page[::2] == ['a', 'c']
+    with pytest.raises(IndexError):
+        page[3]
+    with pytest.raises(IndexError):
+        page[-4]
+
+
+def test_search_at_line_boundaries():
+    # 关键词在首行开头、行尾紧挨换行符、最后一行没有换行，以及同一行多次出现
+    text = 'xiumi 开头\r\n中间 Xiumi\r\n跨行 xiu\nmi 不算\nXIUMI xiumi 两次\n结尾 xiumi'
+    page = PageLines.from_text(text)
+    assert page.search('xiumi') == expected_hits(text, 'xiumi')
+    assert [line for line, _ in page.search('xiumi')] == [1, 2, 5, 6]
+    assert page.search('xiu\nmi') == []
+    assert page.contains('XiUmI') and not page.contains('不存在')
+
+
+def test_search_non_ascii_case_insensitive():
+    text = '<p>ÉDITION 秀米</p>\n<p>édition</p>\n<p>edition</p>'
+    page = PageLines.from_text(text)
+    assert page.search('Édition') == expected_hits(text, 'Édition')
+    assert page.search('秀米') == [(1, '<p>ÉDITION 秀米</p>')]
+
+
+def test_single_byte_and_multibyte_encodings():
+    text = '第一行\n秀米 Xiumi\n第三行'
+    gbk = PageLines(text.encode('gbk'), 'GBK')
+    assert gbk.encoding == 'gbk'
+    assert list(gbk) == text.splitlines()
+    assert gbk.search('xiumi') == [(2, '秀米 Xiumi')]
+    # 关键词无法用页面编码表示时不命中
+    assert gbk.search('😀') == []
+    assert bytes(gbk) == text.encode('utf-8')
+
+
+def test_utf16_is_converted_to_utf8():
+    text = '第一行\n秀米\n'
+    page = PageLines(text.encode('utf-16'), 'utf-16')
+    assert page.encoding == 'utf-8'
+    assert list(page) == ['第一行', '秀米']
+    assert page.search('秀米') == [(2, '秀米')]
+
+
+def test_line_offsets_computed_lazily():
+    page = PageLines.from_text('a\nb')
+    assert page._starts is None
+    assert page.contains('b') and page._starts is None
+    assert len(page) == 2 and list(page._starts) == [0, 2]
@@ -0,0 +1,35 @@
+"""profiling：--profile 包装、输出文件和按模块汇总"""
+
+import os
+import sys
+
+import profiling
+from text_extract import html_to_text
+
+
+def test_module_of():
+    assert profiling.module_of(profiling.__file__) == ('profiling', True)
+    assert profiling.module_of(os.__file__) == ('os', False)
+    assert profiling.module_of('~') == ('(内置)', False)
+
+
+def test_run_without_profile_flag_calls_main(monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['tool.py', '--other'])
+    assert profiling.run_with_profiling(lambda: sys.argv[1:], 'tool') == ['--other']
+
+
+def test_run_with_profile_writes_files(tmp_path, monkeypatch, capsys):
+    html = '<p>秀米排版示例文字</p>' * 5000
+
+    def main():
+        return len(html_to_text(html))
+
+    monkeypatch.setattr(sys, 'argv', ['tool.py', '--profile', '--profile-dir', str(tmp_path), '--keep'])
+    assert profiling.run_with_profiling(main, 'tool') > 0
+    # 分析选项不会传给main
+    assert sys.argv[1:] == ['--keep']
+    names = sorted(os.listdir(tmp_path))
+    assert [os.path.splitext(n)[1] for n in names] == ['.txt', '.pstats']
+    out = capsys.readouterr().out
+    assert 'text_extract' in out
+    assert '性能分析' in out
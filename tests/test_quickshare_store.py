@@ -0,0 +1,128 @@
+"""quickshare_store：记录、导入历史JSON文件和按文章查询"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+import quickshare_store
+from quickshare_store import QuickShareStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = QuickShareStore(str(tmp_path / 'quickshare.db'))
+    yield store
+    store.close()
+
+
+def write_codes_file(path, codes, timestamp):
+    data = {'timestamp': timestamp, 'total_count': len(codes), 'codes': codes}
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+def test_latest_and_history(store):
+    store.add_run([{'article_id': 'a1', 'title': '测试文章 1', 'code': 'OLD'}],
+                  started_at=datetime(2024, 1, 1))
+    run_id = store.add_run([{'article_id': 'a1', 'title': '测试文章 1', 'code': 'NEW'},
+                            {'article_id': 'a2', 'title': '测试文章 1', 'code': 'OTHER'}],
+                           account='编辑部', started_at=datetime(2024, 2, 1))
+
+    assert store.latest('a1')['code'] == 'NEW'
+    assert store.latest('a1')['run_id'] == run_id
+    # 同名文章按ID区分，不会互相覆盖
+    assert store.latest('a2')['code'] == 'OTHER'
+    assert [row['code'] for row in store.history('测试文章 1')] == ['OTHER', 'NEW', 'OLD']
+    assert len(store.history('测试文章 1', limit=1)) == 1
+    assert store.latest('不存在') is None
+    assert store.runs()[0]['account'] == '编辑部'
+    assert store.stats() == {'runs': 2, 'codes': 3, 'titles': 1}
+
+
+def test_records_without_article_id_keyed_by_title_and_account(store):
+    store.add_run([{'article_id': None, 'title': '周报', 'code': 'A-1'}], account='账号A',
+                  started_at=datetime(2024, 1, 1))
+    store.add_run([{'article_id': None, 'title': '周报', 'code': 'B-1'}], account='账号B',
+                  started_at=datetime(2024, 2, 1))
+
+    assert store.run_codes(store.runs()[0]['id'])[0]['article_id'] is None
+    assert store.latest('周报')['code'] == 'B-1'
+    assert store.latest('周报', account='账号A')['code'] == 'A-1'
+    assert [row['code'] for row in store.history('周报', account='账号B')] == ['B-1']
+    # 两个账号的同名文章分别返回
+    assert [(row['account'], row['code']) for row in store.search('周报')] == [('账号A', 'A-1'), ('账号B', 'B-1')]
+    assert [row['code'] for row in store.search('周报', account='账号A')] == ['A-1']
+
+
+def test_legacy_positional_ids_cleared(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    with QuickShareStore(path) as store:
+        store.add_run([{'article_id': 'article_3', 'title': '旧记录', 'code': 'X'},
+                       {'article_id': 'a1', 'title': '有ID', 'code': 'Y'}])
+    with QuickShareStore(path) as store:
+        assert store.latest('旧记录')['article_id'] is None
+        assert store.latest('article_3') is None
+        assert store.latest('a1')['code'] == 'Y'
+
+
+def test_queries_use_indexes(store):
+    for table_query in ("SELECT * FROM codes WHERE article_id = 'a' ORDER BY fetched_at DESC",
+                        "SELECT * FROM codes WHERE title = 't' ORDER BY fetched_at DESC"):
+        plan = ' '.join(row[3] for row in store.db.execute('EXPLAIN QUERY PLAN ' + table_query))
+        assert 'USING INDEX' in plan
+
+
+def test_search_returns_latest_per_title(store):
+    store.add_run([{'title': '春季_活动', 'code': 'A1'}, {'title': '夏季活动', 'code': 'B1'}],
+                  started_at=datetime(2024, 1, 1))
+    store.add_run([{'title': '春季_活动', 'code': 'A2'}], started_at=datetime(2024, 3, 1))
+
+    rows = store.search('活动')
+    assert [(row['title'], row['code']) for row in rows] == [('夏季活动', 'B1'), ('春季_活动', 'A2')]
+    # 通配符按字面匹配
+    assert [row['title'] for row in store.search('_')] == ['春季_活动']
+
+
+def test_import_paths_skips_already_imported(store, tmp_path):
+    write_codes_file(tmp_path / 'xiumi_quickshare_codes_20240101_100000.json',
+                     {'测试文章 1': 'XM-0001', '测试文章 2': 'XM-0002'}, '2024-01-01T10:00:00')
+    write_codes_file(tmp_path / 'xiumi_quickshare_codes_20240201_100000.json',
+                     {'测试文章 1': 'XM-1001'}, '2024-02-01T10:00:00')
+    (tmp_path / 'xiumi_quickshare_codes_broken.json').write_text('{', encoding='utf-8')
+
+    result = store.import_paths([str(tmp_path)])
+    assert result == {'files': 2, 'skipped': 0, 'codes': 3, 'errors': 1}
+    assert store.latest('测试文章 1')['code'] == 'XM-1001'
+    assert store.latest('测试文章 2')['fetched_at'] == '2024-01-01T10:00:00'
+
+    result = store.import_paths([str(tmp_path)])
+    assert result['files'] == 0 and result['skipped'] == 2
+    assert store.stats()['codes'] == 3
+
+
+def test_fetcher_records_to_store(fetcher, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fetcher.store_path = str(tmp_path / 'quickshare.db')
+    fetcher.account = '测试账号'
+    records = [{'article_id': None, 'title': '测试文章 0', 'code': 'XM-0000'}]
+    run_id = fetcher.save_codes_to_store(records)
+
+    with QuickShareStore(fetcher.store_path) as store:
+        assert store.run_codes(run_id)[0]['code'] == 'XM-0000'
+        assert store.runs()[0]['account'] == '测试账号'
+
+
+def test_cli(tmp_path, capsys):
+    db = str(tmp_path / 'cli.db')
+    write_codes_file(tmp_path / 'xiumi_quickshare_codes_20240101_100000.json',
+                     {'测试文章 7': 'XM-0007'}, '2024-01-01T10:00:00')
+
+    quickshare_store.main(['--db', db, 'import', str(tmp_path)])
+    assert '导入 1 个文件，1 个另存码' in capsys.readouterr().out
+    quickshare_store.main(['--db', db, 'latest', '测试文章 7'])
+    assert 'XM-0007' in capsys.readouterr().out
+    quickshare_store.main(['--db', db, 'search', '文章'])
+    assert '找到 1 篇文章' in capsys.readouterr().out
+    quickshare_store.main(['--db', db, 'latest', '不存在'])
+    assert '没有找到' in capsys.readouterr().out
@@ -0,0 +1,117 @@
+"""rate_limiter：urllib3内部重试和重定向同样按主机取令牌（本地桩服务器）"""
+
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from http_transport import HttpTransport
+from rate_limiter import RateLimiter, RateLimitedAdapter, RateLimitedRetry, DEFAULT_HOST_LIMITS
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    """/flaky 前两次返回503，/moved 重定向到 /flaky"""
+    protocol_version = 'HTTP/1.1'
+    hits: Counter = Counter()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        count = self.hits[self.path] = self.hits[self.path] + 1
+        if self.path == '/moved':
+            self.send_response(302)
+            self.send_header('Location', '/flaky')
+            body = b''
+        elif self.path == '/flaky' and count <= 2:
+            self.send_response(503)
+            body = b'busy'
+        else:
+            self.send_response(200)
+            body = b'ok'
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _CountingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__(default_rate=None, host_limits={})
+        self.acquired = []
+
+    def acquire(self, url):
+        self.acquired.append(url)
+        return super().acquire(url)
+
+
+@pytest.fixture(scope='module')
+def flaky_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FlakyHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def limited():
+    _FlakyHandler.hits = Counter()
+    limiter = _CountingLimiter()
+    transport = HttpTransport(max_retries=3, backoff_factor=0, backoff_jitter=0, rate_limiter=limiter)
+    yield transport, limiter
+    transport.close()
+
+
+def test_each_retry_takes_a_token(limited, flaky_server):
+    transport, limiter = limited
+    response = transport.get(f"{flaky_server}/flaky")
+
+    assert response.status_code == 200
+    assert _FlakyHandler.hits['/flaky'] == 3
+    assert limiter.acquired == [f"{flaky_server}/flaky"] * 3
+
+
+def test_redirect_and_its_retries_take_tokens(limited, flaky_server):
+    transport, limiter = limited
+    response = transport.get(f"{flaky_server}/moved")
+
+    assert response.status_code == 200
+    assert limiter.acquired == [f"{flaky_server}/moved"] + [f"{flaky_server}/flaky"] * 3
+
+
+def test_retries_wait_for_host_budget(flaky_server):
+    _FlakyHandler.hits = Counter()
+    limiter = RateLimiter(host_limits={'127.0.0.1': (20.0, 1)})
+    transport = HttpTransport(max_retries=3, backoff_factor=0, backoff_jitter=0, rate_limiter=limiter)
+    try:
+        assert transport.get(f"{flaky_server}/flaky").status_code == 200
+    finally:
+        transport.close()
+    # 突发只有1个：第二、三次尝试都要等待令牌
+    assert limiter.waits == 2
+
+
+def test_adapter_binds_its_limiter_to_retry():
+    limiter = RateLimiter()
+    adapter = RateLimitedAdapter(rate_limiter=limiter, max_retries=RateLimitedRetry(total=2))
+    assert adapter.max_retries.rate_limiter is limiter
+    assert adapter.max_retries.total == 2
+
+
+def test_only_configured_hosts_are_limited_by_default():
+    limiter = RateLimiter()
+    assert set(DEFAULT_HOST_LIMITS) == {'xiumi.us'}
+    # 未配置的主机不限速，突发再多也不用等待
+    assert all(limiter.reserve('https://example.com/a') == 0 for _ in range(100))
+    # 秀米主机及子域名共用一个桶：突发5次之后开始排队
+    waits = [limiter.reserve(f'https://{host}/a') for host in ('xiumi.us', 'img.xiumi.us') * 3]
+    assert waits[:5] == [0] * 5 and waits[5] > 0
+
+
+def test_set_default_limit():
+    limiter = RateLimiter()
+    limiter.set_default_limit(1.0, 2)
+    waits = [limiter.reserve('https://example.com/a') for _ in range(3)]
+    assert waits[:2] == [0, 0] and waits[2] > 0
@@ -0,0 +1,136 @@
+"""render_service：浏览器池的空位回收和网络空闲判断（替身驱动，不启动浏览器）"""
+
+import json
+
+import pytest
+
+import render_service
+from render_service import BrowserPool, NetworkTracker, wait_for_network_idle
+
+
+class StubDriver:
+    """只实现浏览器池和网络空闲判断用到的方法"""
+
+    def __init__(self, resource_counts=None, log_batches=None):
+        self.resource_counts = list(resource_counts or [])
+        self.log_batches = list(log_batches or [])
+        self.quit_called = False
+
+    def execute_script(self, script, *args):
+        if self.resource_counts:
+            return self.resource_counts.pop(0) if len(self.resource_counts) > 1 else self.resource_counts[0]
+        return 1
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {}
+
+    def get_log(self, name):
+        return self.log_batches.pop(0) if self.log_batches else []
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+def network_event(method, request_id):
+    return {'message': json.dumps({'message': {'method': method, 'params': {'requestId': request_id}}})}
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(render_service.time, 'sleep', lambda seconds: None)
+
+
+def test_lease_keeps_slot_when_replacement_fails(monkeypatch):
+    created = []
+
+    def create(browser, browser_path):
+        if len(created) == 1:
+            raise RuntimeError("浏览器启动失败")
+        created.append(StubDriver())
+        return created[-1]
+
+    monkeypatch.setattr(render_service, 'create_headless_driver', create)
+    pool = BrowserPool(size=1)
+    pool.start()
+
+    # 使用中出错，替换浏览器失败：空位仍然归还
+    with pytest.raises(render_service.WebDriverException):
+        with pool.lease(timeout=1):
+            raise render_service.WebDriverException("页面崩溃")
+    assert created[0].quit_called
+    assert pool._idle.qsize() == 1
+
+    # 下次租用时重新创建；再次失败时空位也不会丢失
+    with pytest.raises(RuntimeError):
+        with pool.lease(timeout=1):
+            pass
+    assert pool._idle.qsize() == 1
+
+    monkeypatch.setattr(render_service, 'create_headless_driver', lambda browser, path: StubDriver())
+    with pool.lease(timeout=1) as driver:
+        assert isinstance(driver, StubDriver)
+    assert pool._idle.qsize() == 1
+
+
+def test_network_idle_waits_for_in_flight_requests(no_sleep):
+    # 资源数一直不变，但请求1要到第4次检查时才完成
+    driver = StubDriver(resource_counts=[10], log_batches=[
+        [network_event('Network.requestWillBeSent', '1')], [], [],
+        [network_event('Network.loadingFinished', '1')],
+    ])
+    tracker = NetworkTracker(driver)
+    assert wait_for_network_idle(driver, timeout=5, idle_seconds=0, tracker=tracker)
+    assert not tracker.pending
+    assert not driver.log_batches
+
+
+def test_network_idle_times_out_with_pending_request(no_sleep):
+    driver = StubDriver(resource_counts=[10], log_batches=[[network_event('Network.requestWillBeSent', '1')]])
+    assert not wait_for_network_idle(driver, timeout=0.05, idle_seconds=0, tracker=NetworkTracker(driver))
+
+
+def test_network_tracker_without_performance_log():
+    class NoLogDriver(StubDriver):
+        def get_log(self, name):
+            raise RuntimeError("不支持performance日志")
+
+    tracker = NetworkTracker(NoLogDriver())
+    tracker.update()
+    assert not tracker.available and not tracker.pending
+
+
+class CookieDriver(StubDriver):
+    """记录通过DevTools写入的Cookie，page_source 返回当前带上的Cookie"""
+
+    def __init__(self):
+        super().__init__()
+        self.cookies = {}
+
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == 'Network.setCookie':
+            self.cookies[params['name']] = params['value']
+        elif cmd == 'Network.clearBrowserCookies':
+            self.cookies.clear()
+        return {}
+
+    def set_page_load_timeout(self, timeout):
+        pass
+
+    @property
+    def page_source(self):
+        return json.dumps(self.cookies)
+
+
+def test_render_cookies_do_not_leak_to_next_lease(monkeypatch, no_sleep):
+    monkeypatch.setattr(render_service, 'create_headless_driver', lambda browser, path: CookieDriver())
+    pool = BrowserPool(size=1)
+
+    with_cookies = pool.render('http://127.0.0.1/a', cookies={'sid': 'first-user'}, timeout=1)
+    without_cookies = pool.render('http://127.0.0.1/a', timeout=1)
+
+    assert json.loads(with_cookies) == {'sid': 'first-user'}
+    assert json.loads(without_cookies) == {}
+    assert len(pool._drivers) == 1
@@ -0,0 +1,77 @@
+"""simple_html：获取页面、搜索和保存"""
+
+import os
+
+import simple_html
+from page_lines import PageLines
+
+
+def test_cookie_dict():
+    assert simple_html.cookie_dict('a=1; b=x=y') == {'a': '1', 'b': 'x=y'}
+    assert simple_html.cookie_dict({'sid': 's'}) == {'sid': 's'}
+    assert simple_html.cookie_dict(None) == {}
+
+
+def test_get_full_page_lines(local_server):
+    page, html = simple_html.get_full_page_lines_with_cookies(f"{local_server}/page", wait_seconds=0)
+    assert isinstance(page, PageLines)
+    assert page is html
+    assert '秀米图文 - 基准测试页面' in str(page)
+    assert len(page) > 200
+
+
+def test_get_full_page_lines_error_status(local_server):
+    lines, html = simple_html.get_full_page_lines_with_cookies(f"{local_server}/missing", wait_seconds=0)
+    assert html is None
+    assert '404' in lines[0]
+
+
+def test_get_full_page_lines_cookies_only_for_xiumi(local_server, monkeypatch):
+    from requests import Request
+    from requests.cookies import get_cookie_header
+    from http_transport import get_shared_transport
+
+    transport = get_shared_transport()
+    shared_jar = transport.session.cookies
+    before = len(shared_jar)
+    page, _ = simple_html.get_full_page_lines_with_cookies(f"{local_server}/echo", cookies='sid=abc', wait_seconds=0)
+    # 传入的Cookie限定秀米域名：不会发给其他主机，也不写入共用会话
+    assert 'sid=abc' not in str(page)
+    assert len(shared_jar) == before
+
+    sent = []
+    get = transport.get
+    monkeypatch.setattr(transport, 'get', lambda url, **kwargs: sent.append(kwargs['cookies']) or get(url, **kwargs))
+    simple_html.get_full_page_lines_with_cookies(f"{local_server}/echo", cookies={'sid': 'abc'}, wait_seconds=0)
+    jar = sent[0]
+    assert get_cookie_header(jar, Request('GET', 'https://xiumi.us/')) == 'sid=abc'
+    assert get_cookie_header(jar, Request('GET', 'https://www.xiumi.us/board')) == 'sid=abc'
+    assert get_cookie_header(jar, Request('GET', 'https://evil.example/')) is None
+
+
+def test_search_in_page(local_server, no_input):
+    page, _ = simple_html.get_full_page_lines_with_cookies(f"{local_server}/page", wait_seconds=0)
+    matches = simple_html.search_in_page(page, '小标题 42')
+    assert len(matches) == 1
+    assert '小标题 42' in matches[0][1]
+    assert simple_html.search_in_page(page, '不存在的关键词') == []
+
+
+def test_search_in_plain_lines(no_input):
+    lines = ['<p>Hello</p>', '<p>hello world</p>', '<p>bye</p>']
+    assert simple_html.search_in_page(lines, 'HELLO') == [(1, '<p>Hello</p>'), (2, '<p>hello world</p>')]
+
+
+def test_save_html_file(tmp_path):
+    page = PageLines.from_text('<html><body>秀米</body></html>\n')
+    path = simple_html.save_html_file(page, 'https://xiumi.us/a', save_dir=str(tmp_path))
+    with open(path, 'rb') as f:
+        assert f.read() == bytes(page)
+
+
+def test_save_search_results(tmp_path):
+    path = simple_html.save_search_results([(3, '<p>秀米 Xiumi</p>')], 'xiumi', save_dir=str(tmp_path))
+    with open(path, encoding='utf-8') as f:
+        content = f.read()
+    assert '<span class="highlight">Xiumi</span>' in content
+    assert os.path.basename(path).startswith('search_results_xiumi_')
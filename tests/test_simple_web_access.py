@@ -0,0 +1,98 @@
+"""SimpleWebAccess：请求、解析、提取和保存"""
+
+import json
+
+import pytest
+
+from simple_web_access import SimpleWebAccess
+
+
+@pytest.fixture
+def web(transport, cookie_vault):
+    return SimpleWebAccess(cookie_vault=cookie_vault, transport=transport)
+
+
+def test_get_page_and_parse(web, local_server):
+    response = web.get_page(f"{local_server}/page")
+    assert response.status_code == 200
+    soup = web.parse_html(response)
+    assert soup.title.text == '秀米图文 - 基准测试页面'
+    partial = web.parse_html(response, tags=['title', 'meta'])
+    assert partial.find('section') is None
+
+
+def test_get_page_not_found(web, local_server):
+    assert web.get_page(f"{local_server}/missing") is None
+
+
+def test_get_page_follows_redirect(web, local_server):
+    response = web.get_page(f"{local_server}/redirect")
+    assert response.url == f"{local_server}/page"
+
+
+def test_cache_does_not_touch_shared_transport(cookie_vault, tmp_path):
+    from http_cache import HttpCache
+    from http_transport import get_shared_transport
+
+    cache = HttpCache(str(tmp_path / 'cache'))
+    web = SimpleWebAccess(cookie_vault=cookie_vault, cache=cache)
+    assert web.transport is not get_shared_transport() and web.transport.cache is cache
+    assert get_shared_transport().cache is None
+
+def test_other_vault_does_not_touch_shared_session(cookie_vault):
+    from cookie_vault import CookieVault
+    from http_transport import get_shared_transport
+
+    shared = get_shared_transport()
+    cookie_vault.store_dict({'sid': 'other-account'})
+    web = SimpleWebAccess(cookie_vault=cookie_vault)
+    # 其他保管库的Cookie只加载到独立的传输层
+    assert web.transport is not shared
+    assert web.session.cookies.get('sid') == 'other-account'
+    assert 'other-account' not in shared.session.cookies.values()
+    # 默认保管库仍使用共用传输层
+    assert SimpleWebAccess(cookie_vault=CookieVault()).transport is shared
+
+
+def test_post_data(web, local_server):
+    response = web.post_data(f"{local_server}/create", json_data={'title': '秀米'})
+    assert response.status_code == 201
+    assert json.loads(response.json()['body']) == {'title': '秀米'}
+
+
+def test_extract_links(web, local_server):
+    soup = web.parse_html(web.get_page(f"{local_server}/page"))
+    links = web.extract_links(soup, base_url=local_server)
+    assert len(links) == 400
+    assert links[0]['url'] == f"{local_server}/article/0"
+    assert links[0]['title'] == '文章0'
+
+
+def test_extract_text(web, local_server):
+    soup = web.parse_html(web.get_page(f"{local_server}/page"))
+    text = web.extract_text(soup)
+    assert '第199段' in text
+    assert 'console.log' not in text
+    assert ''.join(web.extract_text(soup, stream=True)) == text
+
+
+def test_get_page_info(web, local_server):
+    info = web.get_page_info(f"{local_server}/page")
+    assert info['status_code'] == 200
+    assert info['description'] == '用于性能测试的秀米图文页面'
+    assert info['links_count'] == 400
+    assert info['images_count'] == 200
+    meta = web.get_page_info(f"{local_server}/page", metadata_only=True)
+    assert meta['keywords'] == '秀米,图文,排版'
+
+
+def test_save_to_file(web, tmp_path):
+    path = tmp_path / 'data.json'
+    assert web.save_to_file({'标题': '秀米'}, str(path), 'json')
+    assert json.loads(path.read_text(encoding='utf-8')) == {'标题': '秀米'}
+
+
+def test_download_file(web, local_server, tmp_path):
+    target = tmp_path / 'page.html'
+    assert web.download_file(f"{local_server}/page", str(target), segments=1)
+    assert target.read_bytes() == web.get_page(f"{local_server}/page").content
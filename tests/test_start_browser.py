@@ -0,0 +1,178 @@
+"""start_browser：DevTools轮询的退避和超时、/json/version 读取、用假浏览器脚本测试启动流程"""
+
+import json
+import os
+import socket
+import sys
+import textwrap
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from types import SimpleNamespace
+
+import pytest
+
+import start_browser
+from start_browser import get_devtools_version, wait_for_devtools, launch_debug_browser
+
+
+class FakeClock:
+    """代替 time 模块：sleep 只推进时间并记录等待的秒数"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(start_browser, 'time', SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    return clock
+
+
+def fake_versions(monkeypatch, answers):
+    """get_devtools_version 依次返回answers中的值，用完后一直返回None"""
+    answers = iter(answers)
+    calls = []
+
+    def version(port, host, timeout=1.0):
+        calls.append(timeout)
+        return next(answers, None)
+
+    monkeypatch.setattr(start_browser, 'get_devtools_version', version)
+    return calls
+
+
+def test_poll_interval_doubles_up_to_max(clock, monkeypatch):
+    info = {'webSocketDebuggerUrl': 'ws://127.0.0.1:9222/devtools/browser/x'}
+    fake_versions(monkeypatch, [None] * 6 + [info])
+    assert wait_for_devtools(timeout=30) is info
+    assert clock.sleeps == [0.05, 0.1, 0.2, 0.4, 0.5, 0.5]
+
+
+def test_timeout_returns_none_and_last_sleep_is_truncated(clock, monkeypatch):
+    calls = fake_versions(monkeypatch, [])
+    assert wait_for_devtools(timeout=1.0) is None
+    assert clock.now == pytest.approx(1.0)
+    assert clock.sleeps[:4] == [0.05, 0.1, 0.2, 0.4]
+    assert clock.sleeps[-1] == pytest.approx(0.25)
+    # 单次请求的超时不超过剩余时间（最少0.1秒）
+    assert calls[0] == 1.0 and calls[-1] == 0.1
+
+
+def test_stops_when_process_exits(clock, monkeypatch):
+    fake_versions(monkeypatch, [])
+    polls = iter([None, None, 1])
+    process = SimpleNamespace(poll=lambda: next(polls))
+    assert wait_for_devtools(timeout=30, process=process) is None
+    assert clock.sleeps == [0.05, 0.1]
+
+
+class _VersionHandler(BaseHTTPRequestHandler):
+    body = b''
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200 if self.path == '/json/version' else 404)
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+
+@pytest.fixture
+def version_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _VersionHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize('body, ok', [
+    (json.dumps({'Browser': 'Chrome/120', 'webSocketDebuggerUrl': 'ws://x'}).encode(), True),
+    (json.dumps({'Browser': 'Chrome/120'}).encode(), False),
+    (b'not json', False),
+])
+def test_get_devtools_version(version_server, body, ok, monkeypatch):
+    monkeypatch.setattr(_VersionHandler, 'body', body)
+    info = get_devtools_version(version_server.server_address[1])
+    assert (info == json.loads(body)) if ok else info is None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_get_devtools_version_port_closed():
+    assert get_devtools_version(free_port(), timeout=0.5) is None
+
+
+def fake_browser(tmp_path, exit_code=None):
+    """可执行的假浏览器：在 --remote-debugging-port 上提供 /json/version，或立即以exit_code退出"""
+    script = tmp_path / 'fake-browser'
+    script.write_text(f"#!{sys.executable}\n" + textwrap.dedent(f"""
+        import json, sys
+        from http.server import HTTPServer, BaseHTTPRequestHandler
+        if {exit_code!r} is not None:
+            sys.exit({exit_code!r})
+        port = int(next(a for a in sys.argv if a.startswith('--remote-debugging-port=')).split('=')[1])
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = json.dumps({{'Browser': 'Fake/1.0',
+                                    'webSocketDebuggerUrl': f'ws://127.0.0.1:{{port}}/devtools/browser/x'}}).encode()
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        HTTPServer(('127.0.0.1', port), Handler).serve_forever()
+    """))
+    script.chmod(0o755)
+    return str(script)
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="假浏览器是带shebang的脚本")
+def test_launch_waits_until_ready_and_reuses_port(tmp_path):
+    port = free_port()
+    result = launch_debug_browser('chrome', fake_browser(tmp_path), port=port,
+                                  user_data_dir=str(tmp_path / 'profile'), timeout=10)
+    process = result['process']
+    try:
+        assert result['ws_url'] == f'ws://127.0.0.1:{port}/devtools/browser/x'
+        assert result['version'] == 'Fake/1.0'
+        assert process.poll() is None
+        # 端口上已有浏览器时直接复用，不再启动
+        reused = launch_debug_browser('chrome', fake_browser(tmp_path, exit_code=3), port=port)
+        assert reused['process'] is None and reused['ws_url'] == result['ws_url']
+    finally:
+        process.kill()
+        process.wait()
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="假浏览器是带shebang的脚本")
+def test_launch_reports_early_exit(tmp_path):
+    with pytest.raises(RuntimeError, match='退出码: 3'):
+        launch_debug_browser('chrome', fake_browser(tmp_path, exit_code=3), port=free_port(),
+                             user_data_dir=str(tmp_path / 'profile'), timeout=10)
+
+
+def test_launch_without_browser(monkeypatch):
+    monkeypatch.setattr(start_browser, 'detect_browser_paths', lambda: {})
+    with pytest.raises(FileNotFoundError):
+        launch_debug_browser('edge', port=free_port())
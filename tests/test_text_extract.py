@@ -0,0 +1,39 @@
+"""text_extract：流式规范化与整段规范化结果一致，与文本如何分段传入无关"""
+
+import pytest
+
+from text_extract import TextNormalizer, html_to_text
+
+
+def normalize(chunks):
+    normalizer = TextNormalizer()
+    phrases = []
+    for chunk in chunks:
+        phrases.extend(normalizer.feed(chunk))
+    phrases.extend(normalizer.close())
+    return phrases
+
+
+def legacy_normalize(text):
+    """旧版 extract_text 的清理规则"""
+    lines = (line.strip() for line in text.splitlines())
+    return [phrase.strip() for line in lines for phrase in line.split("  ") if phrase.strip()]
+
+
+@pytest.mark.parametrize('text', [
+    '',
+    '  秀米  排版 \n\n 示例\r\n文字 ',
+    'a \t b   c    d\x85e f\x0bg',
+    '第1段  秀米排版示例文字，Xiumi layout sample text 1。 小标题 1  阅读原文',
+])
+def test_any_split_matches_whole_text(text):
+    expected = legacy_normalize(text)
+    assert normalize([text]) == expected
+    # 逐字符传入：两个空格、\r\n 都可能被切在两段之间
+    assert normalize(list(text)) == expected
+    assert normalize([text[i:i + 3] for i in range(0, len(text), 3)]) == expected
+
+
+def test_many_text_nodes_on_one_line():
+    html = '<p>' + ''.join(f'<span>秀米 {i} </span>' for i in range(2000)) + '</p>'
+    assert html_to_text(html) == ' '.join(f'秀米 {i}' for i in range(2000))
@@ -0,0 +1,132 @@
+"""WebAccess：GET/POST、批量请求和流式JSON；传输层连接池的挂载"""
+
+import threading
+
+import pytest
+
+import http_transport
+from web_access import WebAccess
+
+
+@pytest.fixture
+def web(transport, cookie_vault):
+    return WebAccess(cookie_vault=cookie_vault, transport=transport)
+
+
+def test_get_text_and_json(web, local_server):
+    assert '秀米图文' in web.get_text(f"{local_server}/page")
+    data = web.get_json(f"{local_server}/api/articles?count=3")
+    assert [item['id'] for item in data['data']['list']] == [0, 1, 2]
+
+
+def test_get_failure_returns_none(web, local_server):
+    assert web.get(f"{local_server}/missing") is None
+    assert web.get_text(f"{local_server}/missing") == ""
+    assert web.get_json(f"{local_server}/missing") == {}
+
+
+def test_cookie_vault_cookies_are_sent(transport, cookie_vault, local_server):
+    cookie_vault.store_dict({'sid': 'vault-sid'}, domain='127.0.0.1')
+    web = WebAccess(cookie_vault=cookie_vault, transport=transport)
+    assert web.get_json(f"{local_server}/echo")['cookie'] == 'sid=vault-sid'
+
+
+def test_cache_uses_dedicated_transport(cookie_vault, tmp_path):
+    from http_cache import HttpCache
+    from http_transport import get_shared_transport
+
+    cache = HttpCache(str(tmp_path / 'cache'))
+    web = WebAccess(cookie_vault=cookie_vault, cache=cache)
+    assert web.transport is not get_shared_transport()
+    assert web.transport.cache is cache
+    assert get_shared_transport().cache is None
+
+def test_other_vault_does_not_touch_shared_session(cookie_vault):
+    from cookie_vault import CookieVault
+    from http_transport import get_shared_transport
+
+    shared = get_shared_transport()
+    cookie_vault.store_dict({'sid': 'other-account'})
+    web = WebAccess(cookie_vault=cookie_vault)
+    # 其他保管库的Cookie只加载到独立的传输层
+    assert web.transport is not shared
+    assert web.session.cookies.get('sid') == 'other-account'
+    assert 'other-account' not in shared.session.cookies.values()
+    # 默认保管库仍使用共用传输层
+    assert WebAccess(cookie_vault=CookieVault()).transport is shared
+
+
+def test_post(web, local_server):
+    response = web.post(f"{local_server}/submit", data={'a': '1'})
+    assert response.json()['body'] == 'a=1'
+
+
+def test_get_many_ordered(web, local_server):
+    urls = [f"{local_server}/article/{i}" for i in range(20)] + [f"{local_server}/missing"]
+    results = list(web.get_many(urls, concurrency=4))
+    assert [r['index'] for r in results] == list(range(21))
+    assert all(r['ok'] for r in results[:20])
+    assert results[-1]['status'] == 404 and not results[-1]['ok']
+    assert 'XM-0007' in results[7]['response'].text
+
+
+def test_get_many_sizes_pools_before_submitting(web, local_server, monkeypatch):
+    events = []
+    ensure = web.transport.ensure_pool_size
+    fetch = web._fetch
+    monkeypatch.setattr(web.transport, 'ensure_pool_size',
+                        lambda host, size: events.append(('pool', host)) or ensure(host, size))
+    monkeypatch.setattr(web, '_fetch', lambda *args: events.append(('fetch', None)) or fetch(*args))
+
+    port = local_server.rsplit(':', 1)[1]
+    urls = [f"{local_server}/article/{i}" if i % 2 else f"http://localhost:{port}/article/{i}" for i in range(16)]
+    assert all(r['ok'] for r in web.get_many(urls, concurrency=12))
+    # 第一批URL的连接池都在第一个请求之前调整好
+    first_fetch = events.index(('fetch', None))
+    assert {host for kind, host in events[:first_fetch]} == {f"127.0.0.1:{port}", f"localhost:{port}"}
+    assert web.transport.host_pool_sizes[f"localhost:{port}"] == 12
+
+
+def test_ensure_pool_size_evicts_least_recent_auto_pools(transport, monkeypatch):
+    monkeypatch.setattr(http_transport, 'MAX_AUTO_HOST_POOLS', 2)
+    transport.set_host_pool_size('fixed.example', 20)
+    for host in ('a.example', 'b.example', 'a.example', 'c.example'):
+        transport.ensure_pool_size(host, 20)
+
+    # b 最久没有用到，被移除；手动设置的主机保留
+    assert set(transport.host_pool_sizes) == {'fixed.example', 'a.example', 'c.example'}
+    mounted = {prefix for prefix in transport.session.adapters if prefix.endswith('.example/')}
+    assert mounted == {f'{scheme}://{host}/' for scheme in ('http', 'https')
+                       for host in ('fixed.example', 'a.example', 'c.example')}
+    assert transport.session.get_adapter('http://b.example/x') is transport.session.adapters['http://']
+    assert transport.session.get_adapter('https://a.example/x').poolmanager.connection_pool_kw['maxsize'] == 20
+
+
+def test_mounting_pools_while_other_threads_look_up_adapters(transport):
+    errors = []
+    done = threading.Event()
+
+    def look_up():
+        try:
+            while not done.is_set():
+                transport.session.get_adapter('https://xiumi.us/a')
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=look_up)
+    thread.start()
+    try:
+        for i in range(300):
+            transport.ensure_pool_size(f'host{i}.example', 20)
+    finally:
+        done.set()
+        thread.join()
+    assert errors == []
+    assert len(transport.host_pool_sizes) == http_transport.MAX_AUTO_HOST_POOLS
+
+
+def test_iter_json(web, local_server):
+    items = list(web.iter_json(f"{local_server}/api/articles", 'data.list', params={'count': 500}, chunk_size=1024))
+    assert len(items) == 500
+    assert items[-1]['title'] == '测试文章 499'
+    assert list(web.iter_json(f"{local_server}/missing", 'data.list')) == []
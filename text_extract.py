@@ -0,0 +1,190 @@
+"""
+网页纯文本提取
+一次遍历文档树得到规范化后的纯文本，支持BeautifulSoup对象和lxml树，可以分块流式输出
+"""
+
+import re
+from typing import Iterator, Iterable, List, Union
+
+from bs4 import BeautifulSoup, Tag, NavigableString, CData
+
+try:
+    from lxml import etree
+    import lxml.html
+except ImportError:
+    etree = None
+
+
+# get_text() 不会返回这些标签内的文字（BeautifulSoup把它们存成特殊字符串类型）
+NON_TEXT_TAGS = frozenset(['script', 'style', 'template', 'rt', 'rp'])
+
+# get_text() 只返回这两种字符串（注释、Doctype等都是NavigableString的子类，需要排除）
+TEXT_STRING_TYPES = (NavigableString, CData)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# 短语分隔符：str.splitlines 认作换行的字符，以及两个以上的连续空格
+_SEPARATOR = re.compile('[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]| {2,}')
+
+
+class TextNormalizer:
+    """
+    流式文本规范化，结果与旧版 SimpleWebAccess.extract_text 的清理规则一致：
+    按行去掉首尾空白，再按两个空格拆成短语，去掉空短语后用一个空格连接
+
+    换行符和两个以上的连续空格都是短语分隔符。文本可以分多次传入，每次只扫描新传入的部分，
+    最后一个分隔符之后的片段暂存，留到下次与后面的文本拼成完整短语
+    """
+
+    def __init__(self):
+        # 尚未确定的短语片段（按片段保存，长行不会被反复拼接复制）
+        self._pending: List[str] = []
+        # 暂存部分是否以空格结尾：下一段以空格开头时，两者组成跨段的分隔符
+        self._pending_space = False
+
+    def _flush(self) -> Iterator[str]:
+        phrase = ''.join(self._pending).strip()
+        self._pending = []
+        self._pending_space = False
+        if phrase:
+            yield phrase
+
+    def feed(self, text: str) -> Iterator[str]:
+        """传入一段文本，返回已经确定的短语"""
+        if not text:
+            return
+        if self._pending_space and text[0] == ' ':
+            yield from self._flush()
+        pos = 0
+        for match in _SEPARATOR.finditer(text):
+            self._pending.append(text[pos:match.start()])
+            yield from self._flush()
+            pos = match.end()
+        if pos < len(text):
+            self._pending.append(text[pos:])
+            self._pending_space = text[-1] == ' '
+
+    def close(self) -> Iterator[str]:
+        """结束输入，返回剩余的短语"""
+        yield from self._flush()
+
+
+def iter_soup_strings(node: Tag) -> Iterator[str]:
+    """按文档顺序遍历BeautifulSoup树中的正文字符串，整棵跳过script/style等子树"""
+    stack = [iter(node.contents)]
+    while stack:
+        for child in stack[-1]:
+            if isinstance(child, Tag):
+                if child.name not in NON_TEXT_TAGS:
+                    stack.append(iter(child.contents))
+                    break
+            elif type(child) in TEXT_STRING_TYPES:
+                yield child
+        else:
+            stack.pop()
+
+
+def iter_lxml_strings(root) -> Iterator[str]:
+    """按文档顺序遍历lxml树中的正文字符串（元素的text和tail），跳过script/style等子树和注释"""
+    skip_depth = 0
+    for event, node in etree.iterwalk(root, events=('start', 'end', 'comment', 'pi')):
+        if event in ('comment', 'pi'):
+            # 注释、处理指令本身不是正文，但其后的tail是
+            if not skip_depth and node.tail:
+                yield node.tail
+            continue
+        if event == 'start':
+            if skip_depth:
+                skip_depth += 1
+            elif node.tag in NON_TEXT_TAGS:
+                skip_depth = 1
+            elif node.text:
+                yield node.text
+            continue
+
+        if skip_depth:
+            skip_depth -= 1
+            if skip_depth:
+                continue
+        # tail 是节点之后、属于父元素的文字
+        if node.tail and node is not root:
+            yield node.tail
+
+
+def iter_strings(doc) -> Iterator[str]:
+    """根据文档类型选择遍历方式"""
+    if isinstance(doc, Tag):
+        return iter_soup_strings(doc)
+    if etree is not None and isinstance(doc, (etree._Element, etree._ElementTree)):
+        if isinstance(doc, etree._ElementTree):
+            doc = doc.getroot()
+        return iter_lxml_strings(doc)
+    raise TypeError(f"不支持的文档类型: {type(doc).__name__}")
+
+
+def iter_phrases(strings: Iterable[str]) -> Iterator[str]:
+    """把原始字符串流规范化成短语流"""
+    normalizer = TextNormalizer()
+    for text in strings:
+        yield from normalizer.feed(text)
+    yield from normalizer.close()
+
+
+def iter_text(doc, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    分块输出规范化后的纯文本，所有块直接拼接等于 extract_text(doc)
+
+    Args:
+        doc: BeautifulSoup对象（或其中的Tag）、lxml元素或lxml树
+        chunk_size: 每块的大致字符数
+
+    Yields:
+        文本块
+    """
+    buffer = []
+    size = 0
+    first = True
+    for phrase in iter_phrases(iter_strings(doc)):
+        if not first:
+            buffer.append(' ')
+            size += 1
+        first = False
+        buffer.append(phrase)
+        size += len(phrase)
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def extract_text(doc) -> str:
+    """
+    提取规范化后的纯文本（一次遍历，不修改文档树）
+
+    Args:
+        doc: BeautifulSoup对象（或其中的Tag）、lxml元素或lxml树
+
+    Returns:
+        纯文本内容
+    """
+    return ' '.join(iter_phrases(iter_strings(doc)))
+
+
+def html_to_text(html: Union[str, bytes], stream: bool = False):
+    """
+    直接从HTML提取纯文本，安装了lxml时跳过BeautifulSoup，在lxml树上提取
+
+    Args:
+        html: HTML内容
+        stream: 为True时返回文本块迭代器
+
+    Returns:
+        纯文本内容，或文本块迭代器
+    """
+    if etree is not None and html.strip():
+        doc = lxml.html.document_fromstring(html)
+    else:
+        doc = BeautifulSoup(html, 'html.parser')
+    return iter_text(doc) if stream else extract_text(doc)
@@ -4,19 +4,36 @@
 """
 
 import requests
-from typing import Optional, Dict
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import chain, islice
+from typing import Optional, Dict, Any, Iterable, Iterator
+from urllib.parse import urlparse
+
+from cookie_vault import CookieVault
+from http_cache import HttpCache
+from http_transport import HttpTransport, get_shared_transport
+from json_stream import iter_json_items, JSONStreamError
 
 
 class WebAccess:
     """简洁网页访问类"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        # 设置用户代理
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
-        self.timeout = 30
+    def __init__(self, cookie_vault: CookieVault = None, transport: HttpTransport = None, cache: HttpCache = None):
+        # 连接池、请求头、重试、缓存和耗时统计由传输层负责，默认使用所有工具共用的传输层；
+        # 只传入cache时使用带缓存的独立传输层，不在共用传输层上启用缓存；
+        # 使用其他保管库（如另一个账号）时也使用独立的传输层，不把它的Cookie写入共用会话
+        self.cookie_vault = cookie_vault if cookie_vault is not None else CookieVault()
+        if transport is None and (cache is not None or not self.cookie_vault.is_default()):
+            transport = HttpTransport(cache=cache)
+        self.transport = transport or get_shared_transport()
+        if cache is not None and self.transport.cache is not cache:
+            self.transport.enable_cache(cache)
+        self.session = self.transport.session
+        # 加载Cookie保管库中的登录Cookie
+        self.cookie_vault.load_into_session(self.session)
+        self.timeout = self.transport.timeout
     
     def get(self, url: str, params: Dict = None) -> Optional[requests.Response]:
         """
@@ -30,7 +47,7 @@ class WebAccess:
             Response对象，失败返回None
         """
         try:
-            response = self.session.get(url, params=params, timeout=self.timeout)
+            response = self.transport.get(url, params=params, timeout=self.timeout)
             return response if response.status_code == 200 else None
         except:
             return None
@@ -49,13 +66,94 @@ class WebAccess:
         """
         try:
             if json:
-                response = self.session.post(url, json=json, timeout=self.timeout)
+                response = self.transport.post(url, json=json, timeout=self.timeout)
             else:
-                response = self.session.post(url, data=data, timeout=self.timeout)
+                response = self.transport.post(url, data=data, timeout=self.timeout)
             return response if response.status_code in [200, 201] else None
         except:
             return None
     
+    def _fetch(self, index: int, url: str, params: Dict = None) -> Dict[str, Any]:
+        """获取单个URL，返回包含状态码、耗时和错误信息的结果字典（不抛出异常）"""
+        result = {
+            'index': index,
+            'url': url,
+            'status': None,
+            'ok': False,
+            'elapsed': 0.0,
+            'response': None,
+            'error': '',
+        }
+        start = time.perf_counter()
+        try:
+            response = self.transport.get(url, params=params, timeout=self.timeout)
+            result['status'] = response.status_code
+            result['ok'] = response.status_code == 200
+            result['response'] = response
+            if not result['ok']:
+                result['error'] = f"状态码 {response.status_code}"
+        except requests.exceptions.RequestException as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+        result['elapsed'] = time.perf_counter() - start
+        return result
+
+    def get_many(self, urls: Iterable[str], concurrency: int = 8, ordered: bool = True,
+                 params: Dict = None) -> Iterator[Dict[str, Any]]:
+        """
+        并发GET多个URL
+
+        同一时间最多有 concurrency 个请求在进行，URL可以是生成器（边读取边提交）
+
+        Args:
+            urls: URL列表
+            concurrency: 并发请求数
+            ordered: True按输入顺序产出结果，False按完成顺序产出
+            params: 每个请求共用的URL参数
+
+        Yields:
+            结果字典: index（输入中的序号）、url、status、ok（状态码为200）、
+            elapsed（秒）、response（Response对象，请求异常时为None）、error（错误信息）
+        """
+        concurrency = max(1, concurrency)
+        # 多提交一些，线程空闲时不用等调用方取走结果
+        window = concurrency * 2
+        urls = iter(urls)
+        # 先读取第一批URL，在提交任何请求之前调整好这些主机的连接池（按 主机:端口 挂载）
+        first = list(islice(urls, window))
+        for url in first:
+            self._ensure_pool(url, concurrency)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            try:
+                for index, url in enumerate(chain(first, urls)):
+                    if index >= window:
+                        self._ensure_pool(url, concurrency)
+                    pending.append(executor.submit(self._fetch, index, url, params))
+                    if len(pending) >= window:
+                        yield from self._drain(pending, ordered, window - 1)
+                yield from self._drain(pending, ordered, 0)
+            finally:
+                # 调用方提前停止迭代时，取消还没开始的请求
+                for future in pending:
+                    future.cancel()
+
+    def _ensure_pool(self, url: str, concurrency: int) -> None:
+        netloc = urlparse(url).netloc
+        if netloc:
+            self.transport.ensure_pool_size(netloc, concurrency)
+
+    @staticmethod
+    def _drain(pending: deque, ordered: bool, keep: int) -> Iterator[Dict[str, Any]]:
+        """产出已提交请求的结果，直到剩余数量不超过keep"""
+        while len(pending) > keep:
+            if ordered:
+                yield pending.popleft().result()
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                yield future.result()
+
     def get_text(self, url: str) -> str:
         """获取网页文本内容"""
         response = self.get(url)
@@ -68,6 +166,36 @@ class WebAccess:
             return response.json() if response else {}
         except:
             return {}
+    
+    def iter_json(self, url: str, path: str = '', params: Dict = None,
+                  chunk_size: int = 64 * 1024) -> Iterator[Any]:
+        """
+        流式获取JSON数组中的元素，边下载边解析
+        
+        适合很大的文章列表、导出数据等，内存占用只和单个元素的大小有关
+        
+        Args:
+            url: 接口URL
+            path: 数组所在的路径，如 'data.list'；空字符串表示响应本身就是数组
+            params: URL参数
+            chunk_size: 每次读取的字节数
+            
+        Yields:
+            数组中的每个元素，请求失败时不产出任何元素
+            
+        Raises:
+            JSONStreamError: 响应不是合法的JSON，或找不到指定的数组
+        """
+        try:
+            response = self.transport.get(url, params=params, timeout=self.timeout, stream=True)
+        except requests.exceptions.RequestException:
+            return
+        try:
+            if response.status_code != 200:
+                return
+            yield from iter_json_items(response.iter_content(chunk_size=chunk_size), path)
+        finally:
+            response.close()
 
 
 def main():
@@ -90,6 +218,13 @@ def main():
     print("\n测试JSON API...")
     json_data = web.get_json("https://httpbin.org/json")
     print(f"JSON数据: {json_data}")
+    
+    # 测试批量请求
+    print("\n测试批量请求...")
+    urls = [f"https://httpbin.org/get?page={i}" for i in range(10)]
+    for result in web.get_many(urls, concurrency=5):
+        status = result['status'] if result['ok'] else result['error']
+        print(f"  [{result['index']}] {result['url']} -> {status} ({result['elapsed'] * 1000:.0f}ms)")
 
 
 if __name__ == "__main__":